@@ -1,43 +1,63 @@
 # backend/app/api/dependencies.py
 
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.config import settings
+from app.core.store_token_cache import StoreIdentity, store_token_cache
+from app.database.async_connection import get_async_db
 from app.database.connection import get_db
-from app.database import models
-from app.schemas import token_schemas
-from app.crud import user_crud
+from app.crud import async_store_crud, store_crud
+from app.security import security
+
+# Kullanıcı doğrulaması tek bir yerde, app/security/security.py içinde yapılır;
+# bu modülden import eden eski kodlar için yeniden dışa aktarılır.
+get_current_user = security.get_current_user
+get_current_user_model = security.get_current_user_model
+get_current_user_async = security.get_current_user_async
+
+
+def resolve_server_token(db: Session, server_token: str) -> Optional[StoreIdentity]:
+    """Server token'ı önbellek üzerinden mağaza kimliğine çözer. Geçersizse None döner."""
+    return store_token_cache.resolve(
+        server_token, lambda token: store_crud.get_store_identity_by_server_token(db, token)
+    )
 
-bearer_scheme = HTTPBearer()
 
-def get_current_user(
-    db: Session = Depends(get_db), 
-    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)
-) -> models.User:
+def get_store_from_server_token(
+    x_server_token: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+) -> StoreIdentity:
     """
-    HTTP 'Authorization' başlığından Bearer token'ı doğrular ve mevcut kullanıcıyı döndürür.
+    2. katman sunucu uç noktaları için 'X-Server-Token' başlığını doğrular.
+    Önbellekte bulunan token'lar için veritabanına hiç gidilmez.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
+    if not x_server_token:
+        raise HTTPException(status_code=401, detail="Server token missing")
+
+    store = resolve_server_token(db, x_server_token)
+    if store is None:
+        raise HTTPException(status_code=404, detail="Store with this token not found")
+    return store
+
+
+async def resolve_server_token_async(db: AsyncSession, server_token: str) -> Optional[StoreIdentity]:
+    return await store_token_cache.resolve_async(
+        server_token, lambda token: async_store_crud.get_store_identity_by_server_token(db, token)
     )
-    
-    token = credentials.credentials
-    
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = token_schemas.TokenData(email=email)
-    except JWTError:
-        raise credentials_exception
-    
-    user = user_crud.get_user_by_email(db, email=token_data.email)
-    if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+
+
+async def get_store_from_server_token_async(
+    x_server_token: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+) -> StoreIdentity:
+    """get_store_from_server_token'ın asenkron rotalar için karşılığı."""
+    if not x_server_token:
+        raise HTTPException(status_code=401, detail="Server token missing")
+
+    store = await resolve_server_token_async(db, x_server_token)
+    if store is None:
+        raise HTTPException(status_code=404, detail="Store with this token not found")
+    return store
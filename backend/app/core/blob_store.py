@@ -0,0 +1,119 @@
+# app/core/blob_store.py
+
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+
+from app.core.config import settings
+
+# İçerik adresli dosya deposu
+# Dosyalar içeriklerinin SHA-256 özeti ile adlandırılır: aynı içerik bir kez saklanır
+# ve bir anahtarın gösterdiği dosya asla değişmez. Bu yüzden anahtar aynı zamanda
+# ETag olarak kullanılabilir ve dosyalar tarayıcıda süresiz önbelleklenebilir.
+# Dosyalar 'uploaded_files' altında tutulur ve main.py'deki /files mount'u ile sunulur.
+
+UPLOAD_ROOT = Path("uploaded_files")
+FILES_URL_PREFIX = "/files"
+# Anahtarı değişmeyen dosyalar için; tarayıcı ve ara önbellekler süresiz saklayabilir.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_CONTENT_KEY_NAME = re.compile(r"^([0-9a-f]{64})(?:[._]|$)")
+
+
+def content_key(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobStore:
+    def __init__(self, namespace: str, root: Path = UPLOAD_ROOT):
+        self.namespace = namespace
+        self.directory = root / namespace
+
+    def _relative(self, key: str, suffix: str) -> str:
+        # Tek bir klasörde çok sayıda dosya birikmesin diye ilk iki karaktere göre dağıtılır.
+        return f"{key[:2]}/{key}{suffix}"
+
+    def path(self, key: str, suffix: str = "") -> Path:
+        return self.directory / self._relative(key, suffix)
+
+    def exists(self, key: str, suffix: str = "") -> bool:
+        return self.path(key, suffix).is_file()
+
+    def write(self, key: str, data: bytes, suffix: str = "") -> Path:
+        """Dosyayı atomik olarak yazar; aynı anahtar zaten varsa dokunmaz."""
+        target = self.path(key, suffix)
+        if target.is_file():
+            return target
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return target
+
+    def write_stream(
+        self, source: BinaryIO, suffix: str = "", chunk_size: int = 1024 * 1024, max_bytes: Optional[int] = None
+    ) -> Tuple[str, int]:
+        """
+        Kaynağı parça parça geçici dosyaya yazarken SHA-256 özetini hesaplar; dosya belleğe
+        alınmaz. (anahtar, boyut) döndürür. max_bytes aşılırsa ValueError fırlatılır.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                while chunk := source.read(chunk_size):
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise ValueError("File is too large")
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            key = digest.hexdigest()
+            target = self.path(key, suffix)
+            if target.is_file():
+                os.unlink(tmp_path)
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return key, size
+
+    def url(self, key: str, suffix: str = "") -> str:
+        return f"{settings.PUBLIC_BASE_URL.rstrip('/')}{FILES_URL_PREFIX}/{self.namespace}/{self._relative(key, suffix)}"
+
+
+class ContentAddressedStaticFiles(StaticFiles):
+    """
+    /files mount'u. Adı içerik anahtarıyla başlayan dosyalarda ETag anahtarın kendisidir
+    (yanıtlardaki *_etag alanlarıyla aynı) ve Cache-Control süresizdir. Diğer dosyalar
+    StaticFiles'ın varsayılan başlıklarıyla sunulur.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        match = _CONTENT_KEY_NAME.match(os.path.basename(full_path))
+        if match is None:
+            return super().file_response(full_path, stat_result, scope, status_code)
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        response.headers["etag"] = f'"{match.group(1)}"'
+        response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
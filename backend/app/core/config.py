@@ -1,5 +1,7 @@
 # app/core/config.py
 
+from typing import Dict, List, Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -10,7 +12,125 @@ class Settings(BaseSettings):
     # --- EKSİK OLAN SATIR BURAYA EKLENDİ ---
     ENCRYPTION_KEY: str
 
+    # --- Veritabanı bağlantı havuzu (worker başına) ---
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    # MySQL wait_timeout'tan kısa tutulmalı; eski bağlantılar bu süreden sonra yenilenir.
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Asenkron uç noktaların bağlantı adresi; boşsa DATABASE_URL'den türetilir
+    # (mysql -> mysql+aiomysql, sqlite -> sqlite+aiosqlite).
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Opsiyonel okuma replikaları, ör. ["mysql+mysqlconnector://user:pw@replica1/db"]
+    DATABASE_READ_REPLICA_URLS: List[str] = []
+
+    # Yanıtlardaki dosya URL'lerinin önüne eklenir (ör. "https://api.example.com").
+    # Boş bırakılırsa göreli URL döner.
+    PUBLIC_BASE_URL: str = ""
+
+    # --- Profil resimleri ---
+    PROFILE_PICTURE_MAX_BYTES: int = 10 * 1024 * 1024
+    PROFILE_PICTURE_MAX_PIXELS: int = 40_000_000
+    PROFILE_PICTURE_SIZE: int = 512
+    PROFILE_PICTURE_THUMBNAIL_SIZE: int = 96
+    PROFILE_PICTURE_QUALITY: int = 85
+
+    # --- Firmware ---
+    FIRMWARE_MAX_BYTES: int = 512 * 1024 * 1024
+    # Yüklemede üretilen sıkıştırılmış imajlar ve önceki sürümlerden farklar (bsdiff4)
+    FIRMWARE_GZIP_LEVEL: int = 9
+    FIRMWARE_ZSTD_LEVEL: int = 19
+    # Fark üretilecek önceki sürüm sayısı (aynı hedef); 0 fark üretimini kapatır
+    FIRMWARE_DELTA_BASES: int = 1
+    # bsdiff iki imajı da belleğe alır; bu boyuttan büyük imajlar için fark üretilmez
+    FIRMWARE_DELTA_MAX_BYTES: int = 64 * 1024 * 1024
+    # Paketleri üreten ayrı süreç sayısı; 0 ise yükleme isteğinin arka plan görevinde üretilir.
+    FIRMWARE_ARTIFACT_WORKERS: int = 1
+    # Kademeli dağıtım: /latest uygun sürümü bulmak için bakılan son sürüm sayısı,
+    # indirme izninin geçerlilik süresi ve "sonra tekrar dene" bekleme süresinin tabanı
+    FIRMWARE_ROLLOUT_LOOKBACK: int = 20
+    FIRMWARE_DOWNLOAD_SLOT_SECONDS: int = 900
+    FIRMWARE_ROLLOUT_RETRY_SECONDS: int = 300
+    # /latest için hedef başına son sürümlerin bellekte tutulma süresi (diğer worker'lardaki değişiklikler için)
+    FIRMWARE_LATEST_CACHE_SECONDS: float = 30.0
+
+    # --- Heartbeat toplayıcı ---
+    # Heartbeat'ler bellekte toplanır ve bu aralıkla tek bir toplu UPDATE ile yazılır.
+    HEARTBEAT_FLUSH_INTERVAL_SECONDS: float = 10.0
+    # Son heartbeat'i bu süreden yeni olan mağaza Online sayılır.
+    STORE_ONLINE_WINDOW_SECONDS: float = 300.0
+
+    # --- Filo durum indeksi (app/core/fleet_status.py) ---
+    # Diğer worker'ların yazdığı heartbeat'lerin okunma aralığı ve indeksin tamamen yeniden yüklenme aralığı
+    FLEET_STATUS_SYNC_SECONDS: float = 15.0
+    FLEET_STATUS_RELOAD_SECONDS: float = 300.0
+    # Saklanan son durum değişikliği olayı sayısı (/api/stores/status-events)
+    FLEET_STATUS_EVENT_BUFFER: int = 1000
+
+    # --- Oturum açmış kullanıcı önbelleği ---
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+
+    # --- Şifre hash'leme (Argon2) ---
+    # Varsayılanlar passlib'in önceki varsayılanlarıyla aynıdır; değiştirildiğinde mevcut
+    # hash'ler kullanıcı giriş yaptıkça yeni parametrelere taşınır.
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    # 0: havuz kullanılmaz, hash çağıran thread'de hesaplanır.
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # --- Server token önbelleği ---
+    # Önbellek worker başınadır: token yenilendiğinde veya mağaza silindiğinde sadece işlemi
+    # yapan worker'ın önbelleği temizlenir. Diğer worker'larda eski token en fazla
+    # SERVER_TOKEN_CACHE_TTL_SECONDS boyunca (varsayılan 5 dakika) çalışmaya devam edebilir.
+    SERVER_TOKEN_CACHE_SIZE: int = 10000
+    SERVER_TOKEN_CACHE_TTL_SECONDS: float = 300.0
+    # Bilinmeyen token'lar ayrı ve daha kısa ömürlü bir listede tutulur.
+    SERVER_TOKEN_NEGATIVE_CACHE_SIZE: int = 10000
+    SERVER_TOKEN_NEGATIVE_TTL_SECONDS: float = 30.0
+
+    # --- Log alımı ---
+    # "sync": loglar istek içinde yazılır. "queue": loglar kuyruğa alınır, 202 döner
+    # ve arka plandaki yazıcı tarafından toplu olarak yazılır.
+    LOG_INGEST_MODE: str = "sync"
+    LOG_QUEUE_MAX_SIZE: int = 50000
+    LOG_QUEUE_BATCH_SIZE: int = 500
+    LOG_QUEUE_FLUSH_INTERVAL_SECONDS: float = 1.0
+    # NDJSON akışıyla log gönderimi
+    LOG_STREAM_BATCH_SIZE: int = 1000
+    LOG_STREAM_MAX_LINE_BYTES: int = 65536
+    LOG_STREAM_MAX_ERRORS: int = 100
+    # Toplu mağaza içe/dışa aktarma (/api/stores/bulk, /api/stores/export)
+    STORE_IMPORT_BATCH_SIZE: int = 500
+    STORE_IMPORT_MAX_LINE_BYTES: int = 1048576
+    STORE_IMPORT_MAX_ERRORS: int = 100
+    STORE_EXPORT_PAGE_SIZE: int = 500
+    # Mağaza sunucusu yapılandırma senkronizasyonu (/api/ops/config?wait=)
+    CONFIG_LONG_POLL_MAX_SECONDS: float = 60.0
+    # Başka worker'daki değişiklikleri yakalamak için bekleme sırasında sürümün yeniden okunma aralığı
+    CONFIG_LONG_POLL_RECHECK_SECONDS: float = 5.0
+    # Tekrar gönderilen logların tekilleştirilmesi
+    LOG_DEDUP_CACHE_SIZE: int = 200000
+    LOG_IDEMPOTENCY_CACHE_SIZE: int = 10000
+    LOG_IDEMPOTENCY_TTL_SECONDS: float = 86400.0
+
+    # --- Log saklama (retention) ---
+    LOG_RETENTION_ENABLED: bool = True
+    LOG_RETENTION_DAYS: int = 30
+    # Seviyeye veya mağazaya göre saklama süresi (gün), ör. {"ERROR": 90, "INFO": 7}
+    LOG_RETENTION_LEVEL_DAYS: Dict[str, int] = {}
+    LOG_RETENTION_STORE_DAYS: Dict[int, int] = {}
+    LOG_RETENTION_INTERVAL_HOURS: float = 24.0
+    LOG_RETENTION_CHUNK_SIZE: int = 5000
+    LOG_RETENTION_CHUNK_PAUSE_SECONDS: float = 0.2
+    # "none", "day" veya "month". Sadece MySQL'de 'logs' tablosunu timestamp'e göre bölümler.
+    LOG_PARTITIONING: str = "none"
+    LOG_PARTITIONS_AHEAD_DAYS: int = 7
+
     class Config:
         env_file = ".env"
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -0,0 +1,52 @@
+# app/core/config_notifier.py
+
+import asyncio
+import threading
+from typing import Dict, Set, Tuple
+
+from app.core.metrics import metrics
+
+# Mağaza yapılandırması değişiklik bildirimi
+# /api/ops/config uzun beklemede (long-poll) olan istekleri, aynı worker'da bir
+# mağazanın yapılandırması değiştiğinde hemen uyandırır. Bildirim süreç içidir;
+# başka bir worker'daki değişiklikler bekleyen istekler tarafından periyodik
+# veritabanı kontrolüyle (CONFIG_LONG_POLL_RECHECK_SECONDS) yakalanır.
+# notify() senkron rotalardan (threadpool) çağrılabilir.
+
+
+class ConfigChangeNotifier:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        metrics.register_gauge("config_long_poll_waiting", self.waiting)
+
+    def notify(self, store_id: int) -> None:
+        with self._lock:
+            waiters = self._waiters.pop(store_id, set())
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    async def wait(self, store_id: int, timeout: float) -> bool:
+        """Mağaza için bildirim gelirse True, süre dolarsa False döner."""
+        entry = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.setdefault(store_id, set()).add(entry)
+        try:
+            await asyncio.wait_for(entry[1].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(store_id)
+                if waiters is not None:
+                    waiters.discard(entry)
+                    if not waiters:
+                        del self._waiters[store_id]
+
+    def waiting(self) -> int:
+        with self._lock:
+            return sum(len(waiters) for waiters in self._waiters.values())
+
+
+config_change_notifier = ConfigChangeNotifier()
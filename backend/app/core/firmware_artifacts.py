@@ -0,0 +1,158 @@
+# app/core/firmware_artifacts.py
+
+import gzip
+import multiprocessing
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple
+
+import bsdiff4
+import zstandard
+
+from app.core.config import settings
+from app.core.firmware_store import firmware_store
+from app.core.metrics import metrics
+
+# Firmware paketleri (artifact)
+# Yavaş bağlantılı mağazalar için her yüklemede imajın daha küçük biçimleri üretilir:
+#   - gzip ve zstd ile sıkıştırılmış tam imaj,
+#   - aynı hedefin önceki sürüm(ler)inden bsdiff4 farkı.
+# Hepsi bir kez, yüklemede üretilir ve içerik adresli depoya yazılır; indirme
+# sırasında sunucu hiçbir sıkıştırma yapmaz. Tam imajdan küçük olmayan paketler
+# saklanmaz (ör. zaten sıkıştırılmış imajlar). /api/firmware/latest, sunucunun
+# bildirdiği sürüme ve desteklediği biçimlere göre en küçük paketi seçer.
+# Paket açıldıktan/uygulandıktan sonra sonuç, firmware kaydındaki sha256 ile doğrulanır.
+#
+# Üretim (zstd 19, bsdiff4 için iki imaj bellekte) API worker'ında değil, ayrı bir
+# süreç havuzunda (FIRMWARE_ARTIFACT_WORKERS) çalışır; istek işleyen süreçle CPU ve
+# bellek için yarışmaz. Arka plan görevi sadece sonucu bekler ve veritabanına yazar.
+
+IDENTITY = "identity"
+ENCODINGS = ("gzip", "zstd", "bsdiff4")
+
+# (firmware_id, sha256) — fark üretilecek önceki sürümler
+FirmwareBase = Tuple[int, str]
+
+
+def _gzip(source: BinaryIO, target: BinaryIO, size: int) -> None:
+    # mtime=0: aynı imaj her seferinde aynı baytları (ve aynı anahtarı) üretir.
+    with gzip.GzipFile(fileobj=target, mode="wb", compresslevel=settings.FIRMWARE_GZIP_LEVEL, mtime=0) as out:
+        shutil.copyfileobj(source, out, 1024 * 1024)
+
+
+def _zstd(source: BinaryIO, target: BinaryIO, size: int) -> None:
+    # Boyut çerçeve başlığına yazılır; istemci tek seferde açabilir.
+    zstandard.ZstdCompressor(level=settings.FIRMWARE_ZSTD_LEVEL).copy_stream(source, target, size=size)
+
+
+def _store(produce: Callable[[BinaryIO], None]) -> Tuple[str, int]:
+    """Paketi geçici dosyaya üretir ve depoya taşır; (sha256, boyut) döndürür."""
+    with tempfile.TemporaryFile() as tmp:
+        produce(tmp)
+        tmp.seek(0)
+        return firmware_store.write_stream(tmp)
+
+
+def build_firmware_artifacts(
+    sha256: str, size_bytes: int, bases: Iterable[FirmwareBase] = (), cpu_seconds: Optional[Dict[str, float]] = None
+) -> List[dict]:
+    """
+    İmaj için paketleri üretir ve 'firmware_artifacts' satırları (firmware_id hariç)
+    olarak döndürür. Sadece tam imajdan küçük olanlar döner. 'cpu_seconds' verilirse
+    biçim başına CPU süreleri metrik yerine oraya yazılır (havuz sürecinden döndürmek için).
+    """
+    path = firmware_store.path(sha256)
+    artifacts = []
+
+    def add(encoding: str, produce: Callable[[BinaryIO], None], base_firmware_id: Optional[int] = None):
+        start = time.process_time()
+        key, size = _store(produce)
+        elapsed = time.process_time() - start
+        if cpu_seconds is None:
+            metrics.observe(f"firmware_artifact_{encoding}_cpu_seconds", elapsed)
+        else:
+            cpu_seconds[encoding] = cpu_seconds.get(encoding, 0.0) + elapsed
+        if size < size_bytes:
+            artifacts.append({"encoding": encoding, "base_firmware_id": base_firmware_id, "sha256": key, "size_bytes": size})
+
+    for encoding, compress in (("gzip", _gzip), ("zstd", _zstd)):
+        def produce(target, compress=compress):
+            with path.open("rb") as source:
+                compress(source, target, size_bytes)
+        add(encoding, produce)
+
+    if size_bytes <= settings.FIRMWARE_DELTA_MAX_BYTES:
+        new_image = None
+        for base_firmware_id, base_sha256 in bases:
+            base_path = firmware_store.path(base_sha256)
+            if base_sha256 == sha256 or not base_path.is_file() or base_path.stat().st_size > settings.FIRMWARE_DELTA_MAX_BYTES:
+                continue
+            if new_image is None:
+                new_image = path.read_bytes()
+            patch = bsdiff4.diff(base_path.read_bytes(), new_image)
+            add("bsdiff4", lambda target, patch=patch: target.write(patch), base_firmware_id)
+    return artifacts
+
+
+def _build_in_worker(sha256: str, size_bytes: int, bases: List[FirmwareBase]) -> Tuple[List[dict], Dict[str, float]]:
+    """Havuz sürecinde çalışır; paket satırlarını ve biçim başına CPU sürelerini döndürür."""
+    cpu_seconds: Dict[str, float] = {}
+    return build_firmware_artifacts(sha256, size_bytes, bases, cpu_seconds), cpu_seconds
+
+
+class FirmwareArtifactBuilder:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # 'spawn': API süreci thread'ler (heartbeat, log kuyruğu, retention) çalıştırırken fork güvenli değildir.
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def build(self, sha256: str, size_bytes: int, bases: Iterable[FirmwareBase] = ()) -> List[dict]:
+        """Paketleri havuzda üretir ve sonucu bekler. FIRMWARE_ARTIFACT_WORKERS=0 ise çağıran thread'de üretir."""
+        bases = list(bases)
+        if self.workers <= 0:
+            return build_firmware_artifacts(sha256, size_bytes, bases)
+        executor = self._ensure_executor()
+        try:
+            rows, cpu_seconds = executor.submit(_build_in_worker, sha256, size_bytes, bases).result()
+        except BrokenProcessPool:
+            # Süreç öldüyse (ör. bellek yetmedi) havuz bir sonraki yüklemede yeniden kurulur.
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise
+        for encoding, seconds in cpu_seconds.items():
+            metrics.observe(f"firmware_artifact_{encoding}_cpu_seconds", seconds)
+        return rows
+
+    def stop(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+firmware_artifact_builder = FirmwareArtifactBuilder(workers=settings.FIRMWARE_ARTIFACT_WORKERS)
+
+
+def choose_artifact(size_bytes: int, artifacts: Iterable, accept: Optional[Iterable[str]] = None):
+    """
+    Tam imaj ve kabul edilen biçimlerdeki paketler arasından en küçüğünü seçer.
+    Tam imaj seçilirse None döner.
+    """
+    accepted = set(ENCODINGS if accept is None else accept)
+    best = None
+    for artifact in artifacts:
+        if artifact.encoding in accepted and artifact.size_bytes < (best.size_bytes if best else size_bytes):
+            best = artifact
+    return best
@@ -0,0 +1,90 @@
+# app/core/firmware_cache.py
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# Hedef başına son firmware sürümleri önbelleği
+# Her mağaza sunucusu /api/firmware/latest'i sürekli sorar. Hedefin son sürümleri
+# (kademeli dağıtım için FIRMWARE_ROLLOUT_LOOKBACK kadar) burada hafif, değişmez
+# kayıtlar olarak tutulur. Mağazaya uygun sürümün seçimi ve ETag hesabı bellekte
+# yapıldığından, token önbellekteyse 304 yanıtı hiç veritabanına gitmeden döner.
+# Bu süreçteki yükleme/dağıtım değişiklikleri önbelleği hemen geçersiz kılar;
+# diğer worker'lar en geç FIRMWARE_LATEST_CACHE_SECONDS sonra yeniler.
+
+
+@dataclass(frozen=True)
+class FirmwareRelease:
+    id: int
+    target: str
+    version: str
+    file_url: str
+    sha256: Optional[str]
+    size_bytes: Optional[int]
+    release_notes: Optional[str]
+    created_at: datetime
+    updated_at: Optional[datetime]
+    rollout_percent: int
+    rollout_countries: Optional[str]
+    max_concurrent_downloads: Optional[int]
+
+    @classmethod
+    def from_model(cls, firmware) -> "FirmwareRelease":
+        return cls(**{field: getattr(firmware, field) for field in cls.__dataclass_fields__})
+
+    @property
+    def last_modified(self) -> datetime:
+        return self.updated_at or self.created_at
+
+
+Releases = Tuple[FirmwareRelease, ...]
+
+
+class LatestFirmwareCache:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, Releases]] = {}
+        # Yükleme sürerken gelen geçersiz kılma, eski sonucun önbelleğe yazılmasını engeller.
+        self._generation = 0
+
+    def get(self, target: str) -> Optional[Releases]:
+        with self._lock:
+            entry = self._entries.get(target)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            return entry[1]
+
+    async def releases_async(
+        self, target: str, loader: Callable[[str], Awaitable[Sequence]]
+    ) -> Releases:
+        """Hedefin son sürümlerini (en yeni başta) önbellekten, yoksa loader ile veritabanından döndürür."""
+        releases = self.get(target)
+        if releases is not None:
+            metrics.inc("firmware_latest_cache_hits_total")
+            return releases
+        metrics.inc("firmware_latest_cache_misses_total")
+        with self._lock:
+            generation = self._generation
+        releases = tuple(FirmwareRelease.from_model(firmware) for firmware in await loader(target))
+        # Sürümü olmayan hedefler saklanmaz; rastgele hedef adları önbelleği büyütemez.
+        with self._lock:
+            if releases and generation == self._generation:
+                self._entries[target] = (time.monotonic() + self.ttl_seconds, releases)
+        return releases
+
+    def invalidate(self, target: Optional[str] = None) -> None:
+        with self._lock:
+            self._generation += 1
+            if target is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(target, None)
+
+
+latest_firmware_cache = LatestFirmwareCache(ttl_seconds=settings.FIRMWARE_LATEST_CACHE_SECONDS)
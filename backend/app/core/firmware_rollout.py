@@ -0,0 +1,59 @@
+# app/core/firmware_rollout.py
+
+import hashlib
+from typing import List, Optional
+
+from app.core.config import settings
+from app.utils.place_keys import place_key
+
+# Kademeli (canary) firmware dağıtımı
+# Her sürüm önce mağazaların bir kısmına açılır:
+#   - rollout_percent: mağaza id'sinden türetilen 0-99 arası kova bu değerin altındaysa
+#     mağaza sürümü alır. Kova sürüm id'siyle karıştırılır; yüzde artırıldığında önceki
+#     mağazalar kapsamda kalır, ama her sürümde öncü mağazalar farklıdır.
+#   - rollout_countries: doluysa sadece bu ülkelerdeki mağazalar (ülke dalgaları).
+#   - max_concurrent_downloads: aynı anda indirme izni verilen mağaza sayısı.
+# Sürümü henüz almayan mağazalar /latest'te kendilerine açık en yeni sürümü görür.
+# Bir dalga durdurulduğunda (yüzde düşürülür, ülke listesi daraltılır) sürümü zaten
+# kurmuş mağazalar eski sürüme döndürülmez; kurulu sürümleri "en son" olarak kalır.
+# "Sonra tekrar dene" süresi mağazaya göre yayılır; hepsi aynı anda geri gelmez.
+
+
+def rollout_bucket(firmware_id: int, store_id: int) -> int:
+    digest = hashlib.sha256(f"{firmware_id}:{store_id}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") % 100
+
+
+def parse_rollout_countries(value: Optional[str]) -> List[str]:
+    return [key for key in (value or "").split(",") if key]
+
+
+def format_rollout_countries(countries: Optional[List[str]]) -> Optional[str]:
+    """Ülke adlarını karşılaştırmada kullanılan anahtarlara çevirip saklanacak metni üretir."""
+    keys = sorted({place_key(country) for country in countries or [] if country.strip()})
+    return ",".join(keys) or None
+
+
+def is_store_eligible(firmware, store_id: int, country: Optional[str]) -> bool:
+    countries = parse_rollout_countries(firmware.rollout_countries)
+    if countries and place_key(country or "") not in countries:
+        return False
+    return rollout_bucket(firmware.id, store_id) < firmware.rollout_percent
+
+
+def select_release(releases: List, store_id: int, country: Optional[str], current_version: Optional[str] = None):
+    """
+    En yeniden eskiye sıralı sürümlerden mağazanın alacağını seçer: kapsamında olduğu en
+    yeni sürüm. Mağazanın kurulu sürümü (current_version) bundan yeniyse, o sürüm döner.
+    """
+    for release in releases:
+        if release.version == current_version or is_store_eligible(release, store_id, country):
+            return release
+    return None
+
+
+def retry_after_seconds(store_id: int) -> int:
+    """FIRMWARE_ROLLOUT_RETRY_SECONDS ile bunun iki katı arasında, mağazaya göre sabit bir süre."""
+    base = settings.FIRMWARE_ROLLOUT_RETRY_SECONDS
+    digest = hashlib.sha256(f"retry:{store_id}".encode()).digest()
+    return base + int.from_bytes(digest[:4], "big") % max(1, base)
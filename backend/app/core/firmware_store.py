@@ -0,0 +1,36 @@
+# app/core/firmware_store.py
+
+import re
+from typing import BinaryIO, Optional, Tuple
+
+from app.core.blob_store import BlobStore
+from app.core.config import settings
+
+# Firmware dosyaları
+# Yüklenen imajlar içerik adresli depoda (uploaded_files/firmware) SHA-256 özetiyle
+# saklanır; farklı hedeflerin aynı isimli dosyaları çakışmaz, aynı imaj iki kez
+# yüklenirse tek kopya tutulur. Özet yükleme akarken hesaplanır ve kayıtla birlikte
+# saklanır. İndirme /api/firmware/files/{sha256} üzerinden yapılır (Range ve
+# If-None-Match desteklenir; kesilen indirme kaldığı yerden devam eder, özet
+# 'Repr-Digest' başlığında da gönderilir).
+# Eski kayıtların dosyaları /firmware_updates altında sunulmaya devam eder.
+
+FIRMWARE_FILES_URL_PREFIX = "/api/firmware/files"
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+firmware_store = BlobStore("firmware")
+
+
+def save_firmware_file(source: BinaryIO) -> Tuple[str, int]:
+    """Firmware dosyasını depoya akış halinde yazar; (sha256, boyut) döndürür."""
+    return firmware_store.write_stream(source, max_bytes=settings.FIRMWARE_MAX_BYTES)
+
+
+def firmware_file_url(sha256: str) -> str:
+    return f"{FIRMWARE_FILES_URL_PREFIX}/{sha256}"
+
+
+def firmware_file_path(sha256: str) -> Optional[str]:
+    if not SHA256_PATTERN.match(sha256) or not firmware_store.exists(sha256):
+        return None
+    return str(firmware_store.path(sha256))
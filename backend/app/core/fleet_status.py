@@ -0,0 +1,380 @@
+# app/core/fleet_status.py
+
+import heapq
+import secrets
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.utils.place_keys import place_key
+from app.core.metrics import metrics
+from app.database import models
+from app.database.connection import SessionLocal
+
+# Filo durum indeksi
+# Her mağazanın Online/Offline durumu bellekte, ülke/şehir gruplarına ayrılmış
+# kümelerde tutulur. Heartbeat'ler (app/core/heartbeat.py) indeksi anında besler;
+# son heartbeat'i STORE_ONLINE_WINDOW_SECONDS'tan eski olan mağazalar bir öncelik
+# kuyruğu (heap) ile Offline'a alınır. Böylece durum özeti grup sayısıyla, duruma
+# göre filtreleme de eşleşen mağaza sayısıyla orantılı çalışır; tablo okunmaz.
+#
+# Her durum değişikliği sıra numaralı bir olay (StatusTransition) olarak yayınlanır:
+# subscribe() ile dinlenebilir, son FLEET_STATUS_EVENT_BUFFER olay da saklanır.
+# Sıra numaraları süreç başınadır; her süreç rastgele bir 'epoch' ile başlar. İstemci
+# imleci (epoch, seq) olarak tutar; epoch farklıysa (başka worker, yeniden başlatma)
+# veya aradaki olaylar tampondan düşmüşse events_after 'reset' döner ve istemci
+# durumu summary()/store_ids() ile yeniden okur. İlk yükleme olay üretmez.
+#
+# Diğer worker'ların aldığı heartbeat'ler veritabanına yazıldıkça (heartbeat flush)
+# FLEET_STATUS_SYNC_SECONDS aralıkla okunur; başka worker'da eklenen/silinen
+# mağazalar için indeks FLEET_STATUS_RELOAD_SECONDS aralıkla yeniden yüklenir.
+
+ONLINE = "Online"
+OFFLINE = "Offline"
+
+
+@dataclass
+class _Entry:
+    country_key: str
+    city_key: str
+    last_seen: Optional[datetime]
+    status: str
+
+
+@dataclass(frozen=True)
+class StatusTransition:
+    seq: int
+    store_id: int
+    status: str
+    last_seen: Optional[datetime]
+    at: datetime
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class FleetStatusIndex:
+    def __init__(self, online_window_seconds: float, sync_interval: float, reload_interval: float, max_events: int):
+        self.online_window = timedelta(seconds=online_window_seconds)
+        self.sync_interval = sync_interval
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._entries: Dict[int, _Entry] = {}
+        # country_key -> city_key -> durum -> mağaza id'leri
+        self._groups: Dict[str, Dict[str, Dict[str, Set[int]]]] = {}
+        # Anahtarların görüntülenecek adları: (country_key, None) ülke, (country_key, city_key) şehir
+        self._names: Dict[Tuple[str, Optional[str]], str] = {}
+        # Online mağazaların (süre dolumu, id) kuyruğu; her Online mağaza için tek kayıt
+        self._expiry: List[Tuple[datetime, int]] = []
+        self.epoch = secrets.token_hex(8)
+        self._seq = 0
+        self._events: Deque[StatusTransition] = deque(maxlen=max_events)
+        self._listeners: List[Callable[[StatusTransition], None]] = []
+        self._loaded = False
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- İç yardımcılar (kilit tutulurken çağrılır) ---
+
+    def _status_of(self, last_seen: Optional[datetime], now: datetime) -> str:
+        return ONLINE if last_seen is not None and now - last_seen < self.online_window else OFFLINE
+
+    def _group(self, entry: _Entry) -> Dict[str, Set[int]]:
+        cities = self._groups.setdefault(entry.country_key, {})
+        return cities.setdefault(entry.city_key, {ONLINE: set(), OFFLINE: set()})
+
+    def _detach(self, store_id: int, entry: _Entry) -> None:
+        cities = self._groups.get(entry.country_key, {})
+        group = cities.get(entry.city_key)
+        if group is None:
+            return
+        group[entry.status].discard(store_id)
+        if not group[ONLINE] and not group[OFFLINE]:
+            del cities[entry.city_key]
+            self._names.pop((entry.country_key, entry.city_key), None)
+            if not cities:
+                del self._groups[entry.country_key]
+                self._names.pop((entry.country_key, None), None)
+
+    def _set_status(self, store_id: int, entry: _Entry, status: str, now: datetime,
+                    events: Optional[List[StatusTransition]]) -> None:
+        if entry.status == status:
+            return
+        group = self._group(entry)
+        group[entry.status].discard(store_id)
+        group[status].add(store_id)
+        entry.status = status
+        if status == ONLINE:
+            heapq.heappush(self._expiry, (entry.last_seen + self.online_window, store_id))
+        if events is None:
+            # İlk yükleme: başlangıç durumu kurulur, geçiş olarak yayınlanmaz.
+            return
+        self._seq += 1
+        event = StatusTransition(seq=self._seq, store_id=store_id, status=status, last_seen=entry.last_seen, at=now)
+        self._events.append(event)
+        events.append(event)
+
+    def _put(self, store_id: int, country: str, city: str, last_seen: Optional[datetime], now: datetime,
+             events: Optional[List[StatusTransition]]) -> None:
+        country_key, city_key = place_key(country or ""), place_key(city or "")
+        previous = self._entries.get(store_id)
+        if previous is not None:
+            last_seen = max(filter(None, (previous.last_seen, last_seen)), default=None)
+            if (previous.country_key, previous.city_key) != (country_key, city_key):
+                self._detach(store_id, previous)
+                previous.country_key, previous.city_key = country_key, city_key
+                self._group(previous)[previous.status].add(store_id)
+            previous.last_seen = last_seen
+            entry = previous
+        else:
+            # Yeni mağaza önce Offline olarak eklenir; heartbeat'i yeniyse aşağıda Online'a geçer.
+            entry = _Entry(country_key, city_key, last_seen, OFFLINE)
+            self._entries[store_id] = entry
+            self._group(entry)[OFFLINE].add(store_id)
+        self._names.setdefault((country_key, None), country)
+        self._names.setdefault((country_key, city_key), city)
+        self._set_status(store_id, entry, self._status_of(last_seen, now), now, events)
+
+    def _sweep(self, now: datetime, events: Optional[List[StatusTransition]]) -> None:
+        while self._expiry and self._expiry[0][0] <= now:
+            _, store_id = heapq.heappop(self._expiry)
+            entry = self._entries.get(store_id)
+            if entry is None or entry.status != ONLINE:
+                continue
+            if self._status_of(entry.last_seen, now) == ONLINE:
+                # Bu arada yeni heartbeat gelmiş; yeni süre dolumuyla tekrar kuyruğa al.
+                heapq.heappush(self._expiry, (entry.last_seen + self.online_window, store_id))
+            else:
+                self._set_status(store_id, entry, OFFLINE, now, events)
+
+    def _publish(self, events: List[StatusTransition]) -> None:
+        if not events:
+            return
+        metrics.inc("fleet_status_transitions_total", len(events))
+        for event in events:
+            for listener in list(self._listeners):
+                try:
+                    listener(event)
+                except Exception as e:
+                    print(f"Filo durum olayı dinleyicisi hata verdi: {e}")
+
+    # --- Besleme ---
+
+    def load(self, rows: Iterable) -> None:
+        """İndeksi (id, country, city, last_seen) satırlarından yeniden kurar; bellekteki daha yeni heartbeat'ler korunur."""
+        now = datetime.now(timezone.utc)
+        events: Optional[List[StatusTransition]] = [] if self._loaded else None
+        with self._lock:
+            seen = set()
+            for row in rows:
+                seen.add(row.id)
+                self._put(row.id, row.country, row.city, _aware(row.last_seen), now, events)
+            for store_id in set(self._entries) - seen:
+                self._detach(store_id, self._entries.pop(store_id))
+            self._sweep(now, events)
+            self._loaded = True
+        self._publish(events or [])
+
+    def upsert(self, store_id: int, country: str, city: str, last_seen: Optional[datetime] = None) -> None:
+        """Oluşturulan veya ülkesi/şehri değişen mağazayı indekse yazar."""
+        now = datetime.now(timezone.utc)
+        events: List[StatusTransition] = []
+        with self._lock:
+            self._put(store_id, country, city, _aware(last_seen), now, events)
+        self._publish(events)
+
+    def remove(self, store_id: int) -> None:
+        with self._lock:
+            entry = self._entries.pop(store_id, None)
+            if entry is not None:
+                self._detach(store_id, entry)
+
+    def heartbeat(self, store_id: int, timestamp: datetime) -> None:
+        """Heartbeat'i indekse işler. Bilinmeyen mağazalar bir sonraki yeniden yüklemede eklenir."""
+        timestamp = _aware(timestamp)
+        events: List[StatusTransition] = []
+        with self._lock:
+            entry = self._entries.get(store_id)
+            if entry is None:
+                return
+            if entry.last_seen is None or timestamp > entry.last_seen:
+                entry.last_seen = timestamp
+            self._set_status(store_id, entry, self._status_of(entry.last_seen, timestamp), timestamp, events)
+        self._publish(events)
+
+    def sweep(self) -> None:
+        """Çevrim içi süresi dolan mağazaları Offline'a alır."""
+        now = datetime.now(timezone.utc)
+        events: List[StatusTransition] = []
+        with self._lock:
+            self._sweep(now, events)
+        self._publish(events)
+
+    # --- Sorgular ---
+
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def _matching_groups(self, country_key=None, city_key=None, country_prefix=None, city_prefix=None):
+        for country, cities in self._groups.items():
+            if country_key is not None and country != country_key:
+                continue
+            if country_prefix is not None and not country.startswith(country_prefix):
+                continue
+            for city, group in cities.items():
+                if city_key is not None and city != city_key:
+                    continue
+                if city_prefix is not None and not city.startswith(city_prefix):
+                    continue
+                yield country, city, group
+
+    def store_ids(self, status: str, country: str = None, city: str = None,
+                  country_prefix: str = None, city_prefix: str = None) -> List[int]:
+        """Verilen durumdaki (ve opsiyonel ülke/şehir filtresindeki) mağaza id'lerini sıralı döndürür."""
+        # Tam eşleşme verilmişse önek yok sayılır (store_crud._filter_stores ile aynı).
+        keys = (
+            place_key(country) if country else None, place_key(city) if city else None,
+            place_key(country_prefix) if country_prefix and not country else None,
+            place_key(city_prefix) if city_prefix and not city else None,
+        )
+        self.sweep()
+        with self._lock:
+            ids = [store_id for _, _, group in self._matching_groups(*keys) for store_id in group[status]]
+        return sorted(ids)
+
+    def country_store_ids(self, country: str) -> Set[int]:
+        """Bir ülkedeki tüm mağaza id'leri (durumdan bağımsız)."""
+        with self._lock:
+            return {
+                store_id
+                for _, _, group in self._matching_groups(place_key(country))
+                for ids in group.values()
+                for store_id in ids
+            }
+
+    def summary(self, country: str = None) -> dict:
+        """Ülke ve şehir bazında Online/Offline sayıları (grup sayısıyla orantılı)."""
+        self.sweep()
+        countries: Dict[str, dict] = {}
+        with self._lock:
+            for country_key, city_key, group in self._matching_groups(place_key(country) if country else None):
+                item = countries.setdefault(country_key, {
+                    "country": self._names.get((country_key, None), country_key), "online": 0, "offline": 0, "cities": [],
+                })
+                online, offline = len(group[ONLINE]), len(group[OFFLINE])
+                item["online"] += online
+                item["offline"] += offline
+                item["cities"].append({
+                    "city": self._names.get((country_key, city_key), city_key), "online": online, "offline": offline,
+                })
+        items = sorted(countries.values(), key=lambda item: item["country"])
+        for item in items:
+            item["cities"].sort(key=lambda city: city["city"])
+        return {
+            "online": sum(item["online"] for item in items),
+            "offline": sum(item["offline"] for item in items),
+            "countries": items,
+            "as_of": datetime.now(timezone.utc),
+        }
+
+    def events_after(self, epoch: Optional[str], seq: int, limit: int = 100,
+                     visible: Optional[Set[int]] = None) -> Tuple[List[StatusTransition], int, bool]:
+        """
+        (epoch, seq) imlecinden sonraki olaylar: (olaylar, yeni seq, reset). 'visible' verilirse
+        sadece bu mağazaların olayları döner, imleç yine de taranan olaylar kadar ilerler.
+        reset=True ise imleç bu süreçte geçersizdir (farklı epoch, gelecekteki seq veya
+        tampondan düşmüş olaylar); olay dönmez, istemci durumu yeniden okuyup yeni seq'ten devam eder.
+        """
+        self.sweep()
+        with self._lock:
+            oldest = self._events[0].seq if self._events else self._seq + 1
+            if epoch != self.epoch or seq > self._seq or seq < oldest - 1:
+                return [], self._seq, True
+            events, last_seq = [], seq
+            for event in self._events:
+                if event.seq <= seq:
+                    continue
+                if len(events) >= limit:
+                    break
+                last_seq = event.seq
+                if visible is None or event.store_id in visible:
+                    events.append(event)
+            else:
+                last_seq = self._seq
+            return events, last_seq, False
+
+    def subscribe(self, listener: Callable[[StatusTransition], None]) -> None:
+        self._listeners.append(listener)
+
+    def online_count(self) -> int:
+        with self._lock:
+            return sum(len(group[ONLINE]) for cities in self._groups.values() for group in cities.values())
+
+    # --- Veritabanı ile eşitleme ---
+
+    def reload(self, session_factory: Callable = SessionLocal) -> None:
+        stores = models.Store.__table__
+        db = session_factory()
+        try:
+            rows = db.execute(select(stores.c.id, stores.c.country, stores.c.city, stores.c.last_seen)).all()
+        finally:
+            db.close()
+        self.load(rows)
+
+    def sync(self, session_factory: Callable = SessionLocal) -> None:
+        """Diğer worker'ların yazdığı yeni heartbeat'leri (ix_stores_last_seen ile) okur ve işler."""
+        stores = models.Store.__table__
+        since = datetime.now(timezone.utc) - self.online_window
+        db = session_factory()
+        try:
+            rows = db.execute(select(stores.c.id, stores.c.last_seen).where(stores.c.last_seen > since)).all()
+        finally:
+            db.close()
+        for row in rows:
+            self.heartbeat(row.id, row.last_seen)
+        self.sweep()
+
+    def _run(self) -> None:
+        next_reload = time.monotonic() + self.reload_interval
+        while not self._stop_event.wait(self.sync_interval):
+            try:
+                if time.monotonic() >= next_reload:
+                    self.reload()
+                    next_reload = time.monotonic() + self.reload_interval
+                else:
+                    self.sync()
+            except Exception as e:
+                print(f"Filo durum indeksi eşitlenemedi: {e}")
+
+    def start(self) -> None:
+        """İndeksi veritabanından yükler ve periyodik eşitleme thread'ini başlatır."""
+        self.reload()
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="fleet-status", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.sync_interval + 5)
+            self._thread = None
+
+
+fleet_status = FleetStatusIndex(
+    online_window_seconds=settings.STORE_ONLINE_WINDOW_SECONDS,
+    sync_interval=settings.FLEET_STATUS_SYNC_SECONDS,
+    reload_interval=settings.FLEET_STATUS_RELOAD_SECONDS,
+    max_events=settings.FLEET_STATUS_EVENT_BUFFER,
+)
+metrics.register_gauge("fleet_status_online_stores", fleet_status.online_count)
@@ -0,0 +1,127 @@
+# app/core/geo_catalog.py
+
+import hashlib
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from app.utils.place_keys import fold
+
+# Ülke / şehir kataloğu
+# countryinfo ve geonamescache verileri her istekte baştan taranmak yerine bir kez
+# işlenir: ülkeler sıralanır, şehirler ISO koduna göre gruplanır ve önek araması
+# (autocomplete) için katlanmış (küçük harf, aksansız) sıralı listeler hazırlanır.
+# Katalog ilk kullanımda yüklenir; uygulama açılışını yavaşlatmaması için main.py
+# onu arka planda ısıtır.
+
+
+class PrefixIndex:
+    """Sıralı katlanmış anahtarlar üzerinde ikili aramayla önek sorgusu."""
+
+    def __init__(self, names: List[str]):
+        pairs = sorted((fold(name), name) for name in names)
+        self._keys = [key for key, _ in pairs]
+        self._names = [name for _, name in pairs]
+
+    def search(self, prefix: str, limit: int) -> List[str]:
+        prefix = fold(prefix)
+        start = bisect_left(self._keys, prefix)
+        results = []
+        for i in range(start, len(self._keys)):
+            if len(results) >= limit or not self._keys[i].startswith(prefix):
+                break
+            results.append(self._names[i])
+        return results
+
+
+@dataclass
+class CountryCities:
+    code: str
+    names: List[str]
+    index: PrefixIndex
+
+
+class GeoCatalog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.version = ""
+        self.countries: List[str] = []
+        self._country_index: Optional[PrefixIndex] = None
+        self._country_codes: Dict[str, str] = {}
+        self._cities: Dict[str, CountryCities] = {}
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+    def _load(self) -> None:
+        # Kütüphaneler büyük veri dosyalarını import anında okuduğu için burada import edilir.
+        from countryinfo import CountryInfo
+        import geonamescache
+
+        all_countries = CountryInfo().all()
+        country_codes = {}
+        for key, info in all_countries.items():
+            alpha2 = (info.get("ISO") or {}).get("alpha2")
+            if not alpha2:
+                continue
+            for alias in (key, info.get("name"), alpha2, info["ISO"].get("alpha3")):
+                if alias:
+                    country_codes.setdefault(alias.lower(), alpha2)
+
+        buckets: Dict[str, set] = {}
+        for city in geonamescache.GeonamesCache().get_cities().values():
+            buckets.setdefault(city["countrycode"], set()).add(city["name"])
+
+        digest = hashlib.blake2b(digest_size=8)
+        self.countries = sorted(all_countries.keys())
+        digest.update("\n".join(self.countries).encode("utf-8"))
+        cities = {}
+        for code in sorted(buckets):
+            names = sorted(buckets[code])
+            digest.update(code.encode("utf-8"))
+            digest.update("\n".join(names).encode("utf-8"))
+            cities[code] = CountryCities(code=code, names=names, index=PrefixIndex(names))
+
+        self._country_index = PrefixIndex(self.countries)
+        self._country_codes = country_codes
+        self._cities = cities
+        self.version = digest.hexdigest()
+        print(f"Ülke/şehir kataloğu yüklendi: {len(self.countries)} ülke, {sum(len(c.names) for c in cities.values())} şehir.")
+
+    def get_version(self) -> str:
+        self._ensure_loaded()
+        return self.version
+
+    def get_countries(self, prefix: Optional[str] = None, limit: Optional[int] = None) -> List[str]:
+        self._ensure_loaded()
+        if prefix:
+            return self._country_index.search(prefix, limit or len(self.countries))
+        return self.countries if limit is None else self.countries[:limit]
+
+    def country_code(self, country: str) -> Optional[str]:
+        """Ülke adı, ISO alpha-2 veya alpha-3 kodundan alpha-2 kodunu döndürür."""
+        self._ensure_loaded()
+        return self._country_codes.get(country.strip().lower())
+
+    def get_cities(self, country: str, prefix: Optional[str] = None, limit: Optional[int] = None) -> List[str]:
+        code = self.country_code(country)
+        bucket = self._cities.get(code) if code else None
+        if bucket is None:
+            return []
+        if prefix:
+            return bucket.index.search(prefix, limit or len(bucket.names))
+        return bucket.names if limit is None else bucket.names[:limit]
+
+    def warm_up(self) -> None:
+        """Kataloğu arka planda yükler; ilk isteğin beklemesini önler."""
+        threading.Thread(target=self._ensure_loaded, name="geo-catalog-warmup", daemon=True).start()
+
+
+geo_catalog = GeoCatalog()
@@ -0,0 +1,122 @@
+# app/core/heartbeat.py
+
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import bindparam
+
+from app.core.config import settings
+from app.core.fleet_status import fleet_status
+from app.core.metrics import metrics
+from app.database import models
+from app.database.connection import SessionLocal
+
+# Heartbeat toplayıcı (write-behind)
+# 2. katman sunuculardan gelen her heartbeat için veritabanına yazmak yerine,
+# her mağazanın son görülme zamanı bellekte tutulur ve "kirli" mağazalar
+# belirli aralıklarla tek bir toplu UPDATE ile veritabanına yazılır.
+
+
+class HeartbeatAggregator:
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._latest: Dict[int, datetime] = {}
+        self._dirty: Dict[int, datetime] = {}
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, store_id: int, timestamp: Optional[datetime] = None) -> datetime:
+        """Bir mağazanın heartbeat'ini bellekte kaydeder. Veritabanına dokunmaz."""
+        timestamp = timestamp or datetime.now(timezone.utc)
+        with self._lock:
+            self._latest[store_id] = timestamp
+            self._dirty[store_id] = timestamp
+        fleet_status.heartbeat(store_id, timestamp)
+        return timestamp
+
+    def last_seen(self, store_id: int) -> Optional[datetime]:
+        """Bu süreçte alınan en son heartbeat zamanını döndürür (yoksa None)."""
+        return self._latest.get(store_id)
+
+    def forget(self, store_id: int) -> None:
+        """Silinen bir mağazayı bellekten çıkarır."""
+        with self._lock:
+            self._latest.pop(store_id, None)
+            self._dirty.pop(store_id, None)
+
+    def pending_count(self) -> int:
+        return len(self._dirty)
+
+    def flush(self, session_factory: Callable = SessionLocal) -> int:
+        """Kirli mağazaların last_seen değerlerini tek bir toplu UPDATE ile yazar."""
+        with self._lock:
+            if not self._dirty:
+                return 0
+            batch = self._dirty
+            self._dirty = {}
+
+        stores = models.Store.__table__
+        stmt = (
+            stores.update()
+            .where(stores.c.id == bindparam("b_id"))
+            .values(last_seen=bindparam("b_last_seen"))
+        )
+        rows = [{"b_id": store_id, "b_last_seen": ts} for store_id, ts in batch.items()]
+
+        start = time.perf_counter()
+        db = session_factory()
+        try:
+            db.execute(stmt, rows)
+            db.commit()
+            metrics.observe("heartbeat_flush_seconds", time.perf_counter() - start)
+        except Exception as e:
+            db.rollback()
+            # Yazılamayan kayıtları, bu arada gelen daha yeni heartbeat'leri ezmeden geri koy.
+            with self._lock:
+                for store_id, ts in batch.items():
+                    if store_id not in self._dirty:
+                        self._dirty[store_id] = ts
+            print(f"Heartbeat flush sırasında hata oluştu: {e}")
+            return 0
+        finally:
+            db.close()
+        return len(rows)
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def start(self) -> None:
+        """Arka planda periyodik flush yapan thread'i başlatır."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="heartbeat-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Thread'i durdurur ve bekleyen heartbeat'leri son bir kez yazar."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+
+
+heartbeat_aggregator = HeartbeatAggregator(flush_interval=settings.HEARTBEAT_FLUSH_INTERVAL_SECONDS)
+metrics.register_gauge("heartbeat_pending_stores", heartbeat_aggregator.pending_count)
+
+
+def effective_last_seen(store_id: int, db_last_seen: Optional[datetime]) -> Optional[datetime]:
+    """Veritabanındaki last_seen ile bellekteki canlı değerden daha yeni olanı döndürür."""
+    live = heartbeat_aggregator.last_seen(store_id)
+    if live is None:
+        return db_last_seen
+    if db_last_seen is None:
+        return live
+    if db_last_seen.tzinfo is None:
+        db_last_seen = db_last_seen.replace(tzinfo=timezone.utc)
+    return max(live, db_last_seen)
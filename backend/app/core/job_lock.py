@@ -0,0 +1,56 @@
+# app/core/job_lock.py
+
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database import models
+
+# Veritabanı tabanlı iş kilidi (lease)
+# Uygulama birden fazla worker süreciyle çalıştığında periyodik işlerin sadece
+# birinde çalışması için 'job_locks' tablosundaki satır kiralanır. Kira süresi
+# dolan kilit başka bir süreç tarafından devralınabilir; böylece çöken bir worker
+# kilidi sonsuza kadar tutamaz. Her veritabanı türünde aynı şekilde çalışır.
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def acquire_job_lock(db: Session, name: str, ttl_seconds: float) -> bool:
+    """Kilidi boşsa veya süresi dolmuşsa alır. Başka bir süreçte aktifse False döner."""
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(seconds=ttl_seconds)
+    locks = models.JobLock.__table__
+
+    result = db.execute(
+        locks.update()
+        .where(locks.c.name == name)
+        .where(or_(locks.c.expires_at < now, locks.c.owner == WORKER_ID))
+        .values(owner=WORKER_ID, expires_at=expires_at)
+    )
+    if result.rowcount:
+        db.commit()
+        return True
+
+    try:
+        db.execute(locks.insert().values(name=name, owner=WORKER_ID, expires_at=expires_at))
+        db.commit()
+        return True
+    except IntegrityError:
+        # Kilit satırı var ve başka bir sürecin kirası devam ediyor.
+        db.rollback()
+        return False
+
+
+def extend_job_lock(db: Session, name: str, ttl_seconds: float) -> None:
+    """Bu sürecin elindeki kilidin süresini şimdiden itibaren ttl_seconds kadar uzatır."""
+    locks = models.JobLock.__table__
+    db.execute(
+        locks.update()
+        .where(locks.c.name == name, locks.c.owner == WORKER_ID)
+        .values(expires_at=datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds))
+    )
+    db.commit()
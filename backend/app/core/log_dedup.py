@@ -0,0 +1,114 @@
+# app/core/log_dedup.py
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+# Log tekilleştirme
+# 2. katman sunucular ağ hatasından sonra aynı partiyi tekrar gönderebilir. Her log
+# için (store_id, timestamp, source, message) üzerinden bir içerik özeti (hash)
+# hesaplanır. Yakın zamanda yazılmış özetler bellekteki sınırlı bir LRU kümesinde
+# tutulur ve tekrarlar veritabanına gitmeden elenir. Bellekte olmayan tekrarları
+# (başka worker, yeniden başlatma) 'logs' tablosundaki benzersiz indeks yakalar.
+
+
+def compute_log_hash(store_id: int, timestamp: datetime, source: Optional[str], message: str) -> str:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    key = "\x1f".join([
+        str(store_id),
+        timestamp.astimezone(timezone.utc).isoformat(),
+        source or "",
+        message,
+    ])
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class RecentHashFilter:
+    """Yakın zamanda yazılmış log özetlerinin boyutu sınırlı LRU kümesi."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._hashes: "OrderedDict[str, None]" = OrderedDict()
+
+    def split(self, rows: List[dict]) -> Tuple[List[dict], int]:
+        """Parti içi ve yakın zamanda görülmüş tekrarları ayıklar: (yeni satırlar, elenen sayısı)."""
+        unique = []
+        seen = set()
+        with self._lock:
+            for row in rows:
+                content_hash = row["content_hash"]
+                if content_hash in seen or content_hash in self._hashes:
+                    continue
+                seen.add(content_hash)
+                unique.append(row)
+        return unique, len(rows) - len(unique)
+
+    def remember(self, hashes: Iterable[str]) -> None:
+        with self._lock:
+            for content_hash in hashes:
+                self._hashes[content_hash] = None
+                self._hashes.move_to_end(content_hash)
+            while len(self._hashes) > self.max_entries:
+                self._hashes.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+
+class IdempotencyCache:
+    """
+    (store_id, Idempotency-Key) -> daha önce dönülmüş yanıt. TTL'li ve boyutu sınırlı.
+    Önbellek worker sürecine özeldir: başka bir worker'a düşen tekrar istek burada
+    görülmez; o durumda tekrarları log içeriğinin özeti (content_hash) yakalar.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # Yanıt None ise istek hâlâ işleniyor (rezerve edilmiş anahtar).
+        self._entries: "OrderedDict[Tuple[int, str], Tuple[float, Optional[dict]]]" = OrderedDict()
+
+    def reserve(self, store_id: int, key: str) -> Tuple[bool, Optional[dict]]:
+        """
+        Anahtarı tek adımda kontrol edip ayırır: (ayrıldı mı, önceki yanıt). Anahtar boşsa
+        işleniyor olarak işaretlenir ve (True, None) döner; tamamlanmışsa (False, yanıt),
+        aynı anahtarla başka bir istek hâlâ sürüyorsa (False, None) döner.
+        """
+        with self._lock:
+            entry = self._entries.get((store_id, key))
+            if entry is not None and entry[0] >= time.monotonic():
+                return False, entry[1]
+            self._store(store_id, key, None)
+            return True, None
+
+    def put(self, store_id: int, key: str, response: dict) -> None:
+        with self._lock:
+            self._store(store_id, key, response)
+
+    def release(self, store_id: int, key: str) -> None:
+        """İstek başarısız olduğunda ayrılmış anahtarı bırakır; tekrar deneme yeniden işlenir."""
+        with self._lock:
+            entry = self._entries.get((store_id, key))
+            if entry is not None and entry[1] is None:
+                del self._entries[(store_id, key)]
+
+    def _store(self, store_id: int, key: str, response: Optional[dict]) -> None:
+        self._entries[(store_id, key)] = (time.monotonic() + self.ttl_seconds, response)
+        self._entries.move_to_end((store_id, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+recent_log_hashes = RecentHashFilter(max_entries=settings.LOG_DEDUP_CACHE_SIZE)
+log_batch_idempotency = IdempotencyCache(
+    max_entries=settings.LOG_IDEMPOTENCY_CACHE_SIZE,
+    ttl_seconds=settings.LOG_IDEMPOTENCY_TTL_SECONDS,
+)
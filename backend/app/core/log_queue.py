@@ -0,0 +1,134 @@
+# app/core/log_queue.py
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.crud import log_crud
+from app.database.connection import SessionLocal
+
+# Kuyruk tabanlı log alımı
+# LOG_INGEST_MODE="queue" iken /api/ops/logs ve /api/ops/logs/bulk gelen logları
+# doğrulayıp bu sınırlı kuyruğa koyar ve hemen 202 döner. Arka plandaki yazıcı
+# thread, kuyruğu boyut veya süre dolduğunda toplu INSERT (executemany) ile boşaltır.
+
+
+class LogIngestQueue:
+    def __init__(self, max_size: int, batch_size: int, flush_interval: float):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._rows: deque = deque()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def offer(self, rows: List[dict]) -> bool:
+        """
+        Satırları kuyruğa ekler. Kuyrukta yer yoksa hiçbirini eklemez ve False döner
+        (çağıran taraf 429 döndürmelidir). Toplu gönderimler bölünmeden kabul edilir.
+        """
+        with self._cond:
+            if self._stopping or len(self._rows) + len(rows) > self.max_size:
+                metrics.inc("log_queue_rejected_total", len(rows))
+                return False
+            self._rows.extend(rows)
+            metrics.inc("log_queue_enqueued_total", len(rows))
+            if len(self._rows) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def depth(self) -> int:
+        return len(self._rows)
+
+    def _take_batch(self) -> List[dict]:
+        """Yeterli satır birikene, süre dolana veya durdurulana kadar bekler, bir parti döndürür."""
+        with self._cond:
+            deadline = time.monotonic() + self.flush_interval
+            while not self._stopping and len(self._rows) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            count = min(len(self._rows), self.batch_size)
+            return [self._rows.popleft() for _ in range(count)]
+
+    def _write(self, rows: List[dict], session_factory: Callable = SessionLocal) -> None:
+        start = time.perf_counter()
+        db = session_factory()
+        try:
+            log_crud.insert_log_rows(db, rows)
+            metrics.inc("log_queue_written_total", len(rows))
+        except Exception as e:
+            db.rollback()
+            print(f"Log kuyruğu partisi yazılamadı, satırlar ayrı ayrı deneniyor: {e}")
+            self._write_separately(db, rows)
+        finally:
+            db.close()
+            metrics.observe("log_queue_flush_seconds", time.perf_counter() - start)
+
+    def _write_separately(self, db, rows: List[dict]) -> None:
+        """
+        Yazılamayan bir partiyi önce mağaza bazında, o da olmazsa satır satır yazar; böylece
+        sadece hatalı satırlar (ör. silinmiş bir mağazanın logları) atlanır.
+        """
+        by_store: Dict[int, List[dict]] = {}
+        for row in rows:
+            by_store.setdefault(row["store_id"], []).append(row)
+        dropped = 0
+        for store_id, store_rows in by_store.items():
+            try:
+                log_crud.insert_log_rows(db, store_rows)
+                metrics.inc("log_queue_written_total", len(store_rows))
+                continue
+            except Exception:
+                db.rollback()
+            for row in store_rows:
+                try:
+                    log_crud.insert_log_rows(db, [row])
+                    metrics.inc("log_queue_written_total")
+                except Exception as e:
+                    db.rollback()
+                    dropped += 1
+                    error = e
+        if dropped:
+            metrics.inc("log_queue_dropped_total", dropped)
+            print(f"Log kuyruğu: {dropped} log yazılamadığı için atlandı: {error}")
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch:
+                self._write(batch)
+            elif self._stopping:
+                return
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._cond:
+            self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="log-queue-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Yeni log kabulünü durdurur ve kuyrukta kalanları yazdıktan sonra thread'i kapatır."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        if self._rows:
+            print(f"Kapanışta log kuyruğunda {len(self._rows)} log yazılamadan kaldı.")
+
+
+log_ingest_queue = LogIngestQueue(
+    max_size=settings.LOG_QUEUE_MAX_SIZE,
+    batch_size=settings.LOG_QUEUE_BATCH_SIZE,
+    flush_interval=settings.LOG_QUEUE_FLUSH_INTERVAL_SECONDS,
+)
+metrics.register_gauge("log_queue_depth", log_ingest_queue.depth)
@@ -0,0 +1,180 @@
+# app/core/log_retention.py
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func
+
+from app.core.config import settings
+from app.core.job_lock import acquire_job_lock, extend_job_lock
+from app.core.metrics import metrics
+from app.crud import log_crud
+from app.database import log_partitions, models
+from app.database.connection import SessionLocal, engine
+
+# Zamanlanmış log temizliği (retention)
+# Eski loglar, ilk log isteğinde tek bir büyük DELETE ile değil, uygulama
+# açılışında ve ardından belirli aralıklarla çalışan bu iş tarafından parçalar
+# halinde silinir. Birden fazla worker varsa 'job_locks' kilidi sayesinde
+# temizliği sadece bir tanesi yapar.
+#
+# Saklama süreleri:
+#   LOG_RETENTION_DAYS         -> varsayılan süre (gün)
+#   LOG_RETENTION_LEVEL_DAYS   -> seviyeye göre, ör. {"ERROR": 90, "INFO": 7}
+#   LOG_RETENTION_STORE_DAYS   -> mağazaya göre, ör. {"12": 365}
+# Mağaza kuralı seviye kuralından, seviye kuralı varsayılandan önceliklidir.
+#
+# LOG_PARTITIONING etkinse (MySQL), en uzun saklama süresinden eski bölümler
+# bütünüyle düşürülür; sadece daha kısa süreli kurallar satır bazında silinir.
+
+LOCK_NAME = "log_retention"
+
+
+def build_retention_rules(
+    now: datetime,
+    default_days: int,
+    level_days: Dict[str, int],
+    store_days: Dict[int, int],
+) -> List[Tuple[str, object]]:
+    """Her saklama kuralı için (açıklama, silme koşulu) listesi üretir."""
+    logs = models.Log.__table__
+    level_days = {level.upper(): days for level, days in level_days.items()}
+    store_ids = list(store_days.keys())
+    levels = list(level_days.keys())
+
+    def older_than(days: int):
+        return logs.c.timestamp < now - timedelta(days=days)
+
+    rules = []
+    for store_id, days in store_days.items():
+        rules.append((f"store={store_id} ({days}d)", and_(logs.c.store_id == store_id, older_than(days))))
+
+    for level, days in level_days.items():
+        conditions = [func.upper(logs.c.level) == level, older_than(days)]
+        if store_ids:
+            conditions.append(logs.c.store_id.notin_(store_ids))
+        rules.append((f"level={level} ({days}d)", and_(*conditions)))
+
+    conditions = [older_than(default_days)]
+    if store_ids:
+        conditions.append(logs.c.store_id.notin_(store_ids))
+    if levels:
+        conditions.append(func.upper(logs.c.level).notin_(levels))
+    rules.append((f"default ({default_days}d)", and_(*conditions)))
+    return rules
+
+
+class LogRetentionJob:
+    def __init__(self, interval_seconds: float, chunk_size: int, pause_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.chunk_size = chunk_size
+        self.pause_seconds = pause_seconds
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> Optional[int]:
+        """
+        Kilidi alabilirse bütün saklama kurallarını uygular ve silinen log sayısını
+        döndürür. Kilit başka bir worker'daysa hiçbir şey yapmadan None döner.
+        """
+        db = SessionLocal()
+        try:
+            # Kilit, temizlik sürerken diğer worker'ları dışarıda tutar; bittiğinde
+            # bir sonraki çalışma zamanına kadar uzatılır.
+            if not acquire_job_lock(db, LOCK_NAME, ttl_seconds=self.interval_seconds):
+                return None
+
+            start = time.perf_counter()
+            # Bölüm bakımı hata verse bile satır temizliği bu çalışmada yine yapılmalı;
+            # kilit bir sonraki çalışmaya kadar tutulduğu için aksi halde tüm gün atlanır.
+            try:
+                dropped = self._maintain_partitions()
+            except Exception as e:
+                dropped = []
+                metrics.inc("log_retention_partition_errors_total")
+                print(f"Log bölüm bakımı sırasında hata oluştu: {e}")
+
+            rules = build_retention_rules(
+                datetime.now(timezone.utc),
+                default_days=settings.LOG_RETENTION_DAYS,
+                level_days=settings.LOG_RETENTION_LEVEL_DAYS,
+                store_days=settings.LOG_RETENTION_STORE_DAYS,
+            )
+            total_deleted = 0
+            for description, condition in rules:
+                deleted = log_crud.purge_logs(
+                    db,
+                    condition,
+                    chunk_size=self.chunk_size,
+                    pause_seconds=self.pause_seconds,
+                    should_stop=self._stop_event.is_set,
+                )
+                if deleted:
+                    print(f"Log temizliği [{description}]: {deleted} adet eski log silindi.")
+                total_deleted += deleted
+                if self._stop_event.is_set():
+                    break
+
+            extend_job_lock(db, LOCK_NAME, ttl_seconds=self.interval_seconds)
+            metrics.inc("log_retention_deleted_total", total_deleted)
+            metrics.inc("log_retention_partitions_dropped_total", len(dropped))
+            metrics.observe("log_retention_run_seconds", time.perf_counter() - start)
+            return total_deleted
+        except Exception as e:
+            db.rollback()
+            print(f"Log temizliği sırasında hata oluştu: {e}")
+            return None
+        finally:
+            db.close()
+
+    def _maintain_partitions(self) -> List[str]:
+        """
+        Bölümleme etkinse tabloyu dönüştürür, gelecek bölümleri hazırlar ve en uzun
+        saklama süresinden eski bölümleri düşürür. Düşürülen bölüm adlarını döndürür.
+        """
+        with engine.begin() as conn:
+            if not log_partitions.is_enabled(conn):
+                return []
+            log_partitions.ensure_partitioned(conn)
+            log_partitions.ensure_future_partitions(conn)
+
+            longest = max([
+                settings.LOG_RETENTION_DAYS,
+                *settings.LOG_RETENTION_LEVEL_DAYS.values(),
+                *settings.LOG_RETENTION_STORE_DAYS.values(),
+            ])
+            cutoff = datetime.now(timezone.utc) - timedelta(days=longest)
+            dropped = log_partitions.drop_partitions_before(conn, cutoff)
+        if dropped:
+            print(f"Log temizliği: {len(dropped)} bölüm düşürüldü ({', '.join(dropped)}).")
+        return dropped
+
+    def _run(self) -> None:
+        # İlk çalışma uygulama açılırken, sonrakiler her aralıkta.
+        while not self._stop_event.is_set():
+            self.run_once()
+            if self._stop_event.wait(self.interval_seconds):
+                return
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="log-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Thread'i durdurur. Süren bir temizlik, mevcut parça bittikten sonra bırakılır."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+
+log_retention_job = LogRetentionJob(
+    interval_seconds=settings.LOG_RETENTION_INTERVAL_HOURS * 3600,
+    chunk_size=settings.LOG_RETENTION_CHUNK_SIZE,
+    pause_seconds=settings.LOG_RETENTION_CHUNK_PAUSE_SECONDS,
+)
@@ -0,0 +1,60 @@
+# app/core/metrics.py
+
+import threading
+from typing import Callable, Dict
+
+# Süreç içi basit metrik kayıt defteri
+# Sayaçlar (counter), anlık değerler (gauge) ve süre ölçümleri (timing) tutulur.
+# /api/ops/metrics uç noktası bu kayıt defterinin anlık görüntüsünü döndürür.
+# Değerler her worker süreci için ayrıdır.
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._timings: Dict[str, Dict[str, float]] = {}
+
+    def inc(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def register_gauge(self, name: str, func: Callable[[], float]) -> None:
+        """Anlık görüntü alınırken çağrılacak bir gauge fonksiyonu kaydeder."""
+        with self._lock:
+            self._gauges[name] = func
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Bir süre ölçümünü (saniye) kaydeder."""
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                timing = {"count": 0, "sum": 0.0, "max": 0.0, "last": 0.0}
+                self._timings[name] = timing
+            timing["count"] += 1
+            timing["sum"] += seconds
+            timing["last"] = seconds
+            if seconds > timing["max"]:
+                timing["max"] = seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            timings = {name: dict(values) for name, values in self._timings.items()}
+
+        gauge_values = {}
+        for name, func in gauges.items():
+            try:
+                gauge_values[name] = func()
+            except Exception:
+                gauge_values[name] = None
+
+        for values in timings.values():
+            values["avg"] = values["sum"] / values["count"] if values["count"] else 0.0
+
+        return {"counters": counters, "gauges": gauge_values, "timings": timings}
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,158 @@
+# app/core/password_hasher.py
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# Argon2 şifre hash'leme havuzu
+# Argon2 bilerek yavaş ve bellek yoğun bir işlemdir. İstek thread'inde çalıştığında
+# bir giriş dalgası hem CPU'yu hem de threadpool'u kilitler. Hash ve doğrulama
+# işlemleri burada ayrı bir süreç havuzunda çalışır; aynı anda en fazla
+# PASSWORD_HASH_WORKERS iş yürür, PASSWORD_HASH_MAX_PENDING kadarı sırada bekler.
+# Sıra doluysa PasswordHasherBusy fırlatılır (giriş rotası 503 döner).
+#
+# Argon2 parametreleri (ARGON2_*) ayarlardan okunur. Parametreler değiştiğinde eski
+# hash'ler girişte, şifre doğrulandıktan sonra yeni parametrelerle yeniden üretilir.
+
+Argon2Params = Tuple[int, int, int]
+
+
+class PasswordHasherBusy(RuntimeError):
+    pass
+
+
+@lru_cache(maxsize=4)
+def _context(params: Argon2Params) -> CryptContext:
+    time_cost, memory_cost, parallelism = params
+    return CryptContext(
+        schemes=["argon2"],
+        deprecated="auto",
+        argon2__time_cost=time_cost,
+        argon2__memory_cost=memory_cost,
+        argon2__parallelism=parallelism,
+    )
+
+
+def _run(operation: str, params: Argon2Params, *args):
+    """Havuz sürecinde çalışır. Sonuçla birlikte harcanan CPU ve duvar saati süresini döndürür."""
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    context = _context(params)
+    if operation == "hash":
+        result = context.hash(*args)
+    else:
+        result = context.verify_and_update(*args)
+    return result, time.process_time() - cpu_start, time.perf_counter() - wall_start
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_pending: int, params: Argon2Params):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.params = params
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        metrics.register_gauge("password_hasher_in_flight", lambda: self._in_flight)
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # 'spawn': bu süreçte heartbeat, log kuyruğu ve retention thread'leri çalışırken
+            # fork edilen çocuk, kilitleri tutulu halde kopyalayabilir.
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def _submit(self, operation: str, *args) -> Future:
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_pending:
+                metrics.inc("password_hasher_rejected_total")
+                raise PasswordHasherBusy("Password hashing queue is full")
+            self._in_flight += 1
+            executor = self._ensure_executor() if self.workers > 0 else None
+
+        submitted = time.perf_counter()
+        if executor is None:
+            # PASSWORD_HASH_WORKERS=0: havuz yok, çağıran thread'de çalışır (script'ler/testler).
+            future = Future()
+            try:
+                future.set_result(_run(operation, self.params, *args))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            try:
+                future = executor.submit(_run, operation, self.params, *args)
+            except BrokenProcessPool:
+                # Bir süreç beklenmedik şekilde öldüyse havuz bir sonraki istekte yeniden kurulur.
+                with self._lock:
+                    self._in_flight -= 1
+                    if self._executor is executor:
+                        self._executor = None
+                raise
+
+        def done(f: Future):
+            with self._lock:
+                self._in_flight -= 1
+            if f.cancelled() or f.exception() is not None:
+                return
+            _, cpu_seconds, run_seconds = f.result()
+            total = time.perf_counter() - submitted
+            metrics.observe(f"password_{operation}_seconds", total)
+            metrics.observe(f"password_{operation}_cpu_seconds", cpu_seconds)
+            metrics.observe(f"password_{operation}_queue_seconds", max(0.0, total - run_seconds))
+
+        future.add_done_callback(done)
+        return future
+
+    def hash(self, password: str) -> str:
+        return self._submit("hash", password).result()[0]
+
+    def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """
+        Şifreyi doğrular. Hash güncel parametrelerle üretilmemişse ve şifre doğruysa
+        yeni hash'i de döndürür (aynı havuz işinde üretilir).
+        """
+        return self._submit("verify", password, hashed).result()[0]
+
+    async def hash_async(self, password: str) -> str:
+        return (await asyncio.wrap_future(self._submit("hash", password)))[0]
+
+    async def verify_and_update_async(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return (await asyncio.wrap_future(self._submit("verify", password, hashed)))[0]
+
+    def hash_many(self, passwords: Iterable[str]) -> List[str]:
+        """Birden fazla şifreyi havuzdaki bütün süreçlerle paralel hash'ler (seed gibi toplu işler için)."""
+        futures = []
+        # Sırayı tek başına doldurmamak için aynı anda en fazla 2 x süreç sayısı kadar iş gönderilir.
+        window = max(1, self.workers) * 2
+        for password in passwords:
+            if len(futures) >= window:
+                futures[len(futures) - window].result()
+            futures.append(self._submit("hash", password))
+        return [future.result()[0] for future in futures]
+
+    def needs_update(self, hashed: str) -> bool:
+        """Hash'in güncel parametrelerle üretilip üretilmediğini kontrol eder (hash'lemez, ucuzdur)."""
+        return _context(self.params).needs_update(hashed)
+
+    def stop(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    params=(settings.ARGON2_TIME_COST, settings.ARGON2_MEMORY_COST, settings.ARGON2_PARALLELISM),
+)
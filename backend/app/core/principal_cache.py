@@ -0,0 +1,85 @@
+# app/core/principal_cache.py
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+from app.database.models import UserRole
+
+# Oturum açmış kullanıcı (principal) önbelleği
+# Her kimliği doğrulanmış istekte JWT çözüldükten sonra kullanıcı satırının tamamını
+# okumak yerine, yetki kontrolleri için gereken hafif bir projeksiyon (id, rol,
+# ülke, ...) burada tutulur. Anahtar token'ın konusu (sub) ve kimliğidir (jti).
+# Kullanıcı güncellendiğinde veya silindiğinde o kullanıcının bütün girdileri silinir.
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    role: UserRole
+    country: Optional[str]
+    is_active: bool
+    assigned_store_id: Optional[int]
+
+
+class PrincipalCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._lock = threading.Lock()
+        self._entries = TTLCache(max_entries, ttl_seconds)
+        # Her geçersiz kılmada artar. Yükleme sürerken bir geçersiz kılma olduysa
+        # yüklenen (muhtemelen eski) veri önbelleğe yazılmaz.
+        self._epoch = 0
+
+    def _lookup(self, key: str) -> Tuple[bool, Optional[Principal], int]:
+        with self._lock:
+            found, principal = self._entries.get(key, time.monotonic())
+            return found, principal, self._epoch
+
+    def _store(self, key: str, principal: Optional[Principal], epoch: int) -> None:
+        if principal is None:
+            return
+        with self._lock:
+            if epoch == self._epoch:
+                self._entries.put(key, principal, time.monotonic())
+
+    def resolve(self, key: str, loader: Callable[[], Optional[Principal]]) -> Optional[Principal]:
+        """Principal'ı önbellekten döndürür; yoksa loader ile yükler. Bulunamayan kullanıcılar önbelleğe alınmaz."""
+        found, principal, epoch = self._lookup(key)
+        if found:
+            return principal
+        principal = loader()
+        self._store(key, principal, epoch)
+        return principal
+
+    async def resolve_async(self, key: str, loader: Callable[[], Awaitable[Optional[Principal]]]) -> Optional[Principal]:
+        """resolve'un asenkron loader alan karşılığı."""
+        found, principal, epoch = self._lookup(key)
+        if found:
+            return principal
+        principal = await loader()
+        self._store(key, principal, epoch)
+        return principal
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Kullanıcıya ait bütün girdileri (tüm token'ları için) siler."""
+        with self._lock:
+            self._epoch += 1
+            self._entries.remove_if(lambda principal: principal.id == user_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"cached_principals": len(self._entries)}
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.PRINCIPAL_CACHE_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,83 @@
+# app/core/profile_pictures.py
+
+import base64
+import binascii
+from io import BytesIO
+from typing import Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.core.blob_store import BlobStore, content_key
+from app.core.config import settings
+
+# Profil resimleri
+# Resimler artık veritabanında base64 metin olarak değil, içerik adresli depoda
+# dosya olarak tutulur. Yüklenen resim sunucuda küçültülür, WebP'ye çevrilir ve
+# ayrıca küçük bir önizleme (thumbnail) üretilir. Kullanıcı kaydında sadece
+# içerik anahtarı (profile_picture_key) saklanır; yanıtlar URL ve ETag döndürür.
+
+IMAGE_SUFFIX = ".webp"
+THUMBNAIL_SUFFIX = "_thumb.webp"
+
+profile_picture_store = BlobStore("profile_pictures")
+
+
+class InvalidProfilePicture(ValueError):
+    pass
+
+
+def decode_base64_image(value: str) -> bytes:
+    """'data:image/png;base64,...' veya düz base64 metni çözer."""
+    if value.startswith("data:"):
+        _, _, value = value.partition(",")
+    try:
+        return base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        raise InvalidProfilePicture("Profile picture is not valid base64 data")
+
+
+def _encode(image: Image.Image, max_size: int) -> bytes:
+    resized = image.copy()
+    resized.thumbnail((max_size, max_size), Image.LANCZOS)
+    out = BytesIO()
+    resized.save(out, format="WEBP", quality=settings.PROFILE_PICTURE_QUALITY, method=4)
+    return out.getvalue()
+
+
+def save_profile_picture(data: bytes) -> str:
+    """
+    Resmi doğrular, küçültür, depoya yazar ve içerik anahtarını döndürür.
+    Anahtar küçültülmüş resmin özetidir; aynı resim tekrar yüklenirse dosya
+    yeniden yazılmaz.
+    """
+    if len(data) > settings.PROFILE_PICTURE_MAX_BYTES:
+        raise InvalidProfilePicture("Profile picture is too large")
+    try:
+        with Image.open(BytesIO(data)) as source:
+            if source.width * source.height > settings.PROFILE_PICTURE_MAX_PIXELS:
+                raise InvalidProfilePicture("Profile picture dimensions are too large")
+            # JPEG için çözme sırasında küçültme; büyük fotoğraflarda belleği ve süreyi azaltır.
+            source.draft("RGB", (settings.PROFILE_PICTURE_SIZE, settings.PROFILE_PICTURE_SIZE))
+            image = ImageOps.exif_transpose(source)
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise InvalidProfilePicture("Profile picture is not a supported image")
+
+    picture = _encode(image, settings.PROFILE_PICTURE_SIZE)
+    key = content_key(picture)
+    if not profile_picture_store.exists(key, THUMBNAIL_SUFFIX):
+        profile_picture_store.write(key, _encode(image, settings.PROFILE_PICTURE_THUMBNAIL_SIZE), THUMBNAIL_SUFFIX)
+    profile_picture_store.write(key, picture, IMAGE_SUFFIX)
+    return key
+
+
+def save_base64_profile_picture(value: str) -> str:
+    return save_profile_picture(decode_base64_image(value))
+
+
+def profile_picture_url(key: Optional[str]) -> Optional[str]:
+    return profile_picture_store.url(key, IMAGE_SUFFIX) if key else None
+
+
+def profile_picture_thumbnail_url(key: Optional[str]) -> Optional[str]:
+    return profile_picture_store.url(key, THUMBNAIL_SUFFIX) if key else None
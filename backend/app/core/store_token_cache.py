@@ -0,0 +1,106 @@
+# app/core/store_token_cache.py
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+
+# Server token -> mağaza çözümleyici önbelleği
+# 2. katman uç noktalarına gelen her istekte 'X-Server-Token' için veritabanı sorgusu
+# yapmak yerine, token'ın karşılık geldiği hafif mağaza kimliği burada tutulur.
+# Bilinmeyen token'lar da (negatif önbellek) ayrı ve sınırlı bir listede kısa süre
+# hatırlanır; böylece rastgele token deneyen istemciler hem veritabanını yoramaz
+# hem de geçerli token'ları önbellekten atamaz.
+
+
+@dataclass(frozen=True)
+class StoreIdentity:
+    id: int
+    name: str
+    country: str
+
+
+class StoreTokenCache:
+    def __init__(self, max_entries: int, ttl_seconds: float,
+                 negative_max_entries: int, negative_ttl_seconds: float):
+        self._lock = threading.Lock()
+        self._known = TTLCache(max_entries, ttl_seconds)
+        self._unknown = TTLCache(negative_max_entries, negative_ttl_seconds)
+        # Her geçersiz kılmada artar. Yükleme sürerken bir token geçersiz kılındıysa
+        # (token yenileme, mağaza silme) yüklenen eski kimlik önbelleğe yazılmaz.
+        self._epoch = 0
+
+    def _lookup(self, token: str) -> Tuple[bool, Optional[StoreIdentity], int]:
+        now = time.monotonic()
+        with self._lock:
+            found, identity = self._known.get(token, now)
+            if not found:
+                found, _ = self._unknown.get(token, now)
+                identity = None
+            return found, identity, self._epoch
+
+    def get(self, token: str) -> Tuple[bool, Optional[StoreIdentity]]:
+        """(bulundu_mu, kimlik) döndürür. Bulundu ama kimlik None ise token'ın geçersiz olduğu biliniyordur."""
+        found, identity, _ = self._lookup(token)
+        return found, identity
+
+    def put(self, token: str, identity: Optional[StoreIdentity], epoch: Optional[int] = None) -> None:
+        """Kimliği önbelleğe yazar. 'epoch' verilmişse ve o zamandan beri geçersiz kılma olduysa yazmaz."""
+        now = time.monotonic()
+        with self._lock:
+            if epoch is not None and epoch != self._epoch:
+                return
+            if identity is None:
+                self._unknown.put(token, None, now)
+            else:
+                self._unknown.pop(token)
+                self._known.put(token, identity, now)
+
+    def resolve(self, token: str, loader: Callable[[str], Optional[StoreIdentity]]) -> Optional[StoreIdentity]:
+        """Token'ı önbellekten çözer; yoksa loader ile yükleyip (olumsuz sonuç dahil) önbelleğe alır."""
+        found, identity, epoch = self._lookup(token)
+        if found:
+            return identity
+        identity = loader(token)
+        self.put(token, identity, epoch)
+        return identity
+
+    async def resolve_async(
+        self, token: str, loader: Callable[[str], Awaitable[Optional[StoreIdentity]]]
+    ) -> Optional[StoreIdentity]:
+        """resolve'un asenkron loader alan karşılığı."""
+        found, identity, epoch = self._lookup(token)
+        if found:
+            return identity
+        identity = await loader(token)
+        self.put(token, identity, epoch)
+        return identity
+
+    def invalidate(self, *tokens: Optional[str]) -> None:
+        """Verilen token'ları hem pozitif hem negatif önbellekten siler."""
+        with self._lock:
+            self._epoch += 1
+            for token in tokens:
+                if token:
+                    self._known.pop(token)
+                    self._unknown.pop(token)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._known.clear()
+            self._unknown.clear()
+
+    def stats(self) -> dict:
+        return {"known_tokens": len(self._known), "unknown_tokens": len(self._unknown)}
+
+
+store_token_cache = StoreTokenCache(
+    max_entries=settings.SERVER_TOKEN_CACHE_SIZE,
+    ttl_seconds=settings.SERVER_TOKEN_CACHE_TTL_SECONDS,
+    negative_max_entries=settings.SERVER_TOKEN_NEGATIVE_CACHE_SIZE,
+    negative_ttl_seconds=settings.SERVER_TOKEN_NEGATIVE_TTL_SECONDS,
+)
@@ -0,0 +1,53 @@
+# app/core/ttl_cache.py
+
+from collections import OrderedDict
+from typing import Callable, Tuple
+
+# Bellek içi önbelleklerin (store_token_cache, principal_cache) ortak kullandığı
+# TTL'li, boyutu sınırlı sözlük. Süresi dolan girdiler okunurken silinir; sınır
+# aşılınca en uzun süredir kullanılmayan girdi atılır.
+
+
+class TTLCache:
+    """
+    Basit, boyutu sınırlı bir TTL/LRU sözlüğü. Kendi kilidi yoktur; eşzamanlı
+    erişimde çağıran taraf kendi kilidini tutmalıdır.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+
+    def get(self, key: str, now: float) -> Tuple[bool, object]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < now:
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def put(self, key: str, value: object, now: float) -> None:
+        self._entries[key] = (now + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def remove_if(self, predicate: Callable[[object], bool]) -> int:
+        """Değeri koşulu sağlayan bütün girdileri siler ve sayısını döndürür."""
+        stale = [key for key, (_, value) in self._entries.items() if predicate(value)]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
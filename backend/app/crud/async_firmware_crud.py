@@ -0,0 +1,82 @@
+# app/crud/async_firmware_crud.py
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.crud.firmware_crud import (
+    firmware_artifacts_statement, firmware_updates_statement, latest_firmware_statement, recent_firmware_statement,
+)
+from app.database import models
+
+# Firmware okuma işlemlerinin AsyncSession ile çalışan karşılıkları.
+
+
+async def get_firmware_updates(db: AsyncSession, skip: int = 0, limit: int = 100):
+    return (await db.execute(firmware_updates_statement(skip, limit))).scalars().all()
+
+
+async def get_latest_firmware(db: AsyncSession, target: str):
+    return (await db.execute(latest_firmware_statement(target))).scalars().first()
+
+
+async def get_recent_firmware(db: AsyncSession, target: str, limit: int):
+    return (await db.execute(recent_firmware_statement(target, limit))).scalars().all()
+
+
+async def get_firmware_artifacts(db: AsyncSession, firmware, current_version: str = None):
+    return (await db.execute(firmware_artifacts_statement(firmware, current_version))).scalars().all()
+
+
+async def acquire_download_slot(db: AsyncSession, firmware_id: int, store_id: int, limit: int) -> bool:
+    """
+    Mağazaya firmware indirme izni (slot) verir. Mağazanın geçerli bir slotu varsa onu kullanır;
+    yoksa aktif slot sayısı 'limit'in altındaysa FIRMWARE_DOWNLOAD_SLOT_SECONDS süreli yeni slot açar.
+    Firmware satırı kilitlenir (SELECT ... FOR UPDATE) ve ekleme sayımı kendi WHERE'inde
+    yaptığından, eşzamanlı isteklerde de sınır aşılmaz.
+    """
+    now = datetime.now(timezone.utc)
+    slots = models.FirmwareDownloadSlot.__table__
+    held = (await db.execute(
+        select(slots.c.expires_at).where(
+            slots.c.firmware_id == firmware_id, slots.c.store_id == store_id, slots.c.expires_at > now
+        )
+    )).first()
+    if held is not None:
+        return True
+
+    firmware = models.FirmwareUpdate.__table__
+    expires_at = now + timedelta(seconds=settings.FIRMWARE_DOWNLOAD_SLOT_SECONDS)
+    active = select(func.count()).select_from(slots).where(
+        slots.c.firmware_id == firmware_id, slots.c.expires_at > now
+    ).scalar_subquery()
+    try:
+        # Aynı sürüm için slot alan istekler kilitte sıraya girer (SQLite'ta tek yazar zaten sıralıdır).
+        await db.execute(select(firmware.c.id).where(firmware.c.id == firmware_id).with_for_update())
+        await db.execute(slots.delete().where(slots.c.firmware_id == firmware_id, slots.c.store_id == store_id))
+        result = await db.execute(slots.insert().from_select(
+            ["firmware_id", "store_id", "expires_at"],
+            select(
+                literal(firmware_id), literal(store_id), literal(expires_at, slots.c.expires_at.type)
+            ).where(active < limit),
+        ))
+        if not result.rowcount:
+            await db.rollback()
+            return False
+        await db.commit()
+    except IntegrityError:
+        # Aynı mağazanın eşzamanlı başka bir isteği slotu az önce aldı.
+        await db.rollback()
+    return True
+
+
+async def release_download_slot(db: AsyncSession, firmware_id: int, store_id: int) -> None:
+    """Mağaza sürümü kurduğunu bildirdiğinde slotunu süresi dolmadan boşaltır."""
+    slots = models.FirmwareDownloadSlot.__table__
+    result = await db.execute(slots.delete().where(slots.c.firmware_id == firmware_id, slots.c.store_id == store_id))
+    if result.rowcount:
+        await db.commit()
+    else:
+        await db.rollback()
@@ -0,0 +1,90 @@
+# app/crud/async_log_crud.py
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.log_dedup import recent_log_hashes
+from app.crud.log_crud import (
+    advance_checkpoint_statement, build_log_row, build_log_rows, duplicate_count_statement, existing_log_statement,
+    insert_ignore_statement, inserted_count, logs_by_store_statement, upload_checkpoint_statement,
+)
+from app.database import models
+from app.schemas import log_schemas
+
+# Log CRUD işlemlerinin AsyncSession ile çalışan karşılıkları.
+# Sorgular log_crud ile ortaktır; davranış (tekilleştirme, kontrol noktası) aynıdır.
+
+
+async def create_log(db: AsyncSession, store_id: int, log: log_schemas.LogCreate):
+    """log_crud.create_log'un asenkron karşılığı."""
+    db_log = models.Log(**build_log_row(store_id, log))
+    db.add(db_log)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        existing = (await db.execute(existing_log_statement(db_log.content_hash, db_log.timestamp))).scalars().first()
+        if existing is None:
+            raise
+        return existing
+    await db.refresh(db_log)
+    recent_log_hashes.remember([db_log.content_hash])
+    return db_log
+
+
+async def bulk_create_logs(db: AsyncSession, store_id: int, logs: list[log_schemas.LogCreate]):
+    """log_crud.bulk_create_logs'un asenkron karşılığı."""
+    rows = build_log_rows(store_id, logs)
+    inserted = await insert_log_rows(db, rows)
+    return {"status": "success", "logs_added": inserted, "deduplicated": len(rows) - inserted}
+
+
+async def insert_log_rows(db: AsyncSession, rows: list[dict]) -> int:
+    """log_crud.insert_log_rows'un asenkron karşılığı."""
+    inserted, hashes = await execute_log_rows(db, rows)
+    await db.commit()
+    recent_log_hashes.remember(hashes)
+    return inserted
+
+
+async def execute_log_rows(db: AsyncSession, rows: list[dict]) -> tuple[int, list[str]]:
+    """log_crud.execute_log_rows'un asenkron karşılığı (commit etmez, filtreye eklemez)."""
+    rows, _ = recent_log_hashes.split(rows)
+    if not rows:
+        return 0, []
+    dialect = db.bind.dialect.name
+    duplicates = (await db.execute(duplicate_count_statement(rows))).scalar_one() if dialect == "mysql" else None
+    result = await db.execute(insert_ignore_statement(dialect), rows)
+    return inserted_count(result, rows, duplicates), [row["content_hash"] for row in rows]
+
+
+async def get_upload_checkpoint(db: AsyncSession, store_id: int) -> Optional[int]:
+    return (await db.execute(upload_checkpoint_statement(store_id))).scalar()
+
+
+async def insert_log_batch_with_checkpoint(
+    db: AsyncSession, store_id: int, rows: list[dict], last_seq: Optional[int]
+) -> int:
+    """log_crud.insert_log_batch_with_checkpoint'in asenkron karşılığı."""
+    inserted, hashes = await execute_log_rows(db, rows)
+    if last_seq is not None:
+        result = await db.execute(advance_checkpoint_statement(store_id, last_seq))
+        if not result.rowcount and await get_upload_checkpoint(db, store_id) is None:
+            await db.execute(models.LogUploadCheckpoint.__table__.insert().values(store_id=store_id, last_seq=last_seq))
+    await db.commit()
+    recent_log_hashes.remember(hashes)
+    return inserted
+
+
+async def get_logs_by_store(
+    db: AsyncSession,
+    store_id: int,
+    days: int = 30,
+    skip: int = 0,
+    limit: int = 100,
+    before: Optional[tuple[datetime, int]] = None,
+):
+    """log_crud.get_logs_by_store'un asenkron karşılığı."""
+    return (await db.execute(logs_by_store_statement(store_id, days, skip, limit, before))).scalars().all()
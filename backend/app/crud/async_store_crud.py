@@ -0,0 +1,114 @@
+# app/crud/async_store_crud.py
+
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from app.core.store_token_cache import StoreIdentity
+from app.crud.store_crud import (
+    config_device_ids_statement, config_devices_statement, config_version_statement, device_values,
+    export_devices_statement, export_stores_statement, store_identity_statement, store_row, to_store_identity,
+)
+from app.database import models
+from app.schemas import device_schemas, store_schemas
+from app.utils.token_utils import generate_secure_tokens
+
+# Mağaza okuma işlemlerinin AsyncSession ile çalışan karşılıkları.
+
+
+async def get_store(db: AsyncSession, store_id: int):
+    """store_crud.get_store'un asenkron karşılığı."""
+    result = await db.execute(
+        select(models.Store).options(
+            joinedload(models.Store.devices),
+            joinedload(models.Store.installer)
+        ).where(models.Store.id == store_id)
+    )
+    return result.unique().scalars().first()
+
+
+async def get_store_identity_by_server_token(db: AsyncSession, server_token: str) -> Optional[StoreIdentity]:
+    """store_crud.get_store_identity_by_server_token'ın asenkron karşılığı."""
+    return to_store_identity((await db.execute(store_identity_statement(server_token))).first())
+
+
+async def insert_store_batch(
+    db: AsyncSession, stores: list[store_schemas.StoreCreate], installer_id: int
+) -> list[int]:
+    """
+    Mağazaları ve cihazlarını tek transaction'da toplu ekler; mağaza id'lerini giriş sırasıyla döndürür.
+    MySQL çoklu INSERT'te id döndürmediği için id'ler benzersiz server_token'lar üzerinden okunur.
+    Commit çağıran tarafa bırakılır.
+    """
+    server_tokens = generate_secure_tokens("srv", len(stores))
+    esp32_tokens = generate_secure_tokens("esp", len(stores))
+    await db.execute(models.Store.__table__.insert(), [
+        store_row(store, installer_id, server_token, esp32_token)
+        for store, server_token, esp32_token in zip(stores, server_tokens, esp32_tokens)
+    ])
+    id_by_token = dict((await db.execute(
+        select(models.Store.server_token, models.Store.id).where(models.Store.server_token.in_(server_tokens))
+    )).all())
+    store_ids = [id_by_token[token] for token in server_tokens]
+
+    device_rows = [
+        {"store_id": store_id, "device_local_id": device.id, **device_values(device)}
+        for store, store_id in zip(stores, store_ids)
+        for device in store.devices
+    ]
+    if device_rows:
+        await db.execute(models.Device.__table__.insert(), device_rows)
+    return store_ids
+
+
+async def iter_store_export_pages(db: AsyncSession, page_size: int, country: Optional[str] = None):
+    """
+    Mağazaları id sırasıyla sayfa sayfa (keyset) okur; her sayfa için cihazlarıyla birlikte
+    StoreExportLine listesi üretir. Tablo hiçbir zaman tamamen belleğe alınmaz.
+    """
+    after_id = 0
+    while True:
+        stores = (await db.execute(export_stores_statement(after_id, page_size, country))).mappings().all()
+        if not stores:
+            return
+        devices: dict[int, list] = {}
+        for row in (await db.execute(export_devices_statement([store["id"] for store in stores]))).mappings():
+            devices.setdefault(row["store_id"], []).append({**row, "id": row["device_local_id"]})
+        yield [
+            store_schemas.StoreExportLine.model_validate({**store, "devices": devices.get(store["id"], [])})
+            for store in stores
+        ]
+        after_id = stores[-1]["id"]
+
+
+
+async def get_config_version(db: AsyncSession, store_id: int) -> Optional[int]:
+    return (await db.execute(config_version_statement(store_id))).scalar_one_or_none()
+
+
+async def get_store_config(db: AsyncSession, store_id: int, since: Optional[int] = None) -> store_schemas.StoreConfigResponse:
+    """
+    Mağaza sunucusunun yapılandırmasını döndürür. 'since' verilirse sadece bu sürümden
+    sonra değişen cihazlar okunur ((store_id, config_version) indeksi); aksi halde tamamı.
+    """
+    store = (await db.execute(
+        select(models.Store.config_version, models.Store.working_hours, models.Store.server_local_ip)
+        .where(models.Store.id == store_id)
+    )).one()
+    full = since is None
+    # Sürüm cihazlardan önce okunur; arada gelen bir değişiklik bir sonraki istekte tekrar gönderilir, kaybolmaz.
+    devices = (await db.execute(config_devices_statement(store_id, since))).mappings().all()
+    if full:
+        device_ids = [device["device_local_id"] for device in devices]
+    else:
+        device_ids = (await db.execute(config_device_ids_statement(store_id))).scalars().all()
+    return store_schemas.StoreConfigResponse(
+        store_id=store_id,
+        config_version=store.config_version,
+        full=full,
+        working_hours=store.working_hours,
+        server_local_ip=store.server_local_ip,
+        device_ids=device_ids,
+        devices=[device_schemas.DeviceResponse.model_validate(device) for device in devices],
+    )
@@ -0,0 +1,44 @@
+# app/crud/async_user_crud.py
+
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.metrics import metrics
+from app.core.principal_cache import Principal
+# user_crud -> security -> async_user_crud döngüsü nedeniyle modül olarak import edilir.
+from app.crud import user_crud
+from app.database import models
+from app.security import security
+
+# Kullanıcı okuma işlemlerinin AsyncSession ile çalışan karşılıkları.
+
+
+async def get_user(db: AsyncSession, user_id: int):
+    """user_crud.get_user'ın asenkron karşılığı."""
+    return await db.get(models.User, user_id)
+
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    """user_crud.get_user_by_email'in asenkron karşılığı."""
+    return (await db.execute(select(models.User).where(models.User.email == email))).scalars().first()
+
+
+async def get_principal_by_email(db: AsyncSession, email: str) -> Optional[Principal]:
+    """user_crud.get_principal_by_email'in asenkron karşılığı."""
+    return user_crud.to_principal((await db.execute(user_crud.principal_statement(email))).first())
+
+
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[models.User]:
+    """user_crud.authenticate_user'ın asenkron karşılığı; Argon2 işi beklenirken thread tutulmaz."""
+    user = await get_user_by_email(db, email)
+    if not user:
+        return None
+    verified, new_hash = await security.verify_and_update_password_async(password, user.hashed_password)
+    if not verified:
+        return None
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+        metrics.inc("password_rehash_total")
+    return user
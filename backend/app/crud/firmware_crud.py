@@ -1,25 +1,111 @@
 # app/crud/firmware_crud.py
 
 # CRUD operations for firmware updates in the database
+from typing import Optional
+
+from sqlalchemy import func, or_, select
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.firmware_artifacts import firmware_artifact_builder
+from app.core.firmware_cache import latest_firmware_cache
+from app.core.firmware_rollout import format_rollout_countries
 from app.database import models
 from app.schemas import firmware_schemas
 
 # Get all firmware updates from the database with pagination
 def get_firmware_updates(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.FirmwareUpdate).order_by(models.FirmwareUpdate.created_at.desc()).offset(skip).limit(limit).all()
+    return db.execute(firmware_updates_statement(skip, limit)).scalars().all()
 
 # Create a new firmware update entry in the database
-def create_firmware_update(db: Session, firmware: firmware_schemas.FirmwareCreate, file_url: str):
+def create_firmware_update(
+    db: Session, firmware: firmware_schemas.FirmwareCreate, file_url: str,
+    sha256: str = None, size_bytes: int = None,
+):
+    data = firmware.model_dump()
+    data["rollout_countries"] = format_rollout_countries(data["rollout_countries"])
     db_firmware = models.FirmwareUpdate(
-        **firmware.model_dump(),
-        file_url=file_url
+        **data,
+        file_url=file_url,
+        sha256=sha256,
+        size_bytes=size_bytes,
     )
     db.add(db_firmware)
     db.commit()
     db.refresh(db_firmware)
+    latest_firmware_cache.invalidate(db_firmware.target)
+    return db_firmware
+
+# Update the rollout policy of a firmware update (only the fields sent)
+def update_firmware_rollout(db: Session, db_firmware: models.FirmwareUpdate, rollout: firmware_schemas.FirmwareRolloutUpdate):
+    data = rollout.model_dump(exclude_unset=True)
+    if "rollout_countries" in data:
+        data["rollout_countries"] = format_rollout_countries(data["rollout_countries"])
+    for key, value in data.items():
+        setattr(db_firmware, key, value)
+    db.commit()
+    db.refresh(db_firmware)
+    latest_firmware_cache.invalidate(db_firmware.target)
     return db_firmware
 
 # Get the latest firmware update for a specific target (e.g., "server" or "esp32")
 def get_latest_firmware(db: Session, target: str):
-    return db.query(models.FirmwareUpdate).filter(models.FirmwareUpdate.target == target).order_by(models.FirmwareUpdate.created_at.desc()).first()
\ No newline at end of file
+    return db.execute(latest_firmware_statement(target)).scalars().first()
+
+def latest_firmware_statement(target: str):
+    # Aynı saniyede yüklenen sürümlerde sıralama id ile belirlenir.
+    return select(models.FirmwareUpdate).where(models.FirmwareUpdate.target == target).order_by(
+        models.FirmwareUpdate.created_at.desc(), models.FirmwareUpdate.id.desc()
+    ).limit(1)
+
+def recent_firmware_statement(target: str, limit: int):
+    """Hedefin en yeni 'limit' sürümü; kademeli dağıtımda mağazaya açık en yeni sürüm bunlar arasından seçilir."""
+    return select(models.FirmwareUpdate).where(models.FirmwareUpdate.target == target).order_by(
+        models.FirmwareUpdate.created_at.desc(), models.FirmwareUpdate.id.desc()
+    ).limit(limit)
+
+def firmware_updates_statement(skip: int = 0, limit: int = 100):
+    return select(models.FirmwareUpdate).order_by(models.FirmwareUpdate.created_at.desc()).offset(skip).limit(limit)
+
+
+def create_firmware_artifacts(db: Session, firmware_id: int) -> int:
+    """
+    Firmware için sıkıştırılmış paketleri ve aynı hedefin son FIRMWARE_DELTA_BASES
+    sürümünden farkları üretip kaydeder. Eklenen paket sayısını döndürür.
+    """
+    firmware = db.get(models.FirmwareUpdate, firmware_id)
+    if firmware is None or firmware.sha256 is None:
+        return 0
+    bases = db.execute(
+        select(models.FirmwareUpdate.id, models.FirmwareUpdate.sha256)
+        .where(
+            models.FirmwareUpdate.target == firmware.target,
+            models.FirmwareUpdate.id < firmware.id,
+            models.FirmwareUpdate.sha256.is_not(None),
+        )
+        .order_by(models.FirmwareUpdate.id.desc())
+        .limit(settings.FIRMWARE_DELTA_BASES)
+    ).all() if settings.FIRMWARE_DELTA_BASES > 0 else []
+    rows = firmware_artifact_builder.build(firmware.sha256, firmware.size_bytes, [(row.id, row.sha256) for row in bases])
+    if rows:
+        db.execute(models.FirmwareArtifact.__table__.insert(), [{"firmware_id": firmware.id, **row} for row in rows])
+        # Yeni paketler /latest yanıtını değiştirir; ETag ve önbellek yenilensin.
+        firmware.updated_at = func.now()
+        db.commit()
+        latest_firmware_cache.invalidate(firmware.target)
+    return len(rows)
+
+def firmware_artifacts_statement(firmware: models.FirmwareUpdate, current_version: Optional[str] = None):
+    """
+    Firmware'in sıkıştırılmış paketleri; current_version verilirse o sürümden farklar da
+    (aynı sürüm birden fazla kez yüklenmiş olabilir, hepsi aday olur).
+    """
+    artifact = models.FirmwareArtifact
+    base_condition = artifact.base_firmware_id.is_(None)
+    if current_version:
+        base_condition = or_(base_condition, artifact.base_firmware_id.in_(
+            select(models.FirmwareUpdate.id).where(
+                models.FirmwareUpdate.target == firmware.target,
+                models.FirmwareUpdate.version == current_version,
+            )
+        ))
+    return select(artifact).where(artifact.firmware_id == firmware.id, base_condition)
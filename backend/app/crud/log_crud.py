@@ -1,71 +1,238 @@
 # app/crud/log_crud.py
 
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from app.core.log_dedup import compute_log_hash, recent_log_hashes
 from app.database import models
 from app.schemas import log_schemas
-from datetime import datetime, timedelta,date, timezone
+from datetime import datetime, timedelta, timezone
 
 # Log CRUD işlemleri
 # Bu modül, log kayıtlarını oluşturma, okuma ve silme işlemlerini içerir.
 
-last_cleanup_date: date=None
 # Log oluşturma işlemi
 def create_log(db: Session, store_id: int, log: log_schemas.LogCreate):
     """
-    Yeni bir log oluşturur ve eğer günün ilk işlemiyse eski logları otomatik olarak temizler.
+    Yeni bir log oluşturur. Aynı log daha önce yazılmışsa (tekrar gönderim),
+    yeni satır eklemek yerine mevcut kaydı döndürür.
+    Eski logların temizliği istek yolunda değil, app/core/log_retention.py'deki
+    zamanlanmış iş tarafından yapılır.
     """
-    global last_cleanup_date
-    today = date.today()
-
-# Eğer daha önce hiç temizlik yapılmadıysa veya son temizlik dünden eskiyse...
-    if last_cleanup_date is None or last_cleanup_date < today:
-        print(f"Günün ilk logu alındı. {today} için eski loglar temizleniyor...")
-        try:
-            deleted_count = delete_old_logs(db)
-            print(f"{deleted_count} adet eski log silindi.")
-            last_cleanup_date = today # Temizlik yapıldığı tarihi güncelle
-        except Exception as e:
-            print(f"Otomatik log temizleme sırasında hata oluştu: {e}")
-
-# Log oluşturma işlemi
-    db_log = models.Log(
-        **log.model_dump(),
-        store_id=store_id
-    )
+    db_log = models.Log(**build_log_row(store_id, log))
     db.add(db_log)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        existing = db.execute(existing_log_statement(db_log.content_hash, db_log.timestamp)).scalars().first()
+        if existing is None:
+            raise
+        return existing
     db.refresh(db_log)
+    recent_log_hashes.remember([db_log.content_hash])
     return db_log
 
 # --- Toplu log kaydı ---
 def bulk_create_logs(db: Session, store_id: int, logs: list[log_schemas.LogCreate]):
     """
     Bir log listesini tek seferde, verimli bir şekilde veritabanına ekler.
+    Tekrar gönderilen loglar eklenmez ve 'deduplicated' olarak raporlanır.
+    """
+    # ORM nesneleri oluşturmak yerine satırları doğrudan tek bir executemany ile yaz.
+    rows = build_log_rows(store_id, logs)
+    inserted = insert_log_rows(db, rows)
+    return {"status": "success", "logs_added": inserted, "deduplicated": len(rows) - inserted}
+
+LOG_ROW_FIELDS = {"source", "level", "message", "timestamp"}
+
+def build_log_row(store_id: int, log: log_schemas.LogCreate) -> dict:
+    """Doğrulanmış bir log şemasını, içerik özetiyle birlikte satır sözlüğüne çevirir."""
+    row = log.model_dump(include=LOG_ROW_FIELDS)
+    row["store_id"] = store_id
+    row["content_hash"] = compute_log_hash(store_id, row["timestamp"], row["source"], row["message"])
+    return row
+
+def build_log_rows(store_id: int, logs: list[log_schemas.LogCreate]) -> list[dict]:
+    """Doğrulanmış log şemalarını, Core INSERT için satır sözlüklerine çevirir."""
+    return [build_log_row(store_id, log) for log in logs]
+
+def existing_log_statement(content_hash: str, timestamp: datetime):
+    return select(models.Log).where(models.Log.content_hash == content_hash, models.Log.timestamp == timestamp)
+
+def insert_ignore_statement(dialect: str):
+    """Benzersiz indekse takılan (tekrar) satırları hata vermeden atlayan bir INSERT döndürür."""
+    table = models.Log.__table__
+    if dialect == "mysql":
+        # INSERT IGNORE yabancı anahtar, NOT NULL ve kırpma hatalarını da uyarıya çevirir;
+        # ON DUPLICATE KEY UPDATE sadece benzersiz indeks çakışmasını atlar, diğerleri hata verir.
+        return mysql_insert(table).on_duplicate_key_update(id=table.c.id)
+    if dialect == "sqlite":
+        return sqlite_insert(table).on_conflict_do_nothing()
+    if dialect == "postgresql":
+        return postgresql_insert(table).on_conflict_do_nothing()
+    return table.insert()
+
+def insert_log_rows(db: Session, rows: list[dict]) -> int:
     """
-    # Gelen listedeki her bir log için bir veritabanı nesnesi oluştur.
-    db_logs = [
-        models.Log(**log.model_dump(), store_id=store_id)
-        for log in logs
-    ]
-    
-    # Tüm log nesnelerini tek bir işlemde veritabanına ekle.
-    db.add_all(db_logs)
+    Log satırlarını tek bir Core INSERT (executemany) ile yazar ve eklenen satır
+    sayısını döndürür. Parti içindeki ve yakın zamanda yazılmış tekrarlar bellekteki
+    filtreyle veritabanına gitmeden elenir; kalanları benzersiz indeks yakalar.
+    """
+    inserted, hashes = execute_log_rows(db, rows)
     db.commit()
-    return {"status": "success", "logs_added": len(db_logs)}
+    recent_log_hashes.remember(hashes)
+    return inserted
+
+def execute_log_rows(db: Session, rows: list[dict]) -> tuple[int, list[str]]:
+    """
+    Satırları commit etmeden yazar: (eklenen sayısı, yazılan özetler). Özetler
+    filtreye ancak commit başarılı olduktan sonra eklenmelidir; aksi halde geri
+    alınan bir partinin tekrar gönderimi tekrar sayılıp kaybolur.
+    """
+    rows, _ = recent_log_hashes.split(rows)
+    if not rows:
+        return 0, []
+    dialect = db.get_bind().dialect.name
+    duplicates = db.execute(duplicate_count_statement(rows)).scalar_one() if dialect == "mysql" else None
+    result = db.execute(insert_ignore_statement(dialect), rows)
+    return inserted_count(result, rows, duplicates), [row["content_hash"] for row in rows]
+
+def duplicate_count_statement(rows: list[dict]):
+    """
+    Partideki özetlerden veritabanında zaten olanları sayar. SQLAlchemy MySQL bağlantılarını
+    FOUND_ROWS ile açtığından ON DUPLICATE KEY UPDATE atlanan satırları da etkilenmiş sayar;
+    eklenen sayısı bu yüzden MySQL'de INSERT'ten önce yapılan bu sayımla bulunur.
+    """
+    table = models.Log.__table__
+    return select(func.count()).select_from(table).where(
+        table.c.content_hash.in_([row["content_hash"] for row in rows])
+    )
+
+def inserted_count(result, rows: list[dict], duplicates: Optional[int] = None) -> int:
+    """Sürücü etkilenen satır sayısını bildirmiyorsa (-1) tüm satırların yazıldığı varsayılır."""
+    if duplicates is not None:
+        return len(rows) - duplicates
+    inserted = result.rowcount
+    return inserted if inserted is not None and inserted >= 0 else len(rows)
+
+
+# --- NDJSON akışı için kontrol noktası ---
+def get_upload_checkpoint(db: Session, store_id: int) -> Optional[int]:
+    """Mağazanın akışla gönderdiği ve yazılmış en son sıra numarasını döndürür."""
+    return db.execute(upload_checkpoint_statement(store_id)).scalar()
+
+def upload_checkpoint_statement(store_id: int):
+    return select(models.LogUploadCheckpoint.last_seq).where(models.LogUploadCheckpoint.store_id == store_id)
 
+def advance_checkpoint_statement(store_id: int, last_seq: int):
+    """Kontrol noktasını sadece ileri taşıyan UPDATE (eski bir parti geri alamaz)."""
+    checkpoints = models.LogUploadCheckpoint.__table__
+    return (
+        checkpoints.update()
+        .where(checkpoints.c.store_id == store_id, checkpoints.c.last_seq < last_seq)
+        .values(last_seq=last_seq, updated_at=datetime.now(timezone.utc))
+    )
+
+def insert_log_batch_with_checkpoint(db: Session, store_id: int, rows: list[dict], last_seq: Optional[int]) -> int:
+    """
+    Bir log partisini ve (varsa) mağazanın sıra numarası kontrol noktasını aynı
+    işlemde (transaction) yazar. Böylece kontrol noktası, yazılmış loglarla her
+    zaman tutarlıdır.
+    """
+    inserted, hashes = execute_log_rows(db, rows)
+    if last_seq is not None:
+        result = db.execute(advance_checkpoint_statement(store_id, last_seq))
+        if not result.rowcount and get_upload_checkpoint(db, store_id) is None:
+            db.execute(models.LogUploadCheckpoint.__table__.insert().values(store_id=store_id, last_seq=last_seq))
+    db.commit()
+    recent_log_hashes.remember(hashes)
+    return inserted
 
 # Logları listeleme işlemi
-def get_logs_by_store(db: Session, store_id: int, days: int = 30, skip: int = 0, limit: int = 100):
+def get_logs_by_store(
+    db: Session,
+    store_id: int,
+    days: int = 30,
+    skip: int = 0,
+    limit: int = 100,
+    before: Optional[tuple[datetime, int]] = None,
+):
+    """
+    Bir mağazanın son 'days' günlük loglarını yeniden eskiye getirir.
+    'before' (timestamp, id) verilirse keyset sayfalama yapılır: sadece bu kayıttan
+    daha eski loglar döner. Sorgu (store_id, timestamp, id) indeksini kullanır.
+    Timestamp alt sınırı sayesinde, bölümlenmiş tablolarda sadece 'days'
+    penceresindeki bölümler okunur (partition pruning).
+    """
+    return db.execute(logs_by_store_statement(store_id, days, skip, limit, before)).scalars().all()
+
+def logs_by_store_statement(
+    store_id: int,
+    days: int = 30,
+    skip: int = 0,
+    limit: int = 100,
+    before: Optional[tuple[datetime, int]] = None,
+):
     time_filter = datetime.now(timezone.utc) - timedelta(days=days)
-    return db.query(models.Log).filter(
+    query = select(models.Log).where(
         models.Log.store_id == store_id,
         models.Log.timestamp >= time_filter
-    ).order_by(models.Log.timestamp.desc()).offset(skip).limit(limit).all()
+    )
+    if before is not None:
+        before_timestamp, before_id = before
+        # 'timestamp <= X' koşulu, indeks üzerinde doğrudan bir aralık taraması sağlar;
+        # OR kısmı sadece aynı zaman damgasına sahip kayıtları id ile ayırır.
+        query = query.where(
+            models.Log.timestamp <= before_timestamp,
+            or_(models.Log.timestamp < before_timestamp, models.Log.id < before_id),
+        )
+    query = query.order_by(models.Log.timestamp.desc(), models.Log.id.desc())
+    if skip:
+        query = query.offset(skip)
+    return query.limit(limit)
 
 # Logları silme işlemi
-def delete_old_logs(db: Session, days: int = 30):
-    """30 günden eski logları siler. Bu bir arka plan görevi olarak çalıştırılmalı."""
+def delete_old_logs(db: Session, days: int = 30, chunk_size: int = 5000):
+    """'days' günden eski logları parçalar halinde siler."""
     time_filter = datetime.now(timezone.utc) - timedelta(days=days)
-    num_deleted = db.query(models.Log).filter(models.Log.timestamp < time_filter).delete()
-    db.commit()
-    return num_deleted
\ No newline at end of file
+    return purge_logs(db, models.Log.__table__.c.timestamp < time_filter, chunk_size=chunk_size)
+
+def purge_logs(
+    db: Session,
+    condition,
+    chunk_size: int = 5000,
+    pause_seconds: float = 0.0,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> int:
+    """
+    Koşula uyan logları birincil anahtar aralıkları halinde, her parçayı ayrı bir
+    işlemde (transaction) silerek temizler. Tek bir büyük DELETE ile tabloyu
+    uzun süre kilitlemek yerine, parçalar arasında 'pause_seconds' kadar bekler.
+    """
+    logs = models.Log.__table__
+    total_deleted = 0
+    while True:
+        ids = db.execute(
+            select(logs.c.id).where(condition).order_by(logs.c.id).limit(chunk_size)
+        ).scalars().all()
+        if not ids:
+            break
+
+        result = db.execute(
+            logs.delete().where(logs.c.id >= ids[0], logs.c.id <= ids[-1], condition)
+        )
+        db.commit()
+        total_deleted += result.rowcount
+
+        if len(ids) < chunk_size or (should_stop and should_stop()):
+            break
+        if pause_seconds:
+            time.sleep(pause_seconds)
+    return total_deleted
@@ -1,10 +1,19 @@
 # app/crud/store_crud.py
 
-from sqlalchemy.orm import Session, joinedload
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import bindparam, func, or_, select
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy.exc import SQLAlchemyError
+from app.utils.place_keys import place_key
 from app.database import models
 from app.schemas import store_schemas, device_schemas
 from app.utils.token_utils import generate_server_token, generate_esp32_token
+from app.core.fleet_status import fleet_status
+from app.core.heartbeat import heartbeat_aggregator
+from app.core.config_notifier import config_change_notifier
+from app.core.store_token_cache import StoreIdentity, store_token_cache
 
 def get_store(db: Session, store_id: int):
     """ID'ye göre tek bir mağazayı getirir ve ilişkili verileri yükler."""
@@ -13,76 +22,195 @@ def get_store(db: Session, store_id: int):
         joinedload(models.Store.installer)
     ).filter(models.Store.id == store_id).first()
 
-def get_stores(db: Session, skip: int = 0, limit: int = 100, country: str = None, city: str = None):
+def get_store_identity_by_server_token(db: Session, server_token: str):
+    """Server token'a ait mağazanın sadece kimlik alanlarını (id, isim, ülke) getirir."""
+    return to_store_identity(db.execute(store_identity_statement(server_token)).first())
+
+def store_identity_statement(server_token: str):
+    return select(models.Store.id, models.Store.name, models.Store.country).where(
+        models.Store.server_token == server_token
+    )
+
+def to_store_identity(row) -> Optional[StoreIdentity]:
+    if row is None:
+        return None
+    return StoreIdentity(id=row.id, name=row.name, country=row.country)
+
+def _prefix_pattern(value: str) -> str:
+    # Desen tek bir parametre olarak gönderilir ('war%'); MySQL bunu indeks aralık taramasına çevirir.
+    key = place_key(value).replace("/", "//").replace("%", "/%").replace("_", "/_")
+    return f"{key}%"
+
+def _filter_stores(query, country: str = None, city: str = None, country_prefix: str = None, city_prefix: str = None):
+    """
+    Ülke/şehir filtreleri katlanmış anahtar sütunlarında eşitlik veya önek olarak uygulanır;
+    (country_key, city_key) indeksi kullanılır. Büyük/küçük harf ve aksan farkı önemsizdir.
+    """
+    if country:
+        query = query.filter(models.Store.country_key == place_key(country))
+    elif country_prefix:
+        query = query.filter(models.Store.country_key.like(_prefix_pattern(country_prefix), escape="/"))
+    if city:
+        query = query.filter(models.Store.city_key == place_key(city))
+    elif city_prefix:
+        query = query.filter(models.Store.city_key.like(_prefix_pattern(city_prefix), escape="/"))
+    return query
+
+def get_stores(
+    db: Session, skip: int = 0, limit: int = 100, country: str = None, city: str = None,
+    country_prefix: str = None, city_prefix: str = None, ids: Optional[List[int]] = None,
+):
     """Tüm mağazaları, opsiyonel ülke ve şehir filtreleriyle birlikte getirir."""
+    # Cihazlar ayrı bir IN sorgusuyla yüklenir; joinedload satırları cihaz sayısı kadar çoğaltıyordu.
     query = db.query(models.Store).options(
-        joinedload(models.Store.devices),
+        selectinload(models.Store.devices),
         joinedload(models.Store.installer)
     )
-    if country:
-        query = query.filter(models.Store.country.ilike(f"%{country}%"))
-    if city:
-        query = query.filter(models.Store.city.ilike(f"%{city}%"))
-    
-    return query.offset(skip).limit(limit).all()
+    if ids is not None:
+        # Sayfa zaten filo durum indeksinden seçildi (ör. ?status=Offline); sadece bu id'ler okunur.
+        return query.filter(models.Store.id.in_(ids)).order_by(models.Store.id).all() if ids else []
+    query = _filter_stores(query, country, city, country_prefix, city_prefix)
+    return query.order_by(models.Store.id).offset(skip).limit(limit).all()
 
 def get_stores_by_country(db: Session, country: str, skip: int = 0, limit: int = 100, city: str = None):
     """Belirli bir ülkedeki mağazaları, opsiyonel şehir filtresiyle getirir."""
-    query = db.query(models.Store).filter(models.Store.country.ilike(f"%{country}%")).options(
-        joinedload(models.Store.devices),
-        joinedload(models.Store.installer)
+    return get_stores(db, skip=skip, limit=limit, country=country, city=city)
+
+def get_store_summaries(
+    db: Session, skip: int = 0, limit: int = 100, country: str = None, city: str = None,
+    country_prefix: str = None, city_prefix: str = None, ids: Optional[List[int]] = None,
+):
+    """
+    Liste ekranı için mağazaların sadece özet sütunlarını getirir (StoreSummaryResponse).
+    Kurulumcu adı LEFT JOIN ile, cihaz sayısı sadece sayfadaki mağazalar için
+    ilişkili (correlated) bir COUNT alt sorgusuyla hesaplanır; ORM nesnesi oluşturulmaz.
+    """
+    device_count = (
+        select(func.count(models.Device.id))
+        .where(models.Device.store_id == models.Store.id)
+        .correlate(models.Store)
+        .scalar_subquery()
     )
-    if city:
-        query = query.filter(models.Store.city.ilike(f"%{city}%"))
-
-    return query.offset(skip).limit(limit).all()
-
-def create_store(db: Session, store: store_schemas.StoreCreate, installer_id: int):
-    """Yeni bir mağaza ve ilişkili cihazlarını oluşturur."""
-    devices_data = store.devices
-    store_data = store.model_dump(exclude={'devices'})
-
-    db_store = models.Store(
-        name=store_data.get("name"),
-        country=store_data.get("country"),
-        city=store_data.get("city"),
-        branch=store_data.get("branch"),
-        address=store_data.get("address"),
-        working_hours=store_data.get("working_hours"),
-        server_local_ip=store_data.get("server_local_ip"),
-        owner_name=store_data.get("ownerName"),
-        owner_surname=store_data.get("ownerSurname"),
-        installer_id=installer_id,
-        server_token=generate_server_token(),
-        esp32_token=generate_esp32_token()
+    query = (
+        db.query(
+            models.Store.id,
+            models.Store.name,
+            models.Store.country,
+            models.Store.city,
+            models.Store.branch,
+            models.Store.created_at,
+            models.Store.last_seen,
+            models.User.name.label("installerName"),
+            models.User.surname.label("installerSurname"),
+            device_count.label("num_esp32_connected"),
+        )
+        .outerjoin(models.User, models.Store.installer_id == models.User.id)
     )
-    db.add(db_store)
-    db.commit()
-    db.refresh(db_store)
+    if ids is not None:
+        # Sayfa zaten filo durum indeksinden seçildi (ör. ?status=Offline); sadece bu id'ler okunur.
+        return query.filter(models.Store.id.in_(ids)).order_by(models.Store.id).all() if ids else []
+    query = _filter_stores(query, country, city, country_prefix, city_prefix)
+    return query.order_by(models.Store.id).offset(skip).limit(limit).all()
+
+# Dışa aktarımda mağaza başına yazılan sütunlar (StoreCreate alan adlarıyla)
+EXPORT_STORE_COLUMNS = {
+    "name": models.Store.name,
+    "country": models.Store.country,
+    "city": models.Store.city,
+    "branch": models.Store.branch,
+    "address": models.Store.address,
+    "ownerName": models.Store.owner_name,
+    "ownerSurname": models.Store.owner_surname,
+    "working_hours": models.Store.working_hours,
+    "server_local_ip": models.Store.server_local_ip,
+}
+
+def export_stores_statement(after_id: int, limit: int, country: str = None):
+    """id'ye göre keyset sayfalama: 'after_id'den sonraki 'limit' mağaza (ORM nesnesi oluşturmadan)."""
+    stmt = select(models.Store.id, *(column.label(key) for key, column in EXPORT_STORE_COLUMNS.items()))
+    if country:
+        stmt = stmt.where(models.Store.country_key == place_key(country))
+    return stmt.where(models.Store.id > after_id).order_by(models.Store.id).limit(limit)
 
-    if devices_data:
-        for device_data in devices_data:
-            new_device = models.Device(
-                store_id=db_store.id,
-                device_local_id=device_data.id,
-                screen_size=device_data.screen_size,
-                wifi_ssid=device_data.wifi_ssid,
-                wifi_password=device_data.wifi_password,
-                all_day_work=device_data.all_day_work,
-                awake_time=device_data.awake_time,
-                sleep_time=device_data.sleep_time,
-                software_version=device_data.software_version,
-                product_name_font_size=device_data.product_name_font_size,
-                product_price_font_size_before_discount=device_data.product_price_font_size_before_discount,
-                product_price_font_size_after_discount=device_data.product_price_font_size_after_discount,
-                product_barcode_font_size=device_data.product_barcode_font_size,
-                product_barcode_numbers_font_size=device_data.product_barcode_numbers_font_size
-            )
-            db.add(new_device)
+def export_devices_statement(store_ids: list[int]):
+    table = models.Device.__table__
+    return (
+        select(table.c.store_id, table.c.device_local_id, *(table.c[field] for field in DEVICE_SYNC_FIELDS))
+        .where(table.c.store_id.in_(store_ids))
+        .order_by(table.c.store_id, table.c.device_local_id)
+    )
+
+def backfill_store_place_keys(db: Session, batch_size: int = 1000) -> int:
+    """country_key/city_key sütunları eklenmeden önce oluşturulmuş mağazaların anahtarlarını doldurur."""
+    stores = models.Store.__table__
+    updated = 0
+    while True:
+        rows = db.execute(
+            select(stores.c.id, stores.c.country, stores.c.city)
+            .where(or_(stores.c.country_key.is_(None), stores.c.city_key.is_(None)))
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return updated
+        db.execute(
+            stores.update().where(stores.c.id == bindparam("b_id")),
+            [{"b_id": row.id, "country_key": place_key(row.country), "city_key": place_key(row.city)} for row in rows],
+        )
         db.commit()
-        db.refresh(db_store)
+        updated += len(rows)
+
+def store_row(
+    store: store_schemas.StoreCreate, installer_id: int, server_token: str, esp32_token: str
+) -> dict:
+    """StoreCreate verisini 'stores' tablosunun sütunlarına çevirir (ORM ve toplu Core ekleme için)."""
+    return {
+        "name": store.name,
+        "country": store.country,
+        "city": store.city,
+        "country_key": place_key(store.country),
+        "city_key": place_key(store.city),
+        "branch": store.branch,
+        "address": store.address,
+        "working_hours": store.working_hours,
+        "server_local_ip": store.server_local_ip,
+        "owner_name": store.ownerName,
+        "owner_surname": store.ownerSurname,
+        "installer_id": installer_id,
+        "server_token": server_token,
+        "esp32_token": esp32_token,
+        # Sunucu varsayılanı yerine burada verilir; yanıt için satırı tekrar okumaya gerek kalmaz.
+        "created_at": datetime.now(timezone.utc),
+    }
+
+def create_store(db: Session, store: store_schemas.StoreCreate, installer_id: int) -> store_schemas.StoreResponse:
+    """
+    Yeni bir mağaza ve ilişkili cihazlarını tek transaction'da oluşturur: mağaza flush
+    edilerek id alınır, cihazlar tek çoklu INSERT ile eklenir ve yanıt yeniden sorgu
+    yapılmadan oturumdaki verilerden üretilir. Hata olursa hiçbir kayıt kalmaz.
+    """
+    db_store = models.Store(**store_row(store, installer_id, generate_server_token(), generate_esp32_token()))
+    try:
+        db.add(db_store)
+        db.flush()
 
-    return get_store(db, store_id=db_store.id)
+        device_rows = [
+            {"store_id": db_store.id, "device_local_id": device.id, **device_values(device)}
+            for device in store.devices
+        ]
+        if device_rows:
+            db.execute(models.Device.__table__.insert(), device_rows)
+
+        response = store_schemas.StoreResponse.model_validate({
+            **{column.key: getattr(db_store, column.key) for column in models.Store.__table__.columns},
+            "installer": db.get(models.User, installer_id),
+            "devices": device_rows,
+        })
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    fleet_status.upsert(response.id, response.country, response.city)
+    return response
 
 def update_store(db: Session, db_store: models.Store, store_in: store_schemas.StoreUpdate):
     """
@@ -91,90 +219,155 @@ def update_store(db: Session, db_store: models.Store, store_in: store_schemas.St
     """
     # 1. Mağazanın temel alanlarını güncelle (Bu kısım aynı kalıyor)
     store_data = store_in.model_dump(exclude_unset=True, exclude={'devices'})
+    config_changed = False
     for key, value in store_data.items():
         if key == "ownerName": key = "owner_name"
         if key == "ownerSurname": key = "owner_surname"
         if hasattr(db_store, key):
+            if key in STORE_CONFIG_FIELDS and getattr(db_store, key) != value:
+                config_changed = True
             setattr(db_store, key, value)
 
-    # 2. Cihazları manuel olarak senkronize et
-    # Bu blok, 'nuke and pave' yerine daha kontrollü bir yaklaşım kullanır.
+    # 2. Cihazları küme farkıyla senkronize et (sadece değişen satırlar yazılır)
+    device_changes = None
+    devices_changed = False
     if store_in.devices is not None:
-        
-        # Gelen cihaz ID'lerini bir kümede topla (hızlı arama için)
-        incoming_device_ids = {device.id for device in store_in.devices}
-        
-        # Mevcut cihazları bir sözlükte topla (ID'ye göre hızlı erişim için)
-        existing_devices_map = {device.device_local_id: device for device in db_store.devices}
-
-        # SİLME İŞLEMİ: Veritabanında olan ama frontend'den gelmeyen cihazları bul ve sil.
-        devices_to_delete = []
-        for device_id, device in existing_devices_map.items():
-            if device_id not in incoming_device_ids:
-                devices_to_delete.append(device)
-        
-        for device in devices_to_delete:
-            db.delete(device)
-
-        # GÜNCELLEME ve EKLEME İŞLEMİ: Frontend'den gelen her cihaz için;
-        for device_data in store_in.devices:
-            # Eğer cihaz zaten veritabanında varsa, alanlarını güncelle.
-            if device_data.id in existing_devices_map:
-                existing_device = existing_devices_map[device_data.id]
-                existing_device.screen_size = device_data.screen_size
-                existing_device.wifi_ssid = device_data.wifi_ssid
-                existing_device.wifi_password = device_data.wifi_password
-                existing_device.all_day_work = device_data.all_day_work
-                existing_device.awake_time = device_data.awake_time
-                existing_device.sleep_time = device_data.sleep_time
-                existing_device.software_version = device_data.software_version
-                existing_device.product_name_font_size = device_data.product_name_font_size
-                existing_device.product_price_font_size_before_discount = device_data.product_price_font_size_before_discount
-                existing_device.product_price_font_size_after_discount = device_data.product_price_font_size_after_discount
-                existing_device.product_barcode_font_size = device_data.product_barcode_font_size
-                existing_device.product_barcode_numbers_font_size = device_data.product_barcode_numbers_font_size
-            # Eğer cihaz veritabanında yoksa, yeni bir tane oluştur ve mağazaya ekle.
-            else:
-                new_device = models.Device(
-                    store_id=db_store.id,  # Mağaza ilişkisini burada kuruyoruz
-                    device_local_id=device_data.id,
-                    screen_size=device_data.screen_size,
-                    wifi_ssid=device_data.wifi_ssid,
-                    wifi_password=device_data.wifi_password,
-                    all_day_work=device_data.all_day_work,
-                    awake_time=device_data.awake_time,
-                    sleep_time=device_data.sleep_time,
-                    software_version=device_data.software_version,
-                    product_name_font_size=device_data.product_name_font_size,
-                    product_price_font_size_before_discount=device_data.product_price_font_size_before_discount,
-                    product_price_font_size_after_discount=device_data.product_price_font_size_after_discount,
-                    product_barcode_font_size=device_data.product_barcode_font_size,
-                    product_barcode_numbers_font_size=device_data.product_barcode_numbers_font_size
-                )
-                db.add(new_device) # Yeni cihazı session'a ekle
-
-    # 3. Tüm değişiklikleri veritabanına işle
+        device_changes = sync_store_devices(db, store_id=db_store.id, devices=store_in.devices)
+        devices_changed = bool(device_changes.added or device_changes.updated or device_changes.removed)
+    if config_changed and not devices_changed:
+        # Sadece mağaza alanları değişti; sürüm yine de artar (sync_store_devices değişiklikte kendisi artırır).
+        bump_config_version(db, db_store.id)
+
+    # 3. Tüm değişiklikleri tek transaction'da veritabanına işle
     try:
         db.commit()
-        db.refresh(db_store)
     except Exception as e:
         db.rollback() # Hata durumunda işlemi geri al
         raise e
 
-    return get_store(db, store_id=db_store.id)
+    # İsim/ülke değişmiş olabilir; önbellekteki mağaza kimliğini yenile.
+    store_token_cache.invalidate(db_store.server_token)
+    if "country" in store_data or "city" in store_data:
+        fleet_status.upsert(db_store.id, db_store.country, db_store.city)
+    if config_changed or devices_changed:
+        config_change_notifier.notify(db_store.id)
+
+    # Commit tüm alanları expire eder; yanıt serileştirilirken cihazlar güncel haliyle yeniden okunur.
+    return db_store, device_changes
+
+# Değiştiğinde mağaza sunucusunun yapılandırmasını da etkileyen mağaza alanları
+STORE_CONFIG_FIELDS = ("working_hours", "server_local_ip")
+
+def bump_config_version(db: Session, store_id: int) -> int:
+    """Mağazanın yapılandırma sürümünü atomik olarak bir artırır ve yeni değeri döndürür (commit etmez)."""
+    stores = models.Store.__table__
+    db.execute(stores.update().where(stores.c.id == store_id).values(config_version=stores.c.config_version + 1))
+    return db.execute(config_version_statement(store_id)).scalar_one()
+
+def config_version_statement(store_id: int):
+    return select(models.Store.__table__.c.config_version).where(models.Store.__table__.c.id == store_id)
+
+def config_devices_statement(store_id: int, since: Optional[int] = None):
+    """Mağazanın cihazları; 'since' verilirse sadece o sürümden sonra değişenler."""
+    table = models.Device.__table__
+    stmt = select(table).where(table.c.store_id == store_id)
+    if since is not None:
+        stmt = stmt.where(table.c.config_version > since)
+    return stmt.order_by(table.c.device_local_id)
+
+def config_device_ids_statement(store_id: int):
+    table = models.Device.__table__
+    return select(table.c.device_local_id).where(table.c.store_id == store_id).order_by(table.c.device_local_id)
+
+# update_store'da cihaz başına senkronize edilen sütunlar (DeviceCreate alan adlarıyla aynı).
+DEVICE_SYNC_FIELDS = (
+    "screen_size", "wifi_ssid", "wifi_password", "all_day_work", "awake_time", "sleep_time",
+    "software_version", "product_name_font_size", "product_price_font_size_before_discount",
+    "product_price_font_size_after_discount", "product_barcode_font_size", "product_barcode_numbers_font_size",
+)
+
+def device_values(device_data: device_schemas.DeviceCreate) -> dict:
+    """Gelen cihaz verisini 'devices' tablosunun senkronize edilen sütunlarına çevirir."""
+    return {field: getattr(device_data, field) for field in DEVICE_SYNC_FIELDS}
+
+def sync_store_devices(db: Session, store_id: int, devices: list[device_schemas.DeviceCreate]) -> device_schemas.DeviceSyncResult:
+    """
+    Mağazanın cihazlarını gelen listeyle eşitler. Mevcut satırlar tek sorguda okunur,
+    fark bellekte hesaplanır; silme tek DELETE ... IN, ekleme tek çoklu INSERT ile,
+    güncelleme ise değişen sütun kümesine göre gruplanmış toplu UPDATE'lerle yapılır.
+    Bir değişiklik varsa mağazanın yapılandırma sürümü artırılır ve eklenen/güncellenen
+    cihazlar bu sürümle işaretlenir. Commit çağıran tarafa bırakılır.
+    """
+    table = models.Device.__table__
+    incoming = {device.id: device_values(device) for device in devices}
+    existing = {
+        row.device_local_id: row
+        for row in db.execute(
+            select(table.c.id, table.c.device_local_id, *(table.c[field] for field in DEVICE_SYNC_FIELDS))
+            .where(table.c.store_id == store_id)
+        )
+    }
+
+    removed = sorted(set(existing) - set(incoming))
+    added = sorted(set(incoming) - set(existing))
+    updated = []
+    updates_by_fields: dict[tuple, list[dict]] = {}
+    for local_id, values in incoming.items():
+        row = existing.get(local_id)
+        if row is None:
+            continue
+        changed = tuple(field for field in DEVICE_SYNC_FIELDS if getattr(row, field) != values[field])
+        if changed:
+            params = {f"new_{field}": values[field] for field in changed}
+            params["b_id"] = row.id
+            updates_by_fields.setdefault(changed, []).append(params)
+            updated.append(local_id)
+
+    if not (removed or added or updated):
+        return device_schemas.DeviceSyncResult(unchanged=len(incoming))
+
+    version = bump_config_version(db, store_id)
+    if removed:
+        db.execute(table.delete().where(table.c.store_id == store_id, table.c.device_local_id.in_(removed)))
+    if added:
+        db.execute(table.insert(), [
+            {"store_id": store_id, "device_local_id": local_id, "config_version": version, **incoming[local_id]}
+            for local_id in added
+        ])
+    for fields, rows in updates_by_fields.items():
+        db.execute(
+            table.update()
+            .where(table.c.id == bindparam("b_id"))
+            .values({**{field: bindparam(f"new_{field}") for field in fields}, "config_version": version}),
+            rows,
+        )
+
+    return device_schemas.DeviceSyncResult(
+        added=added,
+        updated=sorted(updated),
+        removed=removed,
+        unchanged=len(incoming) - len(added) - len(updated),
+    )
 
 def delete_store(db: Session, store_id: int):
     db_store = db.query(models.Store).filter(models.Store.id == store_id).first()
     if db_store:
+        server_token = db_store.server_token
         db.delete(db_store)
         db.commit()
+        store_token_cache.invalidate(server_token)
+        heartbeat_aggregator.forget(store_id)
+        fleet_status.remove(store_id)
     return db_store
 
 def regenerate_server_token(db: Session, db_store: models.Store):
+    old_token = db_store.server_token
     db_store.server_token = generate_server_token()
     db.add(db_store)
     db.commit()
     db.refresh(db_store)
+    # Eski token artık geçersiz; yeni token daha önce negatif önbelleğe düşmüş olabilir.
+    store_token_cache.invalidate(old_token, db_store.server_token)
     return db_store
 
 def regenerate_esp32_token(db: Session, db_store: models.Store):
@@ -1,5 +1,6 @@
 # app/crud/user_crud.py
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session,joinedload
 from typing import Optional
 from app.database import models
@@ -8,6 +9,38 @@ from app.security import security
 from fastapi import HTTPException
 
 from app.crud import store_crud
+from app.core.metrics import metrics
+from app.core.password_hasher import PasswordHasherBusy
+from app.core.principal_cache import Principal, principal_cache
+from app.core.profile_pictures import (
+    InvalidProfilePicture, profile_picture_url, save_base64_profile_picture, save_profile_picture,
+)
+
+def _store_profile_picture(value: Optional[str], current_key: Optional[str] = None) -> Optional[str]:
+    """
+    Base64 profil resmini depoya yazar ve anahtarını döndürür. Boş değer resmi kaldırır.
+    Arayüz mevcut resmin URL'sini geri gönderirse resim değişmemiş sayılır.
+    """
+    if not value:
+        return None
+    if value.startswith(("http://", "https://")) or value == profile_picture_url(current_key):
+        return current_key
+    try:
+        return save_base64_profile_picture(value)
+    except InvalidProfilePicture as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _hash_password(password: str) -> str:
+    """Şifreyi hash'ler; hash havuzu doluysa giriş rotasındaki gibi 503 + Retry-After döner."""
+    try:
+        return security.get_password_hash(password)
+    except PasswordHasherBusy:
+        metrics.inc("password_hash_rejected_busy_total")
+        raise HTTPException(
+            status_code=503,
+            detail="Too many password operations in progress, please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
 
 # --- YENİ EKLENEN FONKSİYON ---
 def get_user(db: Session, user_id: int):
@@ -18,6 +51,32 @@ def get_user_by_email(db: Session, email: str):
     """E-posta adresine göre kullanıcıyı getirir."""
     return db.query(models.User).filter(models.User.email == email).first()
 
+def get_principal_by_email(db: Session, email: str) -> Optional[Principal]:
+    """Yetki kontrolleri için kullanıcının sadece gerekli sütunlarını okur."""
+    return to_principal(db.execute(principal_statement(email)).first())
+
+def principal_statement(email: str):
+    return select(
+        models.User.id,
+        models.User.email,
+        models.User.role,
+        models.User.country,
+        models.User.is_active,
+        models.User.assigned_store_id,
+    ).where(models.User.email == email)
+
+def to_principal(row) -> Optional[Principal]:
+    if row is None:
+        return None
+    return Principal(
+        id=row.id,
+        email=row.email,
+        role=row.role,
+        country=row.country,
+        is_active=bool(row.is_active),
+        assigned_store_id=row.assigned_store_id,
+    )
+
 def get_users(db: Session, user_type: str, current_user_id: int, skip: int = 0, limit: int = 100):
     """
     Kullanıcı tipine göre kullanıcıları GÜVENLİ bir şekilde listeler ve
@@ -59,7 +118,7 @@ def get_users(db: Session, user_type: str, current_user_id: int, skip: int = 0,
 
 def create_user(db: Session, user: user_schemas.UserCreate):
     """Yeni bir kullanıcı oluşturur."""
-    hashed_password = security.get_password_hash(user.password)
+    hashed_password = _hash_password(user.password)
     
     # Şifreyi ve özel alanları exclude ediyoruz
     user_data = user.model_dump(exclude={"password", "assigned_store_id", "profile_picture"})
@@ -67,7 +126,8 @@ def create_user(db: Session, user: user_schemas.UserCreate):
     db_user = models.User(
         **user_data,
         hashed_password=hashed_password,
-        profile_picture=user.profile_picture,  # Profile picture'ı manuel olarak ekliyoruz
+        # Profil resmi base64 olarak değil, depodaki anahtarıyla saklanır
+        profile_picture_key=_store_profile_picture(user.profile_picture),
     )
 
     # Runner rolü için özel işlemler
@@ -100,15 +160,22 @@ def update_user(db: Session, db_user: models.User, user_in: user_schemas.UserUpd
             del update_data['assigned_store_id']
 
     if "password" in update_data and update_data["password"]:
-        hashed_password = security.get_password_hash(update_data["password"])
+        hashed_password = _hash_password(update_data["password"])
         db_user.hashed_password = hashed_password
         del update_data["password"]
 
+    if "profile_picture" in update_data:
+        db_user.profile_picture_key = _store_profile_picture(
+            update_data.pop("profile_picture"), db_user.profile_picture_key
+        )
+
     for key, value in update_data.items():
         setattr(db_user, key, value)
         
     db.add(db_user)
     db.commit()
+    # Rol, ülke, e-posta vb. değişmiş olabilir; önbellekteki yetki bilgisi eskidi.
+    principal_cache.invalidate_user(db_user.id)
     db.refresh(db_user)
     return db_user
 
@@ -119,6 +186,7 @@ def delete_user(db: Session, user_id: int):
     if db_user:
         db.delete(db_user)
         db.commit()
+        principal_cache.invalidate_user(user_id)
     return db_user
 # -----------------------------
 
@@ -127,8 +195,14 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[models
     user = get_user_by_email(db, email)
     if not user:
         return None
-    if not security.verify_password(password, user.hashed_password):
+    verified, new_hash = security.verify_and_update_password(password, user.hashed_password)
+    if not verified:
         return None
+    if new_hash:
+        # Argon2 parametreleri değişmiş; hash yeni parametrelerle güncellenir.
+        user.hashed_password = new_hash
+        db.commit()
+        metrics.inc("password_rehash_total")
     return user
 
 def update_user_preferences(db: Session, user: models.User, preferences: user_schemas.UserPreferencesUpdate):
@@ -163,7 +237,7 @@ def update_profile(db: Session, db_user: models.User, user_in: user_schemas.Prof
     # --- GÜVENLİK DÜZELTMESİ ---
     # Eğer 'password' anahtarı veride varsa VE değeri boş değilse, şifreyi güncelle.
     if "password" in update_data and update_data["password"]:
-        hashed_password = security.get_password_hash(update_data["password"])
+        hashed_password = _hash_password(update_data["password"])
         db_user.hashed_password = hashed_password
     
     # 'password' anahtarını, diğer döngüye girmeden önce her zaman sil.
@@ -171,6 +245,11 @@ def update_profile(db: Session, db_user: models.User, user_in: user_schemas.Prof
     if "password" in update_data:
         del update_data["password"]
     # --- DÜZELTME SONU ---
+
+    if "profile_picture" in update_data:
+        db_user.profile_picture_key = _store_profile_picture(
+            update_data.pop("profile_picture"), db_user.profile_picture_key
+        )
     
     for key, value in update_data.items():
         if hasattr(db_user, key):
@@ -178,5 +257,17 @@ def update_profile(db: Session, db_user: models.User, user_in: user_schemas.Prof
             
     db.add(db_user)
     db.commit()
+    principal_cache.invalidate_user(db_user.id)
     db.refresh(db_user)
-    return db_user
\ No newline at end of file
+    return db_user
+
+def update_profile_picture(db: Session, db_user: models.User, data: bytes):
+    """Yüklenen ham resim dosyasını depoya yazar ve kullanıcıya bağlar."""
+    try:
+        db_user.profile_picture_key = save_profile_picture(data)
+    except InvalidProfilePicture as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
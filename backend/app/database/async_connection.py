@@ -0,0 +1,59 @@
+# async_connection.py
+import itertools
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from app.core.config import settings
+from app.database.connection import InstrumentedAsyncQueuePool, pool_options, register_pool_gauges
+
+# Asenkron veritabanı bağlantısı
+# Yüksek frekanslı uç noktalar (/api/ops/*, firmware kontrolü) veritabanını beklerken
+# threadpool'da bir thread tutmasın diye AsyncSession ile çalışır. Bağlantı adresi
+# DATABASE_URL'den türetilir (mysql -> aiomysql, sqlite -> aiosqlite) veya
+# ASYNC_DATABASE_URL ile açıkça verilir. Havuz ayarları senkron motorla aynıdır;
+# sınırlar her motor için ayrı ayrı uygulanır.
+
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Senkron bir bağlantı adresini, aynı veritabanı için asenkron sürücülü adrese çevirir."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def _create_async_engine(url: str, name: str) -> AsyncEngine:
+    db_engine = create_async_engine(url, **pool_options(url, name, base_pool=InstrumentedAsyncQueuePool))
+    register_pool_gauges(db_engine.sync_engine, name)
+    return db_engine
+
+
+async_engine = _create_async_engine(settings.ASYNC_DATABASE_URL or to_async_url(settings.DATABASE_URL), "async_primary")
+
+async_read_engines = [
+    _create_async_engine(to_async_url(url), f"async_replica{i}")
+    for i, url in enumerate(settings.DATABASE_READ_REPLICA_URLS, start=1)
+]
+_async_read_engine_cycle = itertools.cycle(async_read_engines or [async_engine])
+
+# expire_on_commit=False: commit sonrası nesnelere erişim, asenkron bağlamda
+# beklenmedik (ve desteklenmeyen) tembel yüklemeler tetiklemesin.
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+# Dependency for async routes
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db():
+    """get_read_db'nin asenkron karşılığı: replikalardan birine (sırayla) bağlı oturum verir."""
+    async with AsyncSessionLocal(bind=next(_async_read_engine_cycle)) as db:
+        yield db
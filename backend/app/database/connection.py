@@ -1,12 +1,94 @@
 # connection.py
+import itertools
+import time
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.core.metrics import metrics
+
+# Bağlantı havuzu
+# Havuz boyutu, taşma (overflow), bekleme süresi, bağlantı yenileme (recycle) ve
+# pre-ping ayarları Settings üzerinden verilir. Her havuz için ödünç verilen
+# bağlantı sayısı, taşma kullanımı ve bağlantı bekleme süresi /api/ops/metrics'te
+# raporlanır; değerler worker başınadır ve havuz boyutlandırması için kullanılır.
+
+
+class _PoolInstrumentation:
+    """Bağlantı almak için beklenen süreyi ve zaman aşımlarını ölçer."""
+
+    metrics_name = "db_pool"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            metrics.inc(f"{self.metrics_name}_timeouts_total")
+            raise
+        finally:
+            metrics.observe(f"{self.metrics_name}_wait_seconds", time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(_PoolInstrumentation, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_PoolInstrumentation, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(url: str, name: str, base_pool: type = InstrumentedQueuePool) -> dict:
+    """Settings'teki havuz ayarlarını create_engine / create_async_engine argümanlarına çevirir."""
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if make_url(url).get_backend_name() != "sqlite":
+        # SQLite dosya veritabanları varsayılan havuzu ile kalır (yerel geliştirme/benchmark).
+        pool_class = type(f"{base_pool.__name__}_{name}", (base_pool,), {"metrics_name": f"db_pool_{name}"})
+        options.update(
+            poolclass=pool_class,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    return options
 
-engine = create_engine(settings.DATABASE_URL)
+
+def _create_engine(url: str, name: str) -> Engine:
+    db_engine = create_engine(url, **pool_options(url, name))
+    register_pool_gauges(db_engine, name)
+    return db_engine
+
+
+def register_pool_gauges(db_engine: Engine, name: str) -> None:
+    if not isinstance(db_engine.pool, QueuePool):
+        return
+
+    # engine.pool dispose() sonrası yenilenebileceği için her okumada tekrar alınır.
+    def pool():
+        return db_engine.pool
+
+    metrics.register_gauge(f"db_pool_{name}_size", lambda: pool().size())
+    metrics.register_gauge(f"db_pool_{name}_checked_out", lambda: pool().checkedout())
+    metrics.register_gauge(f"db_pool_{name}_checked_in", lambda: pool().checkedin())
+    # Negatif değer, havuzda henüz açılmamış bağlantı olduğunu gösterir.
+    metrics.register_gauge(f"db_pool_{name}_overflow", lambda: pool().overflow())
+
+
+engine = _create_engine(settings.DATABASE_URL, "primary")
+
+# Opsiyonel okuma replikaları. Tanımlı değilse okuma oturumları da ana veritabanına gider.
+read_engines = [
+    _create_engine(url, f"replica{i}") for i, url in enumerate(settings.DATABASE_READ_REPLICA_URLS, start=1)
+]
+_read_engine_cycle = itertools.cycle(read_engines or [engine])
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 Base = declarative_base()
 
@@ -16,4 +98,15 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db():
+    """
+    Sadece okuma yapan rotalar için replikalardan birine (sırayla) bağlı oturum verir.
+    Replikalar birkaç saniye geride olabilir; yazdığını hemen okuması gereken rotalar get_db kullanmalıdır.
+    """
+    db = ReadSessionLocal(bind=next(_read_engine_cycle))
+    try:
+        yield db
+    finally:
+        db.close()
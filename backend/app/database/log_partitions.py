@@ -0,0 +1,138 @@
+# app/database/log_partitions.py
+
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+
+# Zaman bazlı log bölümleme (MySQL RANGE COLUMNS partitions)
+# LOG_PARTITIONING "day" veya "month" olduğunda 'logs' tablosu timestamp'e göre
+# bölümlenir. Böylece saklama süresi dolan veriler satır satır silinmek yerine
+# bütün bir bölüm (partition) düşürülerek O(1) maliyetle temizlenir; timestamp
+# aralığı içeren sorgular (get_logs_by_store) sadece ilgili bölümleri okur.
+#
+# MySQL kısıtları nedeniyle dönüşüm sırasında:
+#   - fk_log_store yabancı anahtarı kaldırılır (bölümlenmiş tablolarda FK desteklenmez),
+#   - birincil anahtar (id, timestamp) olarak genişletilir.
+# ORM modeli (models.Log) ve LogResponse şeması değişmez.
+# Diğer veritabanlarında bölümleme yapılmaz; temizlik parça parça silme ile devam eder.
+
+TABLE_NAME = "logs"
+MAX_PARTITION = "pmax"
+
+
+def is_enabled(conn: Connection) -> bool:
+    return settings.LOG_PARTITIONING in ("day", "month") and conn.dialect.name == "mysql"
+
+
+def _period_start(moment: datetime) -> datetime:
+    moment = moment.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+    if settings.LOG_PARTITIONING == "month":
+        moment = moment.replace(day=1)
+    return moment
+
+
+def _next_period(start: datetime) -> datetime:
+    if settings.LOG_PARTITIONING == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def _partition_name(start: datetime) -> str:
+    if settings.LOG_PARTITIONING == "month":
+        return start.strftime("p%Y%m")
+    return start.strftime("p%Y%m%d")
+
+
+def _partition_clause(start: datetime) -> str:
+    """[start, sonraki dönem) aralığını kapsayan bölüm tanımı."""
+    upper = _next_period(start)
+    return f"PARTITION {_partition_name(start)} VALUES LESS THAN ('{upper:%Y-%m-%d %H:%M:%S}')"
+
+
+def get_partitions(conn: Connection) -> List[Tuple[str, Optional[datetime]]]:
+    """(bölüm adı, üst sınır) listesini sıralı döndürür. MAXVALUE bölümünün üst sınırı None'dır."""
+    rows = conn.execute(text(
+        "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION"
+    ), {"table": TABLE_NAME}).all()
+
+    partitions = []
+    for name, description in rows:
+        bound = description.strip("'")
+        upper = None if bound == "MAXVALUE" else datetime.fromisoformat(bound)
+        partitions.append((name, upper))
+    return partitions
+
+
+def ensure_partitioned(conn: Connection) -> bool:
+    """
+    'logs' tablosu bölümlenmemişse dönüştürür. Büyük tablolarda bu tek seferlik
+    ALTER uzun sürebilir; bakım penceresinde çalıştırılması önerilir.
+    Dönüşüm yapıldıysa True döner.
+    """
+    if get_partitions(conn):
+        return False
+
+    print("'logs' tablosu zaman bazlı bölümlemeye dönüştürülüyor...")
+    has_fk = conn.execute(text(
+        "SELECT COUNT(*) FROM information_schema.TABLE_CONSTRAINTS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table "
+        "AND CONSTRAINT_NAME = 'fk_log_store' AND CONSTRAINT_TYPE = 'FOREIGN KEY'"
+    ), {"table": TABLE_NAME}).scalar()
+    if has_fk:
+        conn.execute(text(f"ALTER TABLE {TABLE_NAME} DROP FOREIGN KEY fk_log_store"))
+
+    conn.execute(text(f"ALTER TABLE {TABLE_NAME} DROP PRIMARY KEY, ADD PRIMARY KEY (id, `timestamp`)"))
+
+    oldest = conn.execute(text(f"SELECT MIN(`timestamp`) FROM {TABLE_NAME}")).scalar()
+    now = datetime.now(timezone.utc)
+    start = _period_start(oldest or now)
+    last = _period_start(now + timedelta(days=settings.LOG_PARTITIONS_AHEAD_DAYS))
+
+    clauses = []
+    while start <= last:
+        clauses.append(_partition_clause(start))
+        start = _next_period(start)
+    clauses.append(f"PARTITION {MAX_PARTITION} VALUES LESS THAN (MAXVALUE)")
+
+    conn.execute(text(
+        f"ALTER TABLE {TABLE_NAME} PARTITION BY RANGE COLUMNS(`timestamp`) ({', '.join(clauses)})"
+    ))
+    return True
+
+
+def ensure_future_partitions(conn: Connection) -> int:
+    """Önümüzdeki LOG_PARTITIONS_AHEAD_DAYS için eksik bölümleri pmax'tan bölerek ekler."""
+    partitions = get_partitions(conn)
+    bounded = [upper for _, upper in partitions if upper is not None]
+    if not bounded:
+        return 0
+
+    start = max(bounded)
+    last = _period_start(datetime.now(timezone.utc) + timedelta(days=settings.LOG_PARTITIONS_AHEAD_DAYS))
+    clauses = []
+    while start <= last:
+        clauses.append(_partition_clause(start))
+        start = _next_period(start)
+    if not clauses:
+        return 0
+
+    clauses.append(f"PARTITION {MAX_PARTITION} VALUES LESS THAN (MAXVALUE)")
+    conn.execute(text(
+        f"ALTER TABLE {TABLE_NAME} REORGANIZE PARTITION {MAX_PARTITION} INTO ({', '.join(clauses)})"
+    ))
+    return len(clauses) - 1
+
+
+def drop_partitions_before(conn: Connection, cutoff: datetime) -> List[str]:
+    """Tüm satırları 'cutoff'tan eski olan bölümleri düşürür ve adlarını döndürür."""
+    cutoff = cutoff.replace(tzinfo=None)
+    expired = [name for name, upper in get_partitions(conn) if upper is not None and upper <= cutoff]
+    if expired:
+        conn.execute(text(f"ALTER TABLE {TABLE_NAME} DROP PARTITION {', '.join(expired)}"))
+    return expired
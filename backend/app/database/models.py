@@ -1,10 +1,11 @@
 # backend/app/database/models.py
 
-from sqlalchemy import (Column, Integer, String, Boolean, Enum, 
-                        DateTime, func, ForeignKey, Text)
-from sqlalchemy.orm import relationship
+from sqlalchemy import (Column, Integer, BigInteger, String, Boolean, Enum, 
+                        DateTime, func, ForeignKey, Text, Index)
+from sqlalchemy.orm import deferred, relationship, validates
 from sqlalchemy.dialects.mysql import MEDIUMTEXT
 from .connection import Base
+from app.utils.place_keys import place_key
 import enum
 
 class UserRole(str, enum.Enum):
@@ -33,6 +34,26 @@ class Store(Base):
     working_hours = Column(String(100), nullable=True)
     
     installer_id = Column(Integer, ForeignKey("users.id", name='fk_store_installer'), nullable=True)
+
+    # Filtreleme için ülke/şehir adlarının katlanmış (küçük harf, aksansız) kopyaları.
+    # ILIKE '%...%' yerine eşitlik ve önek (LIKE 'x%') sorgularıyla indeks kullanılır.
+    country_key = Column(String(100), nullable=True)
+    city_key = Column(String(100), nullable=True)
+
+    # Cihaz yapılandırması her değiştiğinde artar; 2. katman sunucu /api/ops/config ile
+    # sadece bu sürümden sonra değişen cihazları çeker.
+    config_version = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        Index("ix_stores_country_key_city_key", "country_key", "city_key"),
+        # Filo durum indeksinin son heartbeat'leri okuması için
+        Index("ix_stores_last_seen", "last_seen"),
+    )
+
+    @validates("country", "city")
+    def _sync_place_key(self, field, value):
+        setattr(self, f"{field}_key", place_key(value) if value is not None else None)
+        return value
     
     # --- İLİŞKİLER ---
     installer = relationship("User", foreign_keys=[installer_id], back_populates="stores_installed")
@@ -56,7 +77,11 @@ class User(Base):
     role = Column(Enum(UserRole), nullable=False)
     country = Column(String(100), nullable=True)
     city = Column(String(100), nullable=True) 
-    profile_picture = Column(MEDIUMTEXT, nullable=True)
+    # Eski base64 profil resmi. Sadece taşıma betiği (migrate_profile_pictures.py) okur;
+    # liste sorgularında hiç yüklenmemesi için ertelenmiş (deferred) sütundur.
+    profile_picture = deferred(Column(Text().with_variant(MEDIUMTEXT(), "mysql"), nullable=True))
+    # İçerik adresli depodaki profil resminin anahtarı (app/core/profile_pictures.py)
+    profile_picture_key = Column(String(64), nullable=True)
     
     # Kısır döngüyü kırmak için bu ForeignKey'in, diğer tablo oluşturulduktan sonra eklenmesini sağlıyoruz.
     assigned_store_id = Column(Integer, ForeignKey("stores.id", use_alter=True, name='fk_user_assigned_store'), nullable=True)
@@ -99,8 +124,17 @@ class Device(Base):
     product_barcode_font_size = Column(Integer, default=12)
     product_barcode_numbers_font_size = Column(Integer, default=12)
 
+    # Cihazın son değiştiği mağaza yapılandırma sürümü (Store.config_version)
+    config_version = Column(Integer, nullable=False, default=0, server_default="0")
+
     store = relationship("Store", back_populates="devices")
 
+    # Delta yapılandırma sorgusu için; store_id ile başladığından liste görünümündeki
+    # cihaz sayısı alt sorgusunu da karşılar.
+    __table_args__ = (
+        Index("ix_devices_store_config_version", "store_id", "config_version"),
+    )
+
 
 class Log(Base):
     __tablename__ = "logs"
@@ -110,9 +144,29 @@ class Log(Base):
     level = Column(String(50))
     message = Column(Text, nullable=False)
     timestamp = Column(DateTime(timezone=True), nullable=False)
+    # (store_id, timestamp, source, message) özeti; tekrar gönderilen logları eler.
+    content_hash = Column(String(32), nullable=True)
     
     store = relationship("Store", back_populates="logs")
 
+    # Mağaza log sorguları (store_id + zaman aralığı, zamana göre sıralı, keyset sayfalama)
+    # tablo taraması ve sıralama yapmadan bu indeks üzerinden çalışır.
+    # Benzersiz indeks timestamp'i de içerir, çünkü bölümlenmiş MySQL tablolarında
+    # her benzersiz anahtar bölümleme sütununu içermek zorundadır.
+    __table_args__ = (
+        Index("ix_logs_store_timestamp_id", "store_id", "timestamp", "id"),
+        Index("uq_logs_content_hash", "content_hash", "timestamp", unique=True),
+    )
+
+
+class LogUploadCheckpoint(Base):
+    # NDJSON log akışında her mağaza için veritabanına yazılmış en son sıra numarası.
+    # Bağlantı koparsa 2. katman sunucu gönderime bu numaradan sonra devam eder.
+    __tablename__ = "log_upload_checkpoints"
+    store_id = Column(Integer, ForeignKey("stores.id", name="fk_log_checkpoint_store", ondelete="CASCADE"), primary_key=True)
+    last_seq = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 
 class FirmwareUpdate(Base):
     __tablename__ = "firmware_updates"
@@ -120,5 +174,60 @@ class FirmwareUpdate(Base):
     target = Column(String(50), nullable=False)
     version = Column(String(50), nullable=False)
     file_url = Column(String(512), nullable=False)
+    # İçerik adresli depodaki dosyanın SHA-256 özeti ve boyutu (eski kayıtlarda boş)
+    sha256 = Column(String(64), nullable=True)
+    size_bytes = Column(BigInteger, nullable=True)
     release_notes = Column(Text)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Dağıtım ayarları veya paketler değiştiğinde güncellenir (/latest Last-Modified/ETag)
+    updated_at = Column(DateTime(timezone=True), nullable=True, default=func.now(), onupdate=func.now())
+
+    # Kademeli dağıtım (app/core/firmware_rollout.py): sürümü alacak mağazaların yüzdesi,
+    # virgülle ayrılmış ülke anahtarları (boşsa tüm ülkeler) ve aynı anda indirebilecek
+    # en fazla mağaza sayısı (boşsa sınırsız).
+    rollout_percent = Column(Integer, nullable=False, default=100, server_default="100")
+    rollout_countries = Column(Text, nullable=True)
+    max_concurrent_downloads = Column(Integer, nullable=True)
+
+    # /latest'in önbellek dışı yolu: hedefin en yeni sürümleri
+    __table_args__ = (
+        Index("ix_firmware_updates_target_created_at", "target", "created_at"),
+    )
+
+
+class FirmwareArtifact(Base):
+    # Bir firmware imajının yüklemede üretilen küçültülmüş biçimleri: sıkıştırılmış
+    # tam imaj (gzip/zstd) veya aynı hedefin önceki bir sürümünden fark (bsdiff4).
+    # Dosyalar imajla aynı içerik adresli depodadır (app/core/firmware_store.py).
+    __tablename__ = "firmware_artifacts"
+    id = Column(Integer, primary_key=True)
+    firmware_id = Column(Integer, ForeignKey("firmware_updates.id", name="fk_artifact_firmware", ondelete="CASCADE"), nullable=False)
+    # "gzip", "zstd" veya "bsdiff4"
+    encoding = Column(String(20), nullable=False)
+    # Sadece farklar için: farkın uygulanacağı sürüm
+    base_firmware_id = Column(Integer, ForeignKey("firmware_updates.id", name="fk_artifact_base_firmware", ondelete="CASCADE"), nullable=True)
+    sha256 = Column(String(64), nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_firmware_artifacts_firmware_base", "firmware_id", "base_firmware_id"),
+    )
+
+
+class FirmwareDownloadSlot(Base):
+    # max_concurrent_downloads sınırı için: /latest bir mağazaya indirme izni verdiğinde
+    # satır eklenir; mağaza yeni sürümü bildirince veya süre dolunca slot boşalır.
+    __tablename__ = "firmware_download_slots"
+    firmware_id = Column(Integer, ForeignKey("firmware_updates.id", name="fk_download_slot_firmware", ondelete="CASCADE"), primary_key=True)
+    store_id = Column(Integer, ForeignKey("stores.id", name="fk_download_slot_store", ondelete="CASCADE"), primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class JobLock(Base):
+    # Birden fazla worker sürecinde çalışan periyodik işlerin (ör. log temizliği)
+    # aynı anda sadece bir süreçte çalışmasını sağlayan kiralama (lease) kayıtları.
+    __tablename__ = "job_locks"
+    name = Column(String(100), primary_key=True)
+    owner = Column(String(255), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,50 @@
+# app/database/schema.py
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from app.database import models
+
+# Şema senkronizasyonu
+# create_all sadece eksik tabloları oluşturur; mevcut tablolara sonradan eklenen
+# sütunları ve indeksleri oluşturmaz. Bu modül, uygulama açılışında eksik
+# indeksleri ve boş bırakılabilir (nullable) yeni sütunları da ekler.
+
+
+def sync_schema(engine: Engine) -> None:
+    """Eksik tabloları, mevcut tablolardaki eksik sütunları ve indeksleri oluşturur."""
+    models.Base.metadata.create_all(bind=engine)
+
+    inspector = inspect(engine)
+    for table in models.Base.metadata.sorted_tables:
+        _add_missing_columns(engine, inspector, table)
+
+    inspector = inspect(engine)
+    for table in models.Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                print(f"'{table.name}' tablosuna eksik indeks ekleniyor: {index.name}")
+                index.create(bind=engine)
+
+
+def _add_missing_columns(engine: Engine, inspector, table) -> None:
+    existing = {column["name"] for column in inspector.get_columns(table.name)}
+    preparer = engine.dialect.identifier_preparer
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        if not column.nullable and column.server_default is None:
+            print(f"UYARI: '{table.name}.{column.name}' sütunu eksik ve otomatik eklenemiyor (NOT NULL).")
+            continue
+        column_type = column.type.compile(dialect=engine.dialect)
+        ddl = f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} {column_type}"
+        if column.server_default is not None:
+            default = column.server_default.arg
+            default = default.text if hasattr(default, "text") else f"'{default}'"
+            ddl += f" DEFAULT {default}"
+        if not column.nullable:
+            ddl += " NOT NULL"
+        print(f"'{table.name}' tablosuna eksik sütun ekleniyor: {column.name}")
+        with engine.begin() as conn:
+            conn.execute(text(ddl))
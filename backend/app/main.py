@@ -35,12 +35,25 @@ app.include_router(store_routes.router)
 # app/main.py
 
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from app.database import models
-from app.database.connection import engine
+from app.database.async_connection import async_engine, async_read_engines
+from app.database.connection import SessionLocal, engine, read_engines
+from app.crud import store_crud
+from app.database.schema import sync_schema
+from app.core.blob_store import ContentAddressedStaticFiles
+from app.core.config import settings
+from app.core.firmware_artifacts import firmware_artifact_builder
+from app.core.geo_catalog import geo_catalog
+from app.core.password_hasher import password_hasher
+from app.core.fleet_status import fleet_status
+from app.core.heartbeat import heartbeat_aggregator
+from app.core.log_queue import log_ingest_queue
+from app.core.log_retention import log_retention_job
 
 # Gerekli tüm rotaları import ediyoruz
 from app.routes import auth_routes, user_routes, store_routes, operational_routes, firmware_routes, utility_routes
@@ -51,13 +64,43 @@ from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 from slowapi.extension import _rate_limit_exceeded_handler
 
-# Veritabanı tablolarını oluştur
-models.Base.metadata.create_all(bind=engine)
+# Veritabanı tablolarını ve eksik indeksleri oluştur
+sync_schema(engine)
+
+# Yeni eklenen ülke/şehir anahtar sütunlarını eski mağazalar için doldur (sadece eksik satırlar)
+with SessionLocal() as _db:
+    _backfilled = store_crud.backfill_store_place_keys(_db)
+    if _backfilled:
+        print(f"{_backfilled} mağazanın ülke/şehir anahtarları dolduruldu.")
+
+# Uygulama yaşam döngüsü: arka plan işleri burada başlatılır ve kapanışta durdurulur.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    geo_catalog.warm_up()
+    heartbeat_aggregator.start()
+    fleet_status.start()
+    if settings.LOG_INGEST_MODE == "queue":
+        log_ingest_queue.start()
+    if settings.LOG_RETENTION_ENABLED:
+        log_retention_job.start()
+    yield
+    # Kapanışta kuyrukta bekleyen logları ve heartbeat'leri veritabanına yaz.
+    log_retention_job.stop()
+    fleet_status.stop()
+    log_ingest_queue.stop()
+    heartbeat_aggregator.stop()
+    password_hasher.stop()
+    firmware_artifact_builder.stop()
+    for db_engine in [engine, *read_engines]:
+        db_engine.dispose()
+    for async_db_engine in [async_engine, *async_read_engines]:
+        await async_db_engine.dispose()
 
 app = FastAPI(
     title="Smart Shelf Management API",
     description="API for managing smart shelf devices, stores, and users.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 origins = [
@@ -73,6 +116,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Sayfalama imlecinin tarayıcıdan okunabilmesi için
+    expose_headers=["X-Next-Cursor"],
 )
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
@@ -81,7 +126,8 @@ app.add_middleware(SlowAPIMiddleware)
 # Statik dosya yönlendirmeleri
 UPLOAD_DIR = Path("uploaded_files")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-app.mount("/files", StaticFiles(directory=UPLOAD_DIR), name="files")
+# İçerik adresli dosyalar (profil resimleri) anahtarlarıyla aynı ETag ve süresiz önbellekle sunulur.
+app.mount("/files", ContentAddressedStaticFiles(directory=UPLOAD_DIR), name="files")
 
 FIRMWARE_DIR = Path("firmware_updates")
 FIRMWARE_DIR.mkdir(exist_ok=True)
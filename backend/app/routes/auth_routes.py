@@ -1,12 +1,15 @@
 # backend/app/routes/auth_routes.py
 
+import time
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.connection import get_db
-from app.crud import user_crud
+from app.database.async_connection import get_async_db
+from app.crud import async_user_crud
+from app.core.metrics import metrics
+from app.core.password_hasher import PasswordHasherBusy
 from app.schemas import token_schemas, user_schemas # <-- user_schemas'ı da import edin
 from app.security import security
 from app.core.config import settings
@@ -20,13 +23,25 @@ router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 # Doğrusu:
 @router.post("/token", response_model=user_schemas.LoginResponse)
 # ---------------------------------
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     """
     Kullanıcıyı doğrular, rolünü kontrol eder ve bir erişim jetonu oluşturur.
+    Argon2 doğrulaması şifre hash havuzunda yapılır; havuzun sırası doluysa 503 döner.
     """
-    user = user_crud.authenticate_user(
-        db, email=form_data.username, password=form_data.password
-    )
+    start = time.perf_counter()
+    try:
+        user = await async_user_crud.authenticate_user(
+            db, email=form_data.username, password=form_data.password
+        )
+    except PasswordHasherBusy:
+        metrics.inc("login_rejected_busy_total")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+    finally:
+        metrics.observe("login_seconds", time.perf_counter() - start)
     
     if not user:
         raise HTTPException(
@@ -1,81 +1,238 @@
 # app/routes/firmware_routes.py
 
-import shutil
+import base64
 from pathlib import Path
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Form, Request, Response
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.database import models
-from app.database.connection import get_db
+from app.database.async_connection import get_async_db
+from app.database.connection import SessionLocal, get_db
 from app.schemas import firmware_schemas
-from app.crud import firmware_crud
+from app.crud import async_firmware_crud, firmware_crud
 from app.security.security import get_current_user
+from app.core.principal_cache import Principal
+from app.core.config import settings
+from app.core.firmware_artifacts import ENCODINGS, IDENTITY, choose_artifact
+from app.core.firmware_cache import latest_firmware_cache
+from app.core.firmware_rollout import retry_after_seconds, select_release
+from app.core.firmware_store import firmware_file_path, firmware_file_url, save_firmware_file
+from app.core.metrics import metrics
+from app.api.dependency import resolve_server_token_async
+from app.utils.http_cache import etag_matches, http_date, make_etag, not_modified, not_modified_since, set_cache_headers
 
 router = APIRouter(prefix="/api/firmware", tags=["Firmware"])
 
-# Güncellemelerin yükleneceği klasör
+# Eski yüklemelerin klasörü (/firmware_updates mount'u); yeni dosyalar app/core/firmware_store.py'de
 UPLOAD_DIRECTORY = Path("firmware_updates")
 UPLOAD_DIRECTORY.mkdir(exist_ok=True)
 
+# İçerik adresli dosya asla değişmez; istemci ve ara önbellekler süresiz saklayabilir.
+FIRMWARE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _build_firmware_artifacts(firmware_id: int):
+    """Yükleme yanıtı gönderildikten sonra arka planda sıkıştırılmış paketleri ve farkları üretir."""
+    db = SessionLocal()
+    try:
+        firmware_crud.create_firmware_artifacts(db, firmware_id)
+    except Exception as e:
+        db.rollback()
+        print(f"Firmware {firmware_id} paketleri üretilemedi: {e}")
+    finally:
+        db.close()
+
 # Upload a new firmware file
 @router.post("/", response_model=firmware_schemas.FirmwareResponse, status_code=status.HTTP_201_CREATED)
 def upload_firmware(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     version: str = Form(...),
     target: str = Form(...),
     release_notes: str = Form(None),
+    rollout_percent: int = Form(100, ge=0, le=100),
+    rollout_countries: str = Form(None),
+    max_concurrent_downloads: int = Form(None, ge=1),
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Uploads a new firmware file. Only Admins can perform this action.
+    The file is stored under its SHA-256 digest, computed while the upload is copied.
+    Compressed packages and deltas from the previous version are built in the background.
+    rollout_countries is a comma separated list of country names.
     """
     if current_user.role != models.UserRole.Admin:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    file_path = UPLOAD_DIRECTORY / file.filename
-    with file_path.open("wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    file_url = f"/firmware_updates/{file.filename}"
-    
     firmware_data = firmware_schemas.FirmwareCreate(
-        version=version, target=target, release_notes=release_notes
+        version=version, target=target, release_notes=release_notes,
+        rollout_percent=rollout_percent,
+        rollout_countries=rollout_countries.split(",") if rollout_countries else None,
+        max_concurrent_downloads=max_concurrent_downloads,
+    )
+    try:
+        sha256, size_bytes = save_firmware_file(file.file)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+    db_firmware = firmware_crud.create_firmware_update(
+        db, firmware=firmware_data, file_url=firmware_file_url(sha256), sha256=sha256, size_bytes=size_bytes
     )
-    return firmware_crud.create_firmware_update(db, firmware=firmware_data, file_url=file_url)
+    background_tasks.add_task(_build_firmware_artifacts, db_firmware.id)
+    return db_firmware
 
 # List all firmware updates
 @router.get("/", response_model=List[firmware_schemas.FirmwareResponse])
 def list_firmware_updates(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Lists all firmware updates."""
     return firmware_crud.get_firmware_updates(db)
 
+# Change the rollout policy of a firmware update (e.g. next percentage or country wave)
+@router.patch("/{firmware_id}/rollout", response_model=firmware_schemas.FirmwareResponse)
+def update_firmware_rollout(
+    firmware_id: int,
+    rollout: firmware_schemas.FirmwareRolloutUpdate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Updates rollout_percent, rollout_countries or max_concurrent_downloads of a
+    firmware update. Only the fields sent are changed. Only Admins can perform this action.
+    """
+    if current_user.role != models.UserRole.Admin:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    db_firmware = db.get(models.FirmwareUpdate, firmware_id)
+    if db_firmware is None:
+        raise HTTPException(status_code=404, detail="Firmware not found")
+    return firmware_crud.update_firmware_rollout(db, db_firmware, rollout)
+
+# Download a firmware file by its digest
+@router.api_route("/files/{sha256}", methods=["GET", "HEAD"])
+async def download_firmware_file(sha256: str, request: Request):
+    """
+    Serves a firmware image by its SHA-256 digest. The digest is the ETag, so a
+    matching If-None-Match gets 304. Range requests (and If-Range) are supported,
+    so an interrupted download can resume where it stopped.
+    """
+    path = firmware_file_path(sha256)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Firmware file not found")
+
+    etag = f'"{sha256}"'
+    if etag_matches(request, etag):
+        metrics.inc("firmware_download_not_modified_total")
+        return not_modified(etag, FIRMWARE_CACHE_CONTROL)
+    metrics.inc("firmware_download_range_total" if "range" in request.headers else "firmware_download_total")
+    return FileResponse(path, media_type="application/octet-stream", headers={
+        "ETag": etag,
+        "Cache-Control": FIRMWARE_CACHE_CONTROL,
+        "Repr-Digest": f"sha-256=:{base64.b64encode(bytes.fromhex(sha256)).decode()}:",
+    })
+
 # @router.get("/{target}", response_model=firmware_schemas.FirmwareResponse)
-@router.get("/latest")
-def get_latest_firmware_version(
+@router.get("/latest", response_model=firmware_schemas.LatestFirmwareResponse)
+async def get_latest_firmware_version(
     target: str,
     request: Request,
-    db: Session = Depends(get_db)
+    response: Response,
+    current_version: Optional[str] = None,
+    accept: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     For 2nd layer servers to check the latest firmware update.
     This endpoint should be protected with server_token.
+
+    The server may send its installed 'current_version' and the package encodings it
+    can apply in 'accept' (comma separated: gzip, zstd, bsdiff4; default all). The
+    response's 'artifact' is the smallest download that produces the latest image.
+
+    Rollouts: the store gets the newest version whose rollout policy includes it. If a
+    newer version exists but the store is not in it yet, a Retry-After header tells when
+    to ask again. A store already running a newer version than that (e.g. a paused wave)
+    gets its own version back, never an older image. If the version's download limit is full, the answer is 503 with Retry-After.
     """
     server_token = request.headers.get("X-Server-Token")
     if not server_token:
         raise HTTPException(status_code=401, detail="Server token missing")
     
     # Token'a ait mağazanın varlığını kontrol et (daha detaylı yetkilendirme yapılabilir)
-    store = db.query(models.Store).filter(models.Store.server_token == server_token).first()
+    store = await resolve_server_token_async(db, server_token)
     if not store:
         raise HTTPException(status_code=403, detail="Invalid server token")
 
-    firmware = firmware_crud.get_latest_firmware(db, target=target)
-    if not firmware:
+    # Sürümler önbellekten okunur; token da önbellekteyse 304 yanıtı veritabanına hiç gitmez.
+    releases = await latest_firmware_cache.releases_async(
+        target, lambda key: async_firmware_crud.get_recent_firmware(db, target=key, limit=settings.FIRMWARE_ROLLOUT_LOOKBACK)
+    )
+    if not releases:
         raise HTTPException(status_code=404, detail="No firmware found for the target")
-    
-    return firmware
\ No newline at end of file
+
+    retry_after = str(retry_after_seconds(store.id))
+    firmware = select_release(releases, store.id, store.country, current_version)
+    if firmware is None:
+        raise HTTPException(status_code=404, detail="No firmware released to this store yet", headers={"Retry-After": retry_after})
+    if firmware is not releases[0]:
+        # Daha yeni bir sürüm kademeli dağıtımda; mağaza henüz kapsamda değil.
+        metrics.inc("firmware_rollout_held_back_total")
+        response.headers["Retry-After"] = retry_after
+
+    etag = make_etag("firmware-latest", firmware.id, firmware.last_modified, releases[0].id, current_version, accept)
+    last_modified = max(firmware.last_modified, releases[0].last_modified)
+    set_cache_headers(response, etag, "no-cache")
+    response.headers["Last-Modified"] = http_date(last_modified)
+    # Last-Modified sürümü ve kabul edilen paketleri kapsamaz; bunları gönderen sunucu için
+    # sadece ETag geçerlidir. Aksi halde yeni sürümü kuran sunucu 304 alır ve indirme izni bırakılmazdı.
+    date_validator_applies = current_version is None and accept is None
+    if etag_matches(request, etag) or (date_validator_applies and not_modified_since(request, last_modified)):
+        metrics.inc("firmware_latest_not_modified_total")
+        cached = not_modified(etag, "no-cache")
+        cached.headers.update({key: response.headers[key] for key in ("Last-Modified", "Retry-After") if key in response.headers})
+        return cached
+
+    latest = firmware_schemas.LatestFirmwareResponse.model_validate(firmware)
+    if current_version == firmware.version:
+        # Sunucu sürümü kurmuş; slotu süresi dolmadan boşaltılır.
+        if firmware.max_concurrent_downloads:
+            await async_firmware_crud.release_download_slot(db, firmware.id, store.id)
+        return latest
+    if firmware.sha256 is None:
+        return latest
+
+    # Slot sadece kurulu sürümünü bildiren ve güncellemeye ihtiyacı olan sunucuya verilir;
+    # current_version göndermeyen sunucu slotunu hiç bırakamayacağı için sayılmaz.
+    if firmware.max_concurrent_downloads and current_version is not None:
+        if not await async_firmware_crud.acquire_download_slot(db, firmware.id, store.id, firmware.max_concurrent_downloads):
+            metrics.inc("firmware_rollout_throttled_total")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Firmware download limit reached, retry later",
+                headers={"Retry-After": retry_after},
+            )
+
+    accepted = None
+    if accept is not None:
+        accepted = {encoding.strip() for encoding in accept.split(",")} & set(ENCODINGS)
+    artifacts = await async_firmware_crud.get_firmware_artifacts(db, firmware, current_version)
+    artifact = choose_artifact(firmware.size_bytes, artifacts, accepted)
+    if artifact is None:
+        latest.artifact = firmware_schemas.FirmwareArtifactResponse(
+            encoding=IDENTITY, sha256=firmware.sha256, size_bytes=firmware.size_bytes, file_url=firmware.file_url
+        )
+    else:
+        latest.artifact = firmware_schemas.FirmwareArtifactResponse(
+            encoding=artifact.encoding,
+            base_version=current_version if artifact.base_firmware_id is not None else None,
+            sha256=artifact.sha256,
+            size_bytes=artifact.size_bytes,
+            file_url=firmware_file_url(artifact.sha256),
+        )
+    metrics.inc(f"firmware_latest_{latest.artifact.encoding}_total")
+    return latest
\ No newline at end of file
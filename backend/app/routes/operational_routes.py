@@ -1,84 +1,308 @@
 # app/routes/operational_routes.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime, timezone
+import json
+import time
+import zlib
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
 from app.database import models
-from app.database.connection import get_db
-from app.schemas import log_schemas
-from app.crud import log_crud
-from app.security.security import get_current_user
+from app.database.async_connection import get_async_db, get_async_read_db
+from app.schemas import log_schemas, store_schemas
+from app.crud import async_log_crud, async_store_crud, log_crud
+from app.core.config import settings
+from app.core.config_notifier import config_change_notifier
+from app.core.heartbeat import heartbeat_aggregator
+from app.core.log_dedup import log_batch_idempotency, recent_log_hashes
+from app.core.log_queue import log_ingest_queue
+from app.core.metrics import metrics
+from app.core.store_token_cache import StoreIdentity
+from app.api.dependency import get_current_user_async, get_store_from_server_token_async
+from app.core.principal_cache import Principal
+from app.utils.http_cache import etag_matches, make_etag, not_modified, set_cache_headers
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.ndjson import iter_ndjson_lines
 
+# 2. katman sunucuların sürekli çağırdığı bu uç noktalar asenkron çalışır: veritabanını
+# beklerken threadpool'da thread tutmazlar (app/database/async_connection.py).
 router = APIRouter(prefix="/api/ops", tags=["Operational"])
 
+
+def _enqueue_logs(store_id: int, logs: List[log_schemas.LogCreate]) -> JSONResponse:
+    """
+    Kuyruk modunda logları kuyruğa alır; kuyruk doluysa 429 döndürür.
+    Parti içindeki ve yakın zamanda yazılmış tekrarlar kuyruğa hiç girmez.
+    """
+    rows, deduplicated = recent_log_hashes.split(log_crud.build_log_rows(store_id, logs))
+    if rows and not log_ingest_queue.offer(rows):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Log queue is full, please retry later",
+            headers={"Retry-After": "5"},
+        )
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"status": "accepted", "logs_queued": len(rows), "deduplicated": deduplicated},
+    )
+
+
 # İkinci katman sunucunun 'hayattayım' sinyali gönderdiği endpoint
 @router.post("/heartbeat")
-def server_heartbeat(request: Request, db: Session = Depends(get_db)):
-    """2. Katman sunucudan 'hayattayım' sinyali alır ve mağazanın son görülme zamanını günceller."""
-    server_token = request.headers.get("X-Server-Token")
-    if not server_token:
-        raise HTTPException(status_code=401, detail="Server token missing")
-
-    db_store = db.query(models.Store).filter(models.Store.server_token == server_token).first()
-    if not db_store:
-        raise HTTPException(status_code=404, detail="Store with this token not found")
-    
-    db_store.last_seen = datetime.now(timezone.utc)
-    db.commit()
+async def server_heartbeat(store: StoreIdentity = Depends(get_store_from_server_token_async)):
+    """
+    2. Katman sunucudan 'hayattayım' sinyali alır ve mağazanın son görülme zamanını günceller.
+    Zaman damgası bellekte toplanır, veritabanına periyodik olarak toplu yazılır.
+    """
+    last_seen = heartbeat_aggregator.record(store.id)
     
-    return {"status": "ok", "store": db_store.name, "timestamp": db_store.last_seen}
+    return {"status": "ok", "store": store.name, "timestamp": last_seen}
 
 # Log gönderme endpointi
 @router.post("/logs")
-def submit_log_for_store(
+async def submit_log_for_store(
     log: log_schemas.LogCreate,
-    request: Request,
-    db: Session = Depends(get_db)
+    store: StoreIdentity = Depends(get_store_from_server_token_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     2. Katman sunucudan log kabul eder. Logun hangi mağazaya ait olduğunu token'dan anlar.
+    Kuyruk modunda log kuyruğa alınır ve 202 döner.
     """
-    server_token = request.headers.get("X-Server-Token")
-    if not server_token:
-        raise HTTPException(status_code=401, detail="Server token missing")
-        
-    db_store = db.query(models.Store).filter(models.Store.server_token == server_token).first()
-    if not db_store:
-        raise HTTPException(status_code=404, detail="Store with this token not found")
-
-    return log_crud.create_log(db=db, store_id=db_store.id, log=log)
+    if settings.LOG_INGEST_MODE == "queue":
+        return _enqueue_logs(store.id, [log])
+    return await async_log_crud.create_log(db=db, store_id=store.id, log=log)
 
 
 # --- Toplu log gönderimi için ---
 @router.post("/logs/bulk", status_code=status.HTTP_201_CREATED)
-def submit_bulk_logs_for_store(
+async def submit_bulk_logs_for_store(
     logs: List[log_schemas.LogCreate], # Artık tek bir log yerine bir liste bekliyor
-    request: Request,
-    db: Session = Depends(get_db)
+    store: StoreIdentity = Depends(get_store_from_server_token_async),
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
     """
     İnternet kesintisi sonrası birikmiş logları toplu olarak kabul eder.
+    Kuyruk modunda loglar kuyruğa alınır ve 202 döner.
+
+    Sunucu her parti için bir 'Idempotency-Key' gönderebilir; aynı anahtarla gelen
+    tekrar istekler yazılmadan ilk yanıtla cevaplanır, ilki hâlâ sürüyorsa 409 alır. Anahtar yoksa tekrarlar log
+    içeriğinden tespit edilir ve yanıttaki 'deduplicated' alanında raporlanır.
     """
-    server_token = request.headers.get("X-Server-Token")
-    if not server_token:
-        raise HTTPException(status_code=401, detail="Server token missing")
-        
-    db_store = db.query(models.Store).filter(models.Store.server_token == server_token).first()
-    if not db_store:
-        raise HTTPException(status_code=404, detail="Store with this token not found")
+    if idempotency_key:
+        # Anahtar, işlemden önce ayrılır; aynı anahtarla eşzamanlı gelen ikinci istek yazmaz.
+        reserved, cached = log_batch_idempotency.reserve(store.id, idempotency_key)
+        if cached is not None:
+            metrics.inc("log_idempotent_replays_total")
+            return JSONResponse(
+                status_code=cached["status_code"],
+                content=cached["body"],
+                headers={"Idempotent-Replayed": "true"},
+            )
+        if not reserved:
+            metrics.inc("log_idempotent_in_flight_total")
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still being processed",
+                headers={"Retry-After": "1"},
+            )
+
+    try:
+        if settings.LOG_INGEST_MODE == "queue":
+            response = _enqueue_logs(store.id, logs)
+            body = json.loads(response.body)
+            status_code = response.status_code
+        else:
+            body = await async_log_crud.bulk_create_logs(db=db, store_id=store.id, logs=logs)
+            response = body
+            status_code = status.HTTP_201_CREATED
+    except BaseException:
+        if idempotency_key:
+            log_batch_idempotency.release(store.id, idempotency_key)
+        raise
+
+    metrics.inc("log_deduplicated_total", body["deduplicated"])
+    if idempotency_key:
+        log_batch_idempotency.put(store.id, idempotency_key, {"status_code": status_code, "body": body})
+    return response
+
+
+# --- Akışla (NDJSON, opsiyonel gzip) toplu log gönderimi ---
+@router.post("/logs/stream", response_model=log_schemas.LogStreamResult)
+async def stream_logs_for_store(
+    request: Request,
+    store: StoreIdentity = Depends(get_store_from_server_token_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Uzun bir kesintiden sonra biriken logları 'application/x-ndjson' olarak, istenirse
+    'Content-Encoding: gzip' ile kabul eder. Gövde belleğe alınmadan satır satır
+    doğrulanır ve sabit boyutlu partiler halinde yazılır.
+
+    Her satır isteğe bağlı artan bir 'seq' taşıyabilir. Yazılan en son 'seq' mağaza
+    için saklanır; bağlantı koparsa sunucu /logs/stream/checkpoint ile kaldığı yeri
+    öğrenip sadece sonrasını gönderir. Bu numaraya eşit veya küçük satırlar atlanır.
+    """
+    gzip = request.headers.get("content-encoding", "").lower() == "gzip"
+    result = log_schemas.LogStreamResult()
+    committed_seq = await async_log_crud.get_upload_checkpoint(db, store.id)
+    result.last_seq = committed_seq
+    last_seq = committed_seq
+    batch: List[dict] = []
+
+    def add_error(line_no: int, error: str, seq: Optional[int] = None):
+        result.rejected += 1
+        if len(result.errors) < settings.LOG_STREAM_MAX_ERRORS:
+            result.errors.append(log_schemas.LogLineError(line=line_no, seq=seq, error=error))
+        else:
+            result.errors_truncated = True
 
-    return log_crud.bulk_create_logs(db=db, store_id=db_store.id, logs=logs)
+    async def flush():
+        nonlocal batch
+        if not batch and last_seq == result.last_seq:
+            return
+        try:
+            inserted = await async_log_crud.insert_log_batch_with_checkpoint(db, store.id, batch, last_seq)
+        except SQLAlchemyError:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail={"message": "Log batch could not be written, resume from last_seq",
+                        "accepted": result.accepted, "last_seq": result.last_seq},
+            )
+        result.accepted += inserted
+        result.deduplicated += len(batch) - inserted
+        result.last_seq = last_seq
+        batch = []
+
+    try:
+        async for line_no, line in iter_ndjson_lines(
+            request.stream(), gzip=gzip, max_line_bytes=settings.LOG_STREAM_MAX_LINE_BYTES
+        ):
+            if line is None:
+                add_error(line_no, "Line too long")
+                continue
+            try:
+                entry = log_schemas.LogStreamLine.model_validate_json(line)
+            except ValidationError as e:
+                first = e.errors()[0]
+                location = ".".join(str(part) for part in first.get("loc", ()))
+                add_error(line_no, f"{location}: {first['msg']}" if location else first["msg"])
+                continue
+
+            if entry.seq is not None:
+                if last_seq is not None and entry.seq <= last_seq:
+                    result.skipped += 1
+                    continue
+                last_seq = entry.seq
+
+            batch.append(log_crud.build_log_row(store.id, entry))
+            if len(batch) >= settings.LOG_STREAM_BATCH_SIZE:
+                await flush()
+    except zlib.error:
+        await flush()
+        raise HTTPException(status_code=400, detail={"message": "Invalid gzip body", "accepted": result.accepted, "last_seq": result.last_seq})
+
+    await flush()
+    return result
+
+
+@router.get("/logs/stream/checkpoint", response_model=log_schemas.LogUploadCheckpointResponse)
+async def get_log_stream_checkpoint(
+    store: StoreIdentity = Depends(get_store_from_server_token_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Akışla gönderilen loglar için yazılmış en son sıra numarasını döndürür."""
+    return {"store_id": store.id, "last_seq": await async_log_crud.get_upload_checkpoint(db, store.id)}
+
+
+# Mağaza sunucusunun cihaz yapılandırmasını çektiği endpoint
+@router.get("/config", response_model=store_schemas.StoreConfigResponse)
+async def get_store_config(
+    request: Request,
+    response: Response,
+    since: Optional[int] = Query(None, ge=0),
+    wait: float = Query(0, ge=0),
+    store: StoreIdentity = Depends(get_store_from_server_token_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Mağazanın yapılandırmasını (çalışma saatleri, sunucu IP'si, cihaz ayarları) döndürür.
+    Sunucu elindeki 'config_version' değerini 'since' olarak gönderirse sadece o sürümden
+    sonra değişen cihazlar döner; değişiklik yoksa 304. 'since' yerine son yanıttaki ETag
+    'If-None-Match' ile de gönderilebilir.
+
+    'wait' saniye verilirse (en fazla CONFIG_LONG_POLL_MAX_SECONDS) değişiklik olana kadar
+    beklenir (long-poll); bu sürede veritabanı bağlantısı tutulmaz.
+    """
+    version = await async_store_crud.get_config_version(db, store.id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Store not found")
+    if since is not None and since > version:
+        # Sunucunun sürümü bizde yok (ör. veritabanı geri yüklendi); tam yapılandırma gönderilir.
+        since = None
+    known = since if since is not None else (version if etag_matches(request, make_etag("config", store.id, version)) else None)
+
+    if known == version and wait > 0:
+        await db.rollback()  # Bağlantıyı beklerken havuza geri ver
+        deadline = time.monotonic() + min(wait, settings.CONFIG_LONG_POLL_MAX_SECONDS)
+        while version == known:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            await config_change_notifier.wait(store.id, min(remaining, settings.CONFIG_LONG_POLL_RECHECK_SECONDS))
+            version = await async_store_crud.get_config_version(db, store.id)
+            await db.rollback()
+
+    if known == version:
+        metrics.inc("config_sync_not_modified_total")
+        return not_modified(make_etag("config", store.id, version), "no-cache")
+
+    config = await async_store_crud.get_store_config(db, store.id, since=known)
+    metrics.inc("config_sync_full_total" if config.full else "config_sync_delta_total")
+    set_cache_headers(response, make_etag("config", store.id, config.config_version), "no-cache")
+    return config
 
 
 # Mağaza loglarını getirme endpointi
 @router.get("/logs/{store_id}", response_model=List[log_schemas.LogResponse])
-def get_store_logs(
+async def get_store_logs(
     store_id: int,
+    response: Response,
     days: int = 30,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user_async)
 ):
-    """Bir mağazanın son 'days' günlük loglarını Frontend için getirir."""
-    return log_crud.get_logs_by_store(db=db, store_id=store_id, days=days)
\ No newline at end of file
+    """
+    Bir mağazanın son 'days' günlük loglarını Frontend için getirir.
+    Sonraki sayfa varsa imleci 'X-Next-Cursor' başlığında döner; bu değer bir
+    sonraki istekte 'cursor' parametresi olarak gönderilir.
+    Okuma replikası tanımlıysa sorgu replikada çalışır.
+    """
+    before = None
+    if cursor:
+        try:
+            before = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    logs = await async_log_crud.get_logs_by_store(db=db, store_id=store_id, days=days, limit=limit, before=before)
+    if len(logs) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(logs[-1].timestamp, logs[-1].id)
+    return logs
+
+
+# Süreç içi metrikler (kuyruk derinliği, flush süreleri vb.)
+@router.get("/metrics")
+async def get_metrics(current_user: Principal = Depends(get_current_user_async)):
+    """Bu worker sürecine ait operasyonel metrikleri döndürür. Sadece Admin görebilir."""
+    if current_user.role != models.UserRole.Admin:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return metrics.snapshot()
@@ -1,15 +1,31 @@
 # app/routes/store_routes.py
 
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timezone
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.database import models
+from app.database.async_connection import AsyncSessionLocal, get_async_db
 from app.database.connection import get_db
 from app.schemas import store_schemas
-from app.crud import store_crud
-from app.security.security import get_current_user
+from app.crud import async_store_crud, store_crud
+from app.security.security import get_current_user, get_current_user_async
+from app.core.config import settings
+from app.core.fleet_status import fleet_status
+from app.utils.place_keys import place_key
+from app.core.metrics import metrics
+from app.core.principal_cache import Principal
 from app.utils import token_utils
+from app.utils.ndjson import CsvRecordParser, iter_csv_records, iter_ndjson_lines
 
 router = APIRouter(prefix="/api/stores", tags=["Stores"])
 
@@ -18,7 +34,7 @@ router = APIRouter(prefix="/api/stores", tags=["Stores"])
 def create_new_store(
     store: store_schemas.StoreCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Yeni bir mağaza oluşturur. Kurulumcu, isteği gönderen kullanıcıdır."""
     allowed_roles = [models.UserRole.Admin, models.UserRole.Engineer, models.UserRole.Country_Chief]
@@ -30,38 +46,294 @@ def create_new_store(
     return store_crud.create_store(db=db, store=store, installer_id=current_user.id)
 
 
-@router.get("", response_model=List[store_schemas.StoreResponse])
+@router.get(
+    "",
+    response_model=List[store_schemas.StoreResponse],
+    responses={200: {"description": "view=summary ile StoreSummaryResponse listesi döner."}},
+)
 def read_stores(
     skip: int = 0,
     limit: int = 100,
     country: Optional[str] = None,
     city: Optional[str] = None,
+    country_prefix: Optional[str] = None,
+    city_prefix: Optional[str] = None,
+    view: Literal["full", "summary"] = "full",
+    status: Optional[Literal["Online", "Offline"]] = None,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
-    """Mağazaları role göre ve filtrelere göre GÜVENLİ bir şekilde listeler."""
+    """
+    Mağazaları role göre ve filtrelere göre GÜVENLİ bir şekilde listeler.
+    country/city tam eşleşme (büyük/küçük harf ve aksan duyarsız), *_prefix önek aramasıdır.
+    view=summary: cihazlar, kurulumcu detayı ve token'lar olmadan sadece liste sütunları döner.
+    status=Online/Offline: eşleşen mağazalar filo durum indeksinden seçilir; sadece sayfadaki
+    mağazalar veritabanından okunur.
+    """
     
     if current_user.role == models.UserRole.Admin:
-        stores_from_db = store_crud.get_stores(db, skip=skip, limit=limit, country=country, city=city)
-        
+        pass
     elif current_user.role in [models.UserRole.Country_Chief, models.UserRole.Engineer, models.UserRole.Analyst]:
         # GÜVENLİK: Frontend'den gelen 'country' filtresini yok sayar, her zaman kullanıcının kendi ülkesini kullanır.
-        stores_from_db = store_crud.get_stores_by_country(
-            db, country=current_user.country, city=city, skip=skip, limit=limit
-        )
+        if not current_user.country:
+            return []
+        country, country_prefix = current_user.country, None
     else:
-        stores_from_db = []
-    
-    # DOĞRU YÖNTEM: Hatalı for döngüsü ve __dict__ kullanımı kaldırıldı.
+        return []
+
+    ids = None
+    if status is not None:
+        ids = fleet_status.store_ids(status, country, city, country_prefix, city_prefix)[skip:skip + limit]
+
+    if view == "summary":
+        rows = store_crud.get_store_summaries(
+            db, skip=skip, limit=limit, country=country, city=city,
+            country_prefix=country_prefix, city_prefix=city_prefix, ids=ids,
+        )
+        # Satırlar doğrudan JSON'a çevrilir; response_model doğrulaması ikinci kez yapılmaz.
+        summaries = store_schemas.store_summary_list.validate_python(rows, from_attributes=True)
+        return Response(content=store_schemas.store_summary_list.dump_json(summaries), media_type="application/json")
+
     # FastAPI ve Pydantic, veritabanı objelerini otomatik ve hatasız olarak JSON'a çevirir.
-    return stores_from_db
+    return store_crud.get_stores(
+        db, skip=skip, limit=limit, country=country, city=city,
+        country_prefix=country_prefix, city_prefix=city_prefix, ids=ids,
+    )
+
+
+def _status_scope(current_user: Principal) -> tuple:
+    """(izinli mi, ülke) döner; Admin dışındaki roller sadece kendi ülkelerini görür."""
+    if current_user.role == models.UserRole.Admin:
+        return True, None
+    if current_user.role in [models.UserRole.Country_Chief, models.UserRole.Engineer, models.UserRole.Analyst]:
+        return bool(current_user.country), current_user.country
+    return False, None
+
+
+# --- Filo durumu (app/core/fleet_status.py) ---
+@router.get("/status-summary", response_model=store_schemas.StoreStatusSummary)
+async def read_store_status_summary(
+    country: Optional[str] = None,
+    current_user: Principal = Depends(get_current_user_async),
+):
+    """
+    Ülke ve şehir bazında Online/Offline mağaza sayıları. Sayılar heartbeat'lerle güncel
+    tutulan bellek içi indeksten okunur; veritabanına sorgu yapılmaz.
+    """
+    allowed, own_country = _status_scope(current_user)
+    if not allowed:
+        return store_schemas.StoreStatusSummary(as_of=datetime.now(timezone.utc))
+    return fleet_status.summary(own_country or country)
+
+
+@router.get("/status-events", response_model=store_schemas.StoreStatusEventPage)
+async def read_store_status_events(
+    epoch: Optional[str] = None,
+    after: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: Principal = Depends(get_current_user_async),
+):
+    """
+    (epoch, after) imlecinden sonraki Online/Offline geçişleri (en fazla
+    FLEET_STATUS_EVENT_BUFFER olay saklanır). İlk istekte epoch gönderilmez; yanıt
+    reset=True ile güncel imleci döner. Admin dışındaki roller sadece kendi
+    ülkelerindeki mağazaların olaylarını görür.
+    """
+    allowed, own_country = _status_scope(current_user)
+    visible = None
+    if not allowed:
+        visible = set()
+    elif own_country is not None:
+        visible = fleet_status.country_store_ids(own_country)
+    events, last_seq, reset = fleet_status.events_after(epoch, after, limit, visible)
+    return store_schemas.StoreStatusEventPage(epoch=fleet_status.epoch, last_seq=last_seq, reset=reset, events=events)
+
+
+def _validation_message(e: ValidationError) -> str:
+    first = e.errors()[0]
+    location = ".".join(str(part) for part in first.get("loc", ()))
+    return f"{location}: {first['msg']}" if location else first["msg"]
+
+
+def _parse_import_line(
+    line, csv_header: Optional[List[str]], csv_parser: Optional[CsvRecordParser]
+) -> store_schemas.StoreCreate:
+    """Bir NDJSON satırını veya (başlık verilmişse) bir CSV kaydını StoreCreate olarak doğrular."""
+    if csv_header is None:
+        return store_schemas.StoreCreate.model_validate_json(line)
+    values = csv_parser.parse(line)
+    data = {key: value for key, value in zip(csv_header, values) if value != ""}
+    if "devices" in data:
+        data["devices"] = json.loads(data["devices"])
+    return store_schemas.StoreCreate.model_validate(data)
+
+
+# --- Toplu içe aktarma (CSV veya NDJSON, opsiyonel gzip) ---
+@router.post("/bulk", response_model=store_schemas.StoreImportResult)
+async def bulk_import_stores(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user_async),
+):
+    """
+    Binlerce mağazayı (cihazlarıyla) tek istekte içe aktarır. Gövde 'application/x-ndjson'
+    (satır başına bir StoreCreate) veya 'text/csv' (ilk satır başlık, 'devices' sütunu
+    JSON dizisi) olabilir; 'Content-Encoding: gzip' desteklenir. Gövde belleğe alınmadan
+    satır satır doğrulanır ve STORE_IMPORT_BATCH_SIZE'lık partiler halinde, her parti
+    kendi transaction'ında yazılır. Yazılamayan bir partideki satırlar tek tek denenir;
+    böylece hatalı satır raporlanır, diğerleri yine de eklenir. Kurulumcu isteği
+    gönderen kullanıcıdır; Admin dışındaki roller sadece kendi ülkelerine ekleyebilir.
+    """
+    allowed_roles = [models.UserRole.Admin, models.UserRole.Engineer, models.UserRole.Country_Chief]
+    if current_user.role not in allowed_roles:
+        raise HTTPException(status_code=403, detail="You are not authorized to import stores.")
+    own_country = None if current_user.role == models.UserRole.Admin else place_key(current_user.country or "")
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    gzip = request.headers.get("content-encoding", "").lower() == "gzip"
+    csv_header: Optional[List[str]] = [] if content_type == "text/csv" else None
+    csv_parser = CsvRecordParser() if csv_header is not None else None
+    result = store_schemas.StoreImportResult()
+    batch: List[tuple] = []
+
+    def add_error(line_no: int, error: str):
+        if len(result.errors) < settings.STORE_IMPORT_MAX_ERRORS:
+            result.errors.append(store_schemas.StoreImportError(line=line_no, error=error))
+        else:
+            result.errors_truncated = True
+
+    async def write(items: List[tuple]) -> List[int]:
+        store_ids = await async_store_crud.insert_store_batch(db, [store for _, store in items], current_user.id)
+        await db.commit()
+        for store_id, (_, store) in zip(store_ids, items):
+            fleet_status.upsert(store_id, store.country, store.city)
+        return store_ids
+
+    async def flush():
+        nonlocal batch
+        if not batch:
+            return
+        created = failed = 0
+        try:
+            store_ids = await write(batch)
+            result.created_ids.extend(store_ids)
+            created = len(store_ids)
+        except SQLAlchemyError:
+            await db.rollback()
+            # Hatalı satırı bulmak için parti tek tek yazılır.
+            for line_no, store in batch:
+                try:
+                    result.created_ids.extend(await write([(line_no, store)]))
+                    created += 1
+                except SQLAlchemyError as e:
+                    await db.rollback()
+                    failed += 1
+                    add_error(line_no, f"Database error: {e.__class__.__name__}")
+        result.created += created
+        result.failed += failed
+        result.batches.append(store_schemas.StoreImportBatch(
+            first_line=batch[0][0], last_line=batch[-1][0], created=created, failed=failed
+        ))
+        metrics.inc("stores_imported_total", created)
+        batch = []
+
+    try:
+        # CSV kayıtları tek bir csv.reader ile ayrıştırılır; tırnak içinde satır sonu olan
+        # alanlar (ör. adres) kaydı bölmez.
+        if csv_parser is not None:
+            lines = iter_csv_records(request.stream(), gzip=gzip, max_record_bytes=settings.STORE_IMPORT_MAX_LINE_BYTES)
+        else:
+            lines = iter_ndjson_lines(request.stream(), gzip=gzip, max_line_bytes=settings.STORE_IMPORT_MAX_LINE_BYTES)
+        async for line_no, line in lines:
+            if line is None:
+                result.rejected += 1
+                add_error(line_no, "Line too long")
+                continue
+            if csv_header == []:
+                try:
+                    csv_header = [column.strip() for column in csv_parser.parse(line)]
+                except csv.Error as e:
+                    raise HTTPException(status_code=400, detail=f"Invalid CSV header: {e}")
+                continue
+            try:
+                store = _parse_import_line(line, csv_header, csv_parser)
+            except ValidationError as e:
+                result.rejected += 1
+                add_error(line_no, _validation_message(e))
+                continue
+            except (ValueError, csv.Error) as e:
+                result.rejected += 1
+                add_error(line_no, f"Invalid line: {e}")
+                continue
+            if own_country is not None and place_key(store.country) != own_country:
+                result.rejected += 1
+                add_error(line_no, "Not authorized to add stores in this country")
+                continue
+
+            batch.append((line_no, store))
+            if len(batch) >= settings.STORE_IMPORT_BATCH_SIZE:
+                await flush()
+    except zlib.error:
+        await flush()
+        raise HTTPException(status_code=400, detail={"message": "Invalid gzip body", "created": result.created})
+    except UnicodeDecodeError:
+        await flush()
+        raise HTTPException(status_code=400, detail={"message": "CSV body is not valid UTF-8", "created": result.created})
+
+    await flush()
+    return result
+
+
+# --- Akışla dışa aktarma ---
+@router.get("/export")
+async def export_stores(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    current_user: Principal = Depends(get_current_user_async),
+):
+    """
+    Mağazaları cihazlarıyla birlikte NDJSON veya CSV olarak akışla döndürür. Tablo id
+    sırasıyla STORE_EXPORT_PAGE_SIZE'lık sayfalar halinde (keyset) okunur; çıktı /bulk
+    ile tekrar içe aktarılabilir. Token'lar dahil edilmez. Rol kapsamı listeleme ile aynıdır.
+    """
+    country = None
+    if current_user.role in [models.UserRole.Country_Chief, models.UserRole.Engineer, models.UserRole.Analyst]:
+        if not current_user.country:
+            raise HTTPException(status_code=403, detail="Not authorized to export stores.")
+        country = current_user.country
+    elif current_user.role != models.UserRole.Admin:
+        raise HTTPException(status_code=403, detail="Not authorized to export stores.")
+
+    def to_csv(lines: List[store_schemas.StoreExportLine]) -> str:
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        for line in lines:
+            data = line.model_dump(mode="json")
+            data["devices"] = json.dumps(data["devices"], separators=(",", ":"))
+            writer.writerow([data["id"], *(data[column] for column in store_schemas.STORE_CSV_COLUMNS)])
+        return out.getvalue()
+
+    async def body():
+        # Oturum yanıt akışı boyunca açık kalmalı; bu yüzden dependency yerine burada açılır.
+        async with AsyncSessionLocal() as db:
+            if format == "csv":
+                yield ",".join(["id", *store_schemas.STORE_CSV_COLUMNS]) + "\n"
+            async for page in async_store_crud.iter_store_export_pages(db, settings.STORE_EXPORT_PAGE_SIZE, country):
+                if format == "csv":
+                    yield to_csv(page)
+                else:
+                    yield "".join(line.model_dump_json() + "\n" for line in page)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        body(), media_type=media_type, headers={"Content-Disposition": f'attachment; filename="stores.{format}"'}
+    )
 
 
 @router.get("/{store_id}", response_model=store_schemas.StoreResponse)
 def read_store(
     store_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """ID'ye göre tek bir mağazayı getirir ve yetki kontrolü yapar."""
     db_store = store_crud.get_store(db, store_id=store_id)
@@ -78,9 +350,9 @@ def read_store(
         raise HTTPException(status_code=403, detail="Not authorized to view this store")
     return db_store
 
-@router.put("/{store_id}", response_model=store_schemas.StoreResponse)
+@router.put("/{store_id}", response_model=store_schemas.StoreUpdateResponse)
 def update_store_details(
-    store_id: int, store_in: store_schemas.StoreUpdate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)
+    store_id: int, store_in: store_schemas.StoreUpdate, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)
 ):
     """Bir mağazanın detaylarını günceller."""
     db_store = store_crud.get_store(db, store_id=store_id)
@@ -97,12 +369,15 @@ def update_store_details(
     if not can_update:
         raise HTTPException(status_code=403, detail="Not authorized to update this store.")
         
-    return store_crud.update_store(db, db_store=db_store, store_in=store_in)
+    db_store, device_changes = store_crud.update_store(db, db_store=db_store, store_in=store_in)
+    response = store_schemas.StoreUpdateResponse.model_validate(db_store)
+    response.device_changes = device_changes
+    return response
 
 
 @router.delete("/{store_id}", response_model=store_schemas.StoreResponse)
 def delete_store_by_id(
-    store_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)
+    store_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)
 ):
     """Bir mağazayı siler."""
     db_store = store_crud.get_store(db, store_id=store_id)
@@ -124,7 +399,7 @@ def delete_store_by_id(
 def generate_new_server_token(
     store_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Mağaza için yeni bir 2. Katman Sunucu Token'ı üretir."""
     if current_user.role != models.UserRole.Admin:
@@ -141,7 +416,7 @@ def generate_new_server_token(
 def generate_new_esp32_token(
     store_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Mağazadaki ESP32'ler için yeni bir ortak token üretir."""
     if current_user.role != models.UserRole.Admin:
@@ -161,6 +436,8 @@ def delete_draft_store(store_id: int, db: Session = Depends(get_db)):
     """
     Kullanıcı kurulumu tamamlamadan sayfadan ayrılırsa,
     yarım kalan taslak mağaza kaydını siler.
+    Not: create_store artık tek transaction'da çalıştığı için yarım mağaza oluşmaz;
+    bu uç nokta mevcut arayüzle uyumluluk için duruyor.
     """
     # store_crud içinde bu ID'ye sahip mağazayı bulan ve silen bir fonksiyon olmalı.
     # Örnek: store_crud.delete_store_if_draft(db, store_id=store_id)
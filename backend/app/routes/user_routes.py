@@ -1,12 +1,14 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
 from sqlalchemy.orm import Session
 
 from app.database import models
 from app.database.connection import get_db
 from app.schemas import user_schemas
 from app.crud import user_crud
-from app.security.security import get_current_user
+from app.security.security import get_current_user, get_current_user_model
+from app.core.principal_cache import Principal
+from app.core.config import settings
 
 from app.database.models import UserRole 
 
@@ -20,7 +22,7 @@ router = APIRouter(
 def create_new_user(
     user: user_schemas.UserCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Yeni bir kullanıcı oluşturur ve rol bazlı güvenlik kontrolü yapar."""
     
@@ -54,7 +56,7 @@ def create_new_user(
 def read_users(
     user_type: str, 
     db: Session = Depends(get_db), 
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Kullanıcıları tipine göre listeler."""
     # CRUD fonksiyonuna artık mevcut kullanıcının ID'sini de gönderiyoruz.
@@ -63,7 +65,7 @@ def read_users(
 
 # --- DÜZELTME: /me endpoint'i, /{user_id}'den ÖNCE tanımlandı ---
 @router.get("/me", response_model=user_schemas.UserResponse)
-def read_users_me(current_user: models.User = Depends(get_current_user)):
+def read_users_me(current_user: models.User = Depends(get_current_user_model)):
     """
     Geçerli token'a sahip olan kullanıcının kendi bilgilerini döndürür.
     """
@@ -81,7 +83,7 @@ def read_users_me(current_user: models.User = Depends(get_current_user)):
 def read_user(
     user_id: int, 
     db: Session = Depends(get_db), 
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     ID'ye göre tek bir kullanıcıyı getirir.
@@ -96,7 +98,7 @@ def update_existing_user(
     user_id: int,
     user_in: user_schemas.UserUpdate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Bir kullanıcının bilgilerini günceller. Sadece Admin yapabilir.
@@ -118,17 +120,32 @@ def update_existing_user(
 def update_own_profile(
     user_in: user_schemas.ProfileUpdate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: models.User = Depends(get_current_user_model)
 ):
     """Giriş yapmış kullanıcının kendi profilini güncellemesini sağlar."""
     updated_user = user_crud.update_profile(db=db, db_user=current_user, user_in=user_in)
     return updated_user
 
+@router.put("/me/profile-picture", response_model=user_schemas.UserResponse)
+def upload_own_profile_picture(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user_model)
+):
+    """
+    Profil resmini base64 yerine doğrudan dosya olarak yükler (multipart/form-data).
+    Resim küçültülür ve içerik adresli depoya yazılır.
+    """
+    data = file.file.read(settings.PROFILE_PICTURE_MAX_BYTES + 1)
+    if len(data) > settings.PROFILE_PICTURE_MAX_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Profile picture is too large")
+    return user_crud.update_profile_picture(db=db, db_user=current_user, data=data)
+
 @router.put("/me/preferences", response_model=user_schemas.UserResponse)
 def update_current_user_preferences(
     preferences: user_schemas.UserPreferencesUpdate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: models.User = Depends(get_current_user_model)
 ):
     """Giriş yapmış kullanıcının kendi dil ve tema tercihlerini günceller."""
     # Bu rota, sizin zaten sahip olduğunuz doğru CRUD fonksiyonunu çağırır.
@@ -138,7 +155,7 @@ def update_current_user_preferences(
 def delete_existing_user(
     user_id: int, 
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Bir kullanıcıyı siler. Sadece Admin yapabilir.
@@ -1,32 +1,37 @@
 # app/routes/utility_routes.py
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from countryinfo import CountryInfo
-import geonamescache
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 
 from app.database import models
-from app.database.connection import get_db
+from app.core.geo_catalog import geo_catalog
 from app.security.security import get_current_user
+from app.core.principal_cache import Principal
+from app.utils.http_cache import etag_matches, make_etag, not_modified, set_cache_headers
 
 router = APIRouter(prefix="/api/utils", tags=["Utilities"])
-gc = geonamescache.GeonamesCache()
+
+# Katalog sadece kütüphane sürümüyle değişir; yanıtlar kullanıcıya özel olduğu için 'private'.
+CATALOG_CACHE_CONTROL = "private, max-age=86400"
+
 
 @router.get("/countries", response_model=List[str])
 def get_all_countries(
-    current_user: models.User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    q: Optional[str] = Query(None, description="Ülke adı öneki (autocomplete)"),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
-    Ülkeleri role göre listeler.
+    Ülkeleri role göre listeler. 'q' verilirse sadece bu önekle başlayan ülkeler döner.
     """
     if current_user.role == models.UserRole.Admin:
-        try:
-            all_countries_dict = CountryInfo().all()
-            country_names = sorted(list(all_countries_dict.keys()))
-            return country_names
-        except Exception:
-            return []
+        etag = make_etag(geo_catalog.get_version(), "countries", q, limit)
+        if etag_matches(request, etag):
+            return not_modified(etag, CATALOG_CACHE_CONTROL)
+        set_cache_headers(response, etag, CATALOG_CACHE_CONTROL)
+        return geo_catalog.get_countries(prefix=q, limit=limit)
     else:
         return [current_user.country] if current_user.country else []
 
@@ -34,39 +39,24 @@ def get_all_countries(
 @router.get("/cities", response_model=List[str])
 def get_cities_for_country(
     country: str,
-    current_user: models.User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    q: Optional[str] = Query(None, description="Şehir adı öneki (autocomplete), ör. 'War'"),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Belirli bir ülkenin 'benzersiz' şehir listesini döndürür.
+    Şehirler ülke koduna göre önceden gruplanmıştır; ülke bulunamazsa boş liste döner.
     """
-    if current_user.role != models.UserRole.Admin and current_user.country.lower() != country.lower():
+    if current_user.role != models.UserRole.Admin and (current_user.country or "").lower() != country.lower():
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You can only view cities in your own country."
         )
 
-    try:
-        # Ülke kodunu al (örn: 'Poland' -> 'PL')
-        country_code = CountryInfo(country.lower()).iso()["alpha2"]
-        
-        # Geonamescache'den tüm şehir verilerini çek
-        all_cities_data = gc.get_cities()
-        
-        # İlgili ülkeye ait tüm şehir isimlerini (tekrarlar dahil) bir listeye topla
-        filtered_cities_with_duplicates = [
-            city_data["name"]
-            for city_data in all_cities_data.values()
-            if city_data["countrycode"] == country_code
-        ]
-        
-        # --- DÜZELTME: Tekrarları temizleme ---
-        # 1. Listeyi bir 'set'e dönüştürerek tekrarları otomatik olarak kaldır.
-        # 2. Set'i tekrar bir 'list'eye çevir.
-        # 3. Sonucu alfabetik olarak sırala.
-        unique_cities = sorted(list(set(filtered_cities_with_duplicates)))
-        
-        return unique_cities
-
-    except Exception:
-        # Herhangi bir hata durumunda (ülke bulunamadı vb.), güvenli bir şekilde boş liste döndür.
-        return []
\ No newline at end of file
+    etag = make_etag(geo_catalog.get_version(), "cities", geo_catalog.country_code(country), q, limit)
+    if etag_matches(request, etag):
+        return not_modified(etag, CATALOG_CACHE_CONTROL)
+    set_cache_headers(response, etag, CATALOG_CACHE_CONTROL)
+    return geo_catalog.get_cities(country, prefix=q, limit=limit)
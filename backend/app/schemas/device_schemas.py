@@ -59,6 +59,7 @@ class DeviceResponse(BaseModel):
     product_price_font_size_after_discount: Optional[int] = 12
     product_barcode_font_size: Optional[int] = 12
     product_barcode_numbers_font_size: Optional[int] = 12
+    config_version: int = 0
 
     # --- HATA ÇÖZÜMÜ ---
     # `db_id` alanını isteğe bağlı (Optional) yapıyoruz.
@@ -73,4 +74,12 @@ class DeviceResponse(BaseModel):
         return self.device_local_id
 
     class Config:
-        from_attributes = True # SQLAlchemy modelinden Pydantic modeline otomatik dönüşüm sağlar
\ No newline at end of file
+        from_attributes = True # SQLAlchemy modelinden Pydantic modeline otomatik dönüşüm sağlar
+
+
+# Mağaza güncellemesinde cihaz senkronizasyonunun sonucu (device_local_id listeleri)
+class DeviceSyncResult(BaseModel):
+    added: List[int] = []
+    updated: List[int] = []
+    removed: List[int] = []
+    unchanged: int = 0
@@ -1,21 +1,71 @@
 # app/schemas/firmware_schemas.py
 
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
 from datetime import datetime
 
+from app.core.firmware_rollout import parse_rollout_countries
+
 class FirmwareBase(BaseModel):
     version: str
     target: str # "server" veya "esp32"
     release_notes: Optional[str] = None
 
-class FirmwareCreate(FirmwareBase):
+# Kademeli dağıtım ayarları (app/core/firmware_rollout.py)
+class FirmwareRollout(BaseModel):
+    rollout_percent: int = Field(100, ge=0, le=100)
+    # Boşsa tüm ülkeler
+    rollout_countries: Optional[List[str]] = None
+    # Boşsa sınırsız
+    max_concurrent_downloads: Optional[int] = Field(None, ge=1)
+
+class FirmwareRolloutUpdate(BaseModel):
+    rollout_percent: Optional[int] = Field(None, ge=0, le=100)
+    rollout_countries: Optional[List[str]] = None
+    max_concurrent_downloads: Optional[int] = Field(None, ge=1)
+
+    @field_validator("rollout_percent")
+    @classmethod
+    def reject_null_percent(cls, value):
+        # Gönderilmezse değişmez; açıkça null gönderilmesi NOT NULL sütuna yazılamaz.
+        if value is None:
+            raise ValueError("rollout_percent cannot be null")
+        return value
+
+class FirmwareCreate(FirmwareBase, FirmwareRollout):
     pass
 
 class FirmwareResponse(FirmwareBase):
     id: int
     file_url: str
+    # Dosyanın SHA-256 özeti ve boyutu; sunucu elindeki imajla aynıysa indirmeyi atlayabilir.
+    sha256: Optional[str] = None
+    size_bytes: Optional[int] = None
     created_at: datetime
+    rollout_percent: int = 100
+    rollout_countries: List[str] = []
+    max_concurrent_downloads: Optional[int] = None
+
+    @field_validator("rollout_countries", mode="before")
+    @classmethod
+    def split_rollout_countries(cls, value):
+        # Veritabanında virgülle ayrılmış anahtarlar olarak saklanır.
+        return parse_rollout_countries(value) if value is None or isinstance(value, str) else value
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# /latest yanıtında sunucunun indirmesi gereken en küçük paket.
+# encoding: "identity" (tam imaj), "gzip", "zstd" veya "bsdiff4" (base_version'dan fark).
+# Açılan/uygulanan sonuç FirmwareResponse.sha256 ile doğrulanmalıdır.
+class FirmwareArtifactResponse(BaseModel):
+    encoding: str
+    base_version: Optional[str] = None
+    sha256: str
+    size_bytes: int
+    file_url: str
+
+
+class LatestFirmwareResponse(FirmwareResponse):
+    # Sunucu zaten en son sürümdeyse (current_version) boş döner.
+    artifact: Optional[FirmwareArtifactResponse] = None
@@ -2,7 +2,7 @@
 
 from pydantic import BaseModel, Field, field_validator
 from datetime import datetime, timezone
-from typing import Optional
+from typing import List, Optional
 
 class LogBase(BaseModel):
     source: str = Field(..., description="Örn: 'server' veya 'ESP32-A1B2'")
@@ -36,4 +36,27 @@ class LogResponse(LogBase):
     timestamp: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# NDJSON akışındaki her satır; 'seq' kaldığı yerden devam etmek için kullanılır.
+class LogStreamLine(LogCreate):
+    seq: Optional[int] = Field(None, description="Mağaza bazında artan sıra numarası")
+
+class LogLineError(BaseModel):
+    line: int
+    seq: Optional[int] = None
+    error: str
+
+class LogStreamResult(BaseModel):
+    accepted: int = 0
+    # Daha önce yazılmış olduğu için eklenmeyen satırlar
+    deduplicated: int = 0
+    skipped: int = 0
+    rejected: int = 0
+    last_seq: Optional[int] = None
+    errors: List[LogLineError] = []
+    errors_truncated: bool = False
+
+class LogUploadCheckpointResponse(BaseModel):
+    store_id: int
+    last_seq: Optional[int] = None
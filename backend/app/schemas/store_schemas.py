@@ -1,12 +1,14 @@
 # app/schemas/store_schemas.py
 
-from pydantic import BaseModel, computed_field
+from pydantic import BaseModel, TypeAdapter, computed_field, model_validator
 from typing import Optional, List
 # HATA DÜZELTMESİ: timedelta buraya eklendi
 from datetime import datetime, timedelta, timezone 
-from .device_schemas import DeviceCreate, DeviceResponse
+from .device_schemas import DeviceCreate, DeviceResponse, DeviceSyncResult
 
 from .user_schemas import UserResponse
+from app.core.config import settings
+from app.core.heartbeat import effective_last_seen
 
 # StoreBase modelini oluştururken, mağaza ile ilgili temel alanları belirtiyoruz.
 class StoreBase(BaseModel):
@@ -38,6 +40,23 @@ class StoreUpdate(BaseModel):
     server_local_ip: Optional[str] = None
     devices: Optional[List[DeviceCreate]] = None
 
+def store_status(last_seen: Optional[datetime]) -> str:
+    """Son STORE_ONLINE_WINDOW_SECONDS içinde heartbeat gelmişse Online, aksi halde Offline."""
+    if last_seen:
+        try:
+            # last_seen'i timezone-aware yapmak için UTC timezone'u ekle
+            if last_seen.tzinfo is None:
+                # Eğer timezone bilgisi yoksa UTC olarak varsay
+                last_seen = last_seen.replace(tzinfo=timezone.utc)
+
+            # Şimdi iki timezone-aware datetime'ı karşılaştırabiliriz
+            if (datetime.now(timezone.utc) - last_seen) < timedelta(seconds=settings.STORE_ONLINE_WINDOW_SECONDS):
+                return "Online"
+        except Exception:
+            # Herhangi bir hata durumunda Offline döndür
+            return "Offline"
+    return "Offline"
+
 # StoreResponse modelini oluştururken ilişkisel verileri de içerecek şekilde genişletiyoruz.
 class StoreResponse(BaseModel):
     id: int
@@ -54,11 +73,18 @@ class StoreResponse(BaseModel):
     owner_name: Optional[str] = None
     owner_surname: Optional[str] = None
     working_hours: Optional[str] = None
+    config_version: int = 0
 
     
     installer: Optional[UserResponse] = None
     devices: List[DeviceResponse] = []
 
+    @model_validator(mode="after")
+    def apply_live_last_seen(self):
+        # Heartbeat'ler bellekte toplanıp periyodik yazıldığı için, flush'lar arasında
+        # da güncel kalması adına canlı değeri kullanıyoruz.
+        self.last_seen = effective_last_seen(self.id, self.last_seen)
+        return self
     
     @computed_field
     @property
@@ -75,22 +101,7 @@ class StoreResponse(BaseModel):
     @computed_field
     @property
     def status(self) -> str:
-        if self.last_seen:
-            try:
-                # last_seen'i timezone-aware yapmak için UTC timezone'u ekle
-                if self.last_seen.tzinfo is None:
-                    # Eğer timezone bilgisi yoksa UTC olarak varsay
-                    last_seen_aware = self.last_seen.replace(tzinfo=timezone.utc)
-                else:
-                    last_seen_aware = self.last_seen
-                
-                # Şimdi iki timezone-aware datetime'ı karşılaştırabiliriz
-                if (datetime.now(timezone.utc) - last_seen_aware) < timedelta(minutes=5):
-                    return "Online"
-            except Exception:
-                # Herhangi bir hata durumunda Offline döndür
-                return "Offline"
-        return "Offline"
+        return store_status(self.last_seen)
 
     @computed_field
     @property
@@ -99,4 +110,133 @@ class StoreResponse(BaseModel):
         return len(self.devices) if self.devices else 0
       
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+# --- Toplu içe / dışa aktarma (/api/stores/bulk, /api/stores/export) ---
+# CSV başlığı; 'devices' sütunu cihaz listesini JSON dizisi olarak taşır.
+STORE_CSV_COLUMNS = [
+    "name", "country", "city", "branch", "address", "ownerName", "ownerSurname",
+    "working_hours", "server_local_ip", "devices",
+]
+
+# Dışa aktarılan her satır; 'id' hariç alanlar /bulk'a aynen geri yüklenebilir.
+# Token'lar dışa aktarılmaz. Sahip ve çalışma saati sütunları veritabanında boş
+# olabilir (eski kayıtlar); akışın ortasında doğrulama hatası vermemek için opsiyoneldir.
+class StoreExportLine(StoreCreate):
+    id: int
+    ownerName: Optional[str] = None
+    ownerSurname: Optional[str] = None
+    working_hours: Optional[str] = None
+
+class StoreImportError(BaseModel):
+    line: int
+    error: str
+
+class StoreImportBatch(BaseModel):
+    first_line: int
+    last_line: int
+    created: int
+    failed: int
+
+class StoreImportResult(BaseModel):
+    created: int = 0
+    # Doğrulamadan geçemeyen satırlar
+    rejected: int = 0
+    # Doğrulanan ama veritabanına yazılamayan satırlar
+    failed: int = 0
+    created_ids: List[int] = []
+    batches: List[StoreImportBatch] = []
+    errors: List[StoreImportError] = []
+    errors_truncated: bool = False
+
+
+# PUT /api/stores/{store_id} yanıtı: güncel mağaza + hangi cihazların değiştiği.
+# Cihaz listesi gönderilmediyse device_changes boş (null) döner.
+class StoreUpdateResponse(StoreResponse):
+    device_changes: Optional[DeviceSyncResult] = None
+
+
+# Liste görünümü (GET /api/stores?view=summary) için hafif model. Cihazlar, kurulumcu
+# nesnesi ve token'lar yüklenmez; kurulumcu adı ve cihaz sayısı sorguda hesaplanır.
+# Alan adları StoreResponse ile aynıdır.
+class StoreSummaryResponse(BaseModel):
+    id: int
+    name: str
+    country: str
+    city: str
+    branch: Optional[str] = None
+    created_at: datetime
+    last_seen: Optional[datetime] = None
+    installerName: Optional[str] = None
+    installerSurname: Optional[str] = None
+    num_esp32_connected: int = 0
+
+    @model_validator(mode="after")
+    def apply_live_last_seen(self):
+        self.last_seen = effective_last_seen(self.id, self.last_seen)
+        return self
+
+    @computed_field
+    @property
+    def status(self) -> str:
+        return store_status(self.last_seen)
+
+    class Config:
+        from_attributes = True
+
+
+# GET /api/ops/config yanıtı (2. katman sunucu için). full=False ise 'devices' sadece
+# 'since' sürümünden sonra eklenen/değişen cihazları içerir; silinen cihazlar
+# 'device_ids' (mağazadaki güncel cihaz listesi) ile karşılaştırılarak bulunur.
+class StoreConfigResponse(BaseModel):
+    store_id: int
+    config_version: int
+    full: bool
+    working_hours: Optional[str] = None
+    server_local_ip: Optional[str] = None
+    device_ids: List[int] = []
+    devices: List[DeviceResponse] = []
+
+
+# GET /api/stores/status-summary yanıtı: filo durum indeksinden (app/core/fleet_status.py)
+# ülke ve şehir bazında Online/Offline mağaza sayıları.
+class CityStatusSummary(BaseModel):
+    city: str
+    online: int
+    offline: int
+
+class CountryStatusSummary(BaseModel):
+    country: str
+    online: int
+    offline: int
+    cities: List[CityStatusSummary] = []
+
+class StoreStatusSummary(BaseModel):
+    online: int = 0
+    offline: int = 0
+    countries: List[CountryStatusSummary] = []
+    as_of: datetime
+
+# GET /api/stores/status-events: bir mağazanın Online/Offline geçişi.
+class StoreStatusEvent(BaseModel):
+    seq: int
+    store_id: int
+    status: str
+    last_seen: Optional[datetime] = None
+    at: datetime
+
+    class Config:
+        from_attributes = True
+
+# Sıra numaraları worker sürecine özeldir. İstemci bir sonraki istekte 'epoch' ve
+# 'last_seq' değerlerini (epoch, after) olarak gönderir. reset=True ise imleç bu
+# worker'da geçersizdir (başka worker, yeniden başlatma veya kaçırılmış olaylar):
+# durum /status-summary ile yeniden okunur ve dönen epoch/last_seq ile devam edilir.
+class StoreStatusEventPage(BaseModel):
+    epoch: str
+    last_seq: int
+    reset: bool = False
+    events: List[StoreStatusEvent] = []
+
+store_summary_list = TypeAdapter(List[StoreSummaryResponse])
@@ -1,9 +1,10 @@
 # app/schemas/user_schemas.py
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, computed_field
 from typing import Optional
 from datetime import datetime
 from app.database.models import UserRole 
+from app.core.profile_pictures import profile_picture_thumbnail_url, profile_picture_url
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -16,7 +17,7 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: str
     assigned_store_id: Optional[int] = None # Market kullanıcısı için
-    profile_picture: Optional[str] = None # Profil resmi için Base64 data
+    profile_picture: Optional[str] = None # Profil resmi için Base64 data (depoya yazılır, DB'ye değil)
 
 class UserUpdate(BaseModel):
     email: Optional[EmailStr] = None
@@ -40,10 +41,27 @@ class UserResponse(UserBase):
     theme: Optional[str] = None
 
     # --- YENİ EKLENEN ALANLAR ---
-    profile_picture: Optional[str] = None
     assigned_store_id: Optional[int] = None
     assigned_store_name: Optional[str] = None
 
+    # Profil resmi yanıtta base64 olarak değil, URL olarak döner.
+    profile_picture_key: Optional[str] = Field(default=None, exclude=True)
+
+    @computed_field
+    @property
+    def profile_picture(self) -> Optional[str]:
+        return profile_picture_url(self.profile_picture_key)
+
+    @computed_field
+    @property
+    def profile_picture_thumbnail(self) -> Optional[str]:
+        return profile_picture_thumbnail_url(self.profile_picture_key)
+
+    @computed_field
+    @property
+    def profile_picture_etag(self) -> Optional[str]:
+        return f'"{self.profile_picture_key}"' if self.profile_picture_key else None
+
     class Config:
         from_attributes = True
 
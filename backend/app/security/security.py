@@ -1,22 +1,26 @@
 # backend/app/security/security.py
 
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.password_hasher import password_hasher
+from app.core.principal_cache import Principal, principal_cache
+from app.database.async_connection import get_async_db
 from app.database.connection import get_db
 from app.database import models
 from app.schemas import token_schemas
-from app.crud import user_crud
+from app.crud import async_user_crud, user_crud
 
-# Şifre hash'leme için Argon2 kullanıyoruz.
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Şifre hash'leme için Argon2 kullanıyoruz. Hesaplama password_hasher'ın süreç havuzunda yapılır.
 
 # Güvenlik şeması
 bearer_scheme = HTTPBearer()
@@ -25,11 +29,19 @@ bearer_scheme = HTTPBearer()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Girilen şifre ile hash'lenmiş şifreyi karşılaştırır."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify_and_update(plain_password, hashed_password)[0]
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """Şifreyi doğrular; hash eski Argon2 parametreleriyle üretildiyse yeni hash'i de döndürür."""
+    return password_hasher.verify_and_update(plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """verify_and_update_password'ün asenkron karşılığı; bekleme sırasında thread tutmaz."""
+    return await password_hasher.verify_and_update_async(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Verilen şifreyi hash'ler."""
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """JWT access token üretir."""
@@ -40,32 +52,82 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
+    # Her token'a benzersiz bir kimlik (jti); principal önbelleğinin anahtarı olarak kullanılır.
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
     return encoded_jwt
 
-def get_current_user(
-    db: Session = Depends(get_db), 
-    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)
-) -> models.User:
-    """HTTP 'Authorization' başlığından Bearer token'ı doğrular ve mevcut kullanıcıyı döndürür."""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
-    token = credentials.credentials
-    
+
+def _principal_cache_key(token: str) -> tuple[str, str]:
+    """Token'ı doğrular ve (e-posta, önbellek anahtarı) döndürür."""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
         email: str = payload.get("sub")
         if email is None:
-            raise credentials_exception
+            raise _credentials_exception()
         token_data = token_schemas.TokenData(email=email)
     except JWTError:
-        raise credentials_exception
-    
-    user = user_crud.get_user_by_email(db, email=token_data.email)
+        raise _credentials_exception()
+
+    # jti taşımayan eski token'lar için imza kısmı token kimliği olarak kullanılır.
+    token_id = payload.get("jti") or token.rsplit(".", 1)[-1]
+    return token_data.email, f"{token_data.email}:{token_id}"
+
+def get_current_user(
+    db: Session = Depends(get_db), 
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)
+) -> Principal:
+    """
+    HTTP 'Authorization' başlığından Bearer token'ı doğrular ve mevcut kullanıcının
+    hafif projeksiyonunu (Principal) döndürür. Kullanıcı satırı önbellekte yoksa
+    veritabanından sadece gerekli sütunlar okunur. ORM nesnesine ihtiyaç duyan
+    rotalar get_current_user_model kullanmalıdır.
+    """
+    email, cache_key = _principal_cache_key(credentials.credentials)
+    loaded = False
+
+    def load_principal() -> Optional[Principal]:
+        nonlocal loaded
+        loaded = True
+        return user_crud.get_principal_by_email(db, email=email)
+
+    user = principal_cache.resolve(cache_key, load_principal)
+    metrics.inc("principal_cache_misses_total" if loaded else "principal_cache_hits_total")
+    if user is None:
+        raise _credentials_exception()
+    return user
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db),
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)
+) -> Principal:
+    """get_current_user'ın asenkron rotalar için karşılığı; threadpool kullanmaz."""
+    email, cache_key = _principal_cache_key(credentials.credentials)
+    loaded = False
+
+    async def load_principal() -> Optional[Principal]:
+        nonlocal loaded
+        loaded = True
+        return await async_user_crud.get_principal_by_email(db, email=email)
+
+    user = await principal_cache.resolve_async(cache_key, load_principal)
+    metrics.inc("principal_cache_misses_total" if loaded else "principal_cache_hits_total")
+    if user is None:
+        raise _credentials_exception()
+    return user
+
+def get_current_user_model(
+    db: Session = Depends(get_db),
+    principal: Principal = Depends(get_current_user)
+) -> models.User:
+    """Mevcut kullanıcının tam ORM nesnesini yükler (profil, tercihler gibi rotalar için)."""
+    user = user_crud.get_user(db, user_id=principal.id)
     if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+        raise _credentials_exception()
+    return user
@@ -0,0 +1,63 @@
+# app/utils/http_cache.py
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+# HTTP önbellek doğrulama (ETag / If-None-Match) yardımcıları.
+# İstemcinin elindeki sürüm hâlâ güncelse gövde gönderilmeden 304 döndürülür.
+
+
+def make_etag(*parts: object) -> str:
+    """Verilen parçalardan kısa, güçlü bir ETag üretir (tırnaklarıyla birlikte)."""
+    digest = hashlib.blake2b("\x1f".join(str(part) for part in parts).encode("utf-8"), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Zayıf karşılaştırma: W/ öneki göz ardı edilir.
+    candidates = {value.strip().removeprefix("W/") for value in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def http_date(value: datetime) -> str:
+    """Last-Modified için HTTP tarihi. Saat dilimi olmayan değerler UTC kabul edilir (SQLite)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def not_modified_since(request: Request, last_modified: datetime) -> bool:
+    """If-None-Match yoksa If-Modified-Since'i değerlendirir (HTTP tarihleri saniye hassasiyetindedir)."""
+    header = request.headers.get("if-modified-since")
+    if not header or "if-none-match" in request.headers:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: Optional[str] = None) -> None:
+    response.headers["ETag"] = etag
+    if cache_control:
+        response.headers["Cache-Control"] = cache_control
+
+
+def not_modified(etag: str, cache_control: Optional[str] = None) -> Response:
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_cache_headers(response, etag, cache_control)
+    return response
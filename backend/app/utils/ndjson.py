@@ -0,0 +1,164 @@
+# app/utils/ndjson.py
+
+import codecs
+import csv
+import zlib
+from collections import deque
+from typing import AsyncIterator, List, Optional, Tuple
+
+# NDJSON (satır başına bir JSON) ve CSV istek gövdelerini, tamamını belleğe almadan
+# satır satır (CSV'de kayıt kayıt) okumak için yardımcılar. Gövde gzip ile
+# sıkıştırılmışsa akış sırasında açılır; açılan veri parça parça işlendiği için
+# sıkıştırma bombası bellek patlamasına yol açmaz.
+
+DECOMPRESS_CHUNK = 1024 * 1024
+
+
+async def _decompressed(stream: AsyncIterator[bytes], gzip: bool) -> AsyncIterator[bytes]:
+    if not gzip:
+        async for chunk in stream:
+            yield chunk
+        return
+
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    async for chunk in stream:
+        data = chunk
+        while data:
+            out = decoder.decompress(data, DECOMPRESS_CHUNK)
+            if out:
+                yield out
+            data = decoder.unconsumed_tail
+    tail = decoder.flush()
+    if tail:
+        yield tail
+
+
+async def iter_ndjson_lines(
+    stream: AsyncIterator[bytes],
+    gzip: bool = False,
+    max_line_bytes: int = 65536,
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    (satır numarası, satır) ikilileri üretir. Satır numaraları 1'den başlar ve boş
+    satırlar atlanır. 'max_line_bytes' değerini aşan satırlar için satır yerine
+    None üretilir; çağıran taraf bunu hatalı satır olarak raporlamalıdır.
+    Gzip verisi bozuksa zlib.error fırlatılır.
+    """
+    buffer = b""
+    line_no = 0
+    oversized = False
+
+    async for data in _decompressed(stream, gzip):
+        buffer += data
+        while True:
+            newline = buffer.find(b"\n")
+            if newline < 0:
+                break
+            line, buffer = buffer[:newline], buffer[newline + 1:]
+            line_no += 1
+            if oversized:
+                oversized = False
+                yield line_no, None
+            elif line.strip():
+                yield line_no, (None if len(line) > max_line_bytes else line)
+
+        if len(buffer) > max_line_bytes:
+            # Satırın geri kalanını satır sonuna kadar atla; bellekte biriktirme.
+            oversized = True
+            buffer = b""
+
+    if oversized:
+        yield line_no + 1, None
+    elif buffer.strip():
+        yield line_no + 1, (None if len(buffer) > max_line_bytes else buffer)
+
+
+async def iter_csv_records(
+    stream: AsyncIterator[bytes],
+    gzip: bool = False,
+    max_record_bytes: int = 65536,
+) -> AsyncIterator[Tuple[int, Optional[str]]]:
+    """
+    (kaydın başladığı satır numarası, kayıt metni) ikilileri üretir. Gövde artımlı olarak
+    UTF-8 (BOM'lu veya BOM'suz) çözülür; tırnak içindeki satır sonları kaydı bölmez, yani
+    bir kayıt birden çok fiziksel satır olabilir. Boş kayıtlar atlanır; 'max_record_bytes'
+    değerini aşan kayıtlar için metin yerine None üretilir. Kayıtlar CsvRecordParser ile
+    ayrıştırılmalıdır. Gzip verisi bozuksa zlib.error, UTF-8 geçersizse UnicodeDecodeError fırlatılır.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    record = ""
+    quotes = 0
+    record_start = 0
+    line_no = 0
+    skip_line = False
+
+    def take_line(line: str) -> Optional[Tuple[int, Optional[str]]]:
+        nonlocal record, quotes, record_start, skip_line
+        if skip_line:
+            skip_line = False
+            return None
+        if not record:
+            record_start = line_no
+        record += line
+        quotes += line.count('"')
+        if quotes % 2:
+            # Tırnak açık: kayıt bir sonraki satırda devam ediyor.
+            return None
+        complete, record, quotes = record, "", 0
+        if not complete.strip():
+            return None
+        return record_start, (None if len(complete.encode("utf-8")) > max_record_bytes else complete)
+
+    async for data in _decompressed(stream, gzip):
+        buffer += decoder.decode(data)
+        while True:
+            newline = buffer.find("\n")
+            if newline < 0:
+                break
+            line, buffer = buffer[:newline + 1], buffer[newline + 1:]
+            line_no += 1
+            item = take_line(line)
+            if item is not None:
+                yield item
+
+        if skip_line:
+            buffer = ""
+        elif len(record) + len(buffer) > max_record_bytes:
+            # Kaydın geri kalanını satır sonuna kadar atla; bellekte biriktirme.
+            yield (record_start if record else line_no + 1), None
+            record, quotes, buffer = "", 0, ""
+            skip_line = True
+
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        line_no += 1
+        item = take_line(buffer)
+        if item is not None:
+            yield item
+    if record.strip():
+        # Gövde kapanmamış bir tırnakla bitti; ayrıştırıcı bunu hatalı kayıt olarak bildirir.
+        yield record_start, record
+
+
+class CsvRecordParser:
+    """iter_csv_records kayıtlarını tek bir csv.reader ile sırayla ayrıştırır."""
+
+    def __init__(self):
+        self._pending: deque = deque()
+        self._reader = csv.reader(self, strict=True)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self._pending:
+            raise StopIteration
+        return self._pending.popleft()
+
+    def parse(self, record: str) -> List[str]:
+        self._pending.append(record)
+        try:
+            return next(self._reader)
+        finally:
+            self._pending.clear()
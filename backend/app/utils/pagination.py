@@ -0,0 +1,26 @@
+# app/utils/pagination.py
+
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+# Keyset (cursor) sayfalama yardımcıları
+# İmleç, sayfadaki son kaydın (timestamp, id) ikilisini taşır. İstemci için opak
+# bir değerdir; bir sonraki sayfa bu değerden sonrası olarak sorgulanır, böylece
+# derin sayfalar da ilk sayfa kadar ucuzdur.
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    payload = json.dumps({"ts": timestamp.isoformat(), "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """İmleci çözer. Geçersizse ValueError fırlatır."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["ts"]), int(payload["id"])
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
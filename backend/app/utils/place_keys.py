@@ -0,0 +1,23 @@
+# app/utils/place_keys.py
+
+import unicodedata
+
+# Ülke / şehir adlarının karşılaştırma anahtarları
+# Adlar küçük harfe çevrilip aksanları kaldırılarak (katlanarak) karşılaştırılır;
+# böylece 'Łódź', 'lodz' ve 'LODZ' aynı anahtara düşer. Bu modül bağımlılıksızdır;
+# hem modeller hem de çekirdek servisler buradan import eder.
+
+
+# Unicode ayrıştırmasıyla (NFKD) temel harfe inmeyen harfler
+_EXTRA_FOLDS = str.maketrans({"ł": "l", "ø": "o", "đ": "d", "ı": "i", "æ": "ae", "œ": "oe", "þ": "th"})
+
+
+def fold(text: str) -> str:
+    """Arama için metni küçük harfe çevirir ve aksanları kaldırır ('Łódź' -> 'lodz')."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold().translate(_EXTRA_FOLDS)
+
+
+def place_key(name: str) -> str:
+    """Ülke/şehir adının eşitlikle (indeksli) aranabilen hali: katlanmış, boşlukları sadeleştirilmiş."""
+    return " ".join(fold(name).split())
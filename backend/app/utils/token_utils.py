@@ -15,4 +15,18 @@ def generate_server_token():
 
 def generate_esp32_token():
     """ESP32 için token üretir."""
-    return generate_secure_token("esp")
\ No newline at end of file
+    return generate_secure_token("esp")
+
+def generate_secure_tokens(prefix: str, count: int, length: int = 32) -> list:
+    """
+    generate_secure_token ile aynı biçimde 'count' adet token üretir. Rastgele baytlar
+    tek seferde alınır; alfabeye eşit dağılması için 248 ve üstü baytlar atılır.
+    """
+    alphabet = string.ascii_letters + string.digits
+    limit = 256 - 256 % len(alphabet)
+    needed = count * length
+    chars = []
+    while len(chars) < needed:
+        chars.extend(alphabet[b % len(alphabet)] for b in secrets.token_bytes(needed - len(chars) + 16) if b < limit)
+    return [f"{prefix}_{''.join(chars[i * length:(i + 1) * length])}" for i in range(count)]
+
@@ -0,0 +1,171 @@
+# benchmarks/async_load_benchmark.py
+# /api/ops uç noktalarını senkron (threadpool + Session) ve asenkron (AsyncSession)
+# yığınla yük altında karşılaştırır. Her iki taraf aynı CRUD sorgularını çalıştırır;
+# fark sadece isteğin veritabanını beklerken bir thread tutup tutmamasıdır.
+#
+# Anlamlı sonuç için gerçek bir MySQL ile çalıştırın (DATABASE_URL). Yerel SQLite'ta
+# ağ gecikmesi olmadığından --db-latency-ms ile her sorguya yapay gecikme eklenebilir;
+# gecikme sürücünün kendi thread'inde uygulanır, event loop'u bloklamaz.
+#
+# SQLite yazmaları seri hale getirdiği ve varsayılan havuzu 5+10 bağlantı olduğu için
+# yüksek eşzamanlılıkta (100+) senkron taraf havuz zaman aşımına düşebilir.
+#
+# Kullanım (backend/ dizininden):
+#   python -m benchmarks.async_load_benchmark --requests 1000 --concurrency 50 --db-latency-ms 5
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import List
+
+from benchmarks import bench_env  # noqa: F401  (ayarları app'ten önce yükler)
+
+import anyio
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.api.dependency import get_current_user_async, get_store_from_server_token
+from app.core.principal_cache import Principal
+from app.core.store_token_cache import StoreIdentity
+from app.crud import log_crud
+from app.database import models
+from app.database.async_connection import async_engine
+from app.database.connection import engine, get_db
+from app.routes import operational_routes
+from app.schemas import log_schemas
+
+SERVER_TOKEN = "srv_async_bench"
+LOGS_PER_BULK = 20
+
+
+def build_sync_app() -> FastAPI:
+    """Değişiklikten önceki yapı: senkron 'def' uç noktalar, threadpool'da Session ile."""
+    app = FastAPI()
+
+    @app.post("/api/ops/logs/bulk", status_code=201)
+    def bulk(
+        logs: List[log_schemas.LogCreate],
+        store: StoreIdentity = Depends(get_store_from_server_token),
+        db: Session = Depends(get_db),
+    ):
+        return log_crud.bulk_create_logs(db=db, store_id=store.id, logs=logs)
+
+    @app.get("/api/ops/logs/{store_id}", response_model=List[log_schemas.LogResponse])
+    def list_logs(store_id: int, db: Session = Depends(get_db)):
+        return log_crud.get_logs_by_store(db=db, store_id=store_id, limit=100)
+
+    return app
+
+
+def build_async_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(operational_routes.router)
+    # Ölçüm sadece veritabanı yolunu kapsasın; JWT doğrulaması devre dışı.
+    app.dependency_overrides[get_current_user_async] = lambda: Principal(
+        id=0, email="bench", role=models.UserRole.Admin, country=None, is_active=True, assigned_store_id=None
+    )
+    return app
+
+
+def add_db_latency(latency_ms: float):
+    """Her sorgudan önce sürücü üzerinden gecikme ekler (sadece SQLite için)."""
+    seconds = latency_ms / 1000
+
+    def register_sleep(dbapi_connection, _):
+        dbapi_connection.create_function("bench_sleep", 0, lambda: time.sleep(seconds) or 0)
+
+    def sleep_before_query(conn, cursor, statement, parameters, context, executemany):
+        cursor.execute("SELECT bench_sleep()")
+
+    for sync_engine in (engine, async_engine.sync_engine):
+        event.listen(sync_engine, "connect", register_sleep)
+        event.listen(sync_engine, "before_cursor_execute", sleep_before_query)
+
+
+def seed():
+    tables = [models.Store.__table__, models.Log.__table__, models.LogUploadCheckpoint.__table__]
+    models.Base.metadata.drop_all(bind=engine, tables=tables)
+    models.Base.metadata.create_all(bind=engine, tables=tables)
+    with engine.begin() as conn:
+        conn.execute(models.Store.__table__.insert(), [
+            {"id": 1, "name": "Bench", "country": "Poland", "city": "Warsaw", "server_token": SERVER_TOKEN}
+        ])
+    engine.dispose()
+
+
+async def run_load(app: FastAPI, scenario: str, total: int, concurrency: int, tag: str) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    headers = {"X-Server-Token": SERVER_TOKEN}
+    latencies = []
+    counter = iter(range(total))
+    errors = 0
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                start = time.perf_counter()
+                if scenario == "bulk":
+                    now = datetime.now(timezone.utc).isoformat()
+                    body = [
+                        {"source": "bench", "level": "INFO", "message": f"{tag} {i} {j}", "timestamp": now}
+                        for j in range(LOGS_PER_BULK)
+                    ]
+                    response = await client.post("/api/ops/logs/bulk", json=body, headers=headers)
+                else:
+                    response = await client.get("/api/ops/logs/1", headers=headers)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+async def main_async(args):
+    # Sunucu tarafındaki threadpool sınırı (FastAPI/Starlette varsayılanı 40).
+    anyio.to_thread.current_default_thread_limiter().total_tokens = args.threads
+
+    apps = {"sync": build_sync_app(), "async": build_async_app()}
+    print(f"{'scenario':<10}{'stack':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+    for scenario in ("bulk", "list"):
+        for name, app in apps.items():
+            # Isınma: bağlantı havuzu ve sorgu derleme maliyetini ölçümden çıkar.
+            await run_load(app, scenario, min(50, args.requests), min(10, args.concurrency), f"warmup-{name}")
+            result = await run_load(app, scenario, args.requests, args.concurrency, name)
+            print(f"{scenario:<10}{name:<8}{result['rps']:>10.1f}{result['p50']:>10.1f}"
+                  f"{result['p95']:>10.1f}{result['errors']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs async /api/ops load test")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=40, help="Sunucu threadpool boyutu")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="SQLite için yapay sorgu gecikmesi")
+    args = parser.parse_args()
+
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    seed()
+    if args.db_latency_ms:
+        if engine.dialect.name != "sqlite":
+            parser.error("--db-latency-ms is only supported with SQLite")
+        add_db_latency(args.db_latency_ms)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
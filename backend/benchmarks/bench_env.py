@@ -0,0 +1,14 @@
+# benchmarks/bench_env.py
+# Benchmark script'leri, app modüllerini import etmeden önce bu modülü import eder.
+# .env dosyası olmayan bir makinede de çalışabilmeleri için zorunlu ayarlara
+# yerel bir SQLite veritabanını gösteren varsayılan değerler verilir.
+# Gerçek bir MySQL ile ölçmek için DATABASE_URL ortam değişkenini ayarlayın.
+
+import os
+
+BENCH_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark.db")
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{BENCH_DB_PATH}")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+os.environ.setdefault("ENCRYPTION_KEY", "MDAwMDAwMDAwMDAwMDAwMDAwMDAwMDAwMDAwMDAwMDA=")
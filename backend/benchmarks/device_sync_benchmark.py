@@ -0,0 +1,124 @@
+# benchmarks/device_sync_benchmark.py
+# PUT /api/stores/{id} cihaz senkronizasyonunu ölçer: eski yöntem (her cihazın
+# alanlarını ORM üzerinden tek tek atama, silinenleri tek tek db.delete, commit
+# sonrası get_store ile yeniden okuma) ile store_crud.sync_store_devices'taki
+# küme farkı + toplu Core UPDATE/INSERT/DELETE karşılaştırılır. Süre ve çalışan
+# SQL ifadesi sayısı raporlanır.
+#
+# Kullanım (backend/ dizininden):
+#   python -m benchmarks.device_sync_benchmark --devices 500 --rounds 20
+
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks import bench_env  # noqa: F401  (ayarları app'ten önce yükler)
+
+from sqlalchemy import event
+
+from app.crud import store_crud
+from app.database import models
+from app.database.connection import SessionLocal, engine
+from app.schemas import device_schemas, store_schemas
+
+STORE_ID = 1
+
+
+def seed(devices: int):
+    tables = [models.User.__table__, models.Store.__table__, models.Device.__table__]
+    models.Base.metadata.drop_all(bind=engine, tables=tables)
+    models.Base.metadata.create_all(bind=engine, tables=tables)
+    with engine.begin() as conn:
+        conn.execute(models.Store.__table__.insert(), [
+            {"id": STORE_ID, "name": "Bench", "country": "Poland", "city": "Warsaw", "country_key": "poland", "city_key": "warsaw"}
+        ])
+        conn.execute(models.Device.__table__.insert(), [
+            {"store_id": STORE_ID, "device_local_id": i, "screen_size": "7", "wifi_ssid": f"ssid{i}", "software_version": "1.0.0"}
+            for i in range(1, devices + 1)
+        ])
+
+
+def incoming_devices(devices: int, change_ratio: float) -> list:
+    """Mevcut cihaz listesini üretir; change_ratio oranında cihazı değiştirir, siler veya ekler."""
+    payload = []
+    for i in range(1, devices + 1):
+        roll = random.random()
+        if roll < change_ratio / 4:
+            continue  # silinen cihaz
+        data = {"id": i, "screen_size": "7", "wifi_ssid": f"ssid{i}", "software_version": "1.0.0"}
+        if roll < change_ratio:
+            data["wifi_ssid"] = f"ssid{i}-{random.randint(0, 1_000_000)}"
+        payload.append(device_schemas.DeviceCreate(**data))
+    extra = int(devices * change_ratio / 4)
+    payload.extend(device_schemas.DeviceCreate(id=devices + i, screen_size="10") for i in range(1, extra + 1))
+    return payload
+
+
+def legacy_update(db, devices: list):
+    """Değişiklikten önceki update_store cihaz döngüsü."""
+    db_store = store_crud.get_store(db, STORE_ID)
+    incoming_ids = {device.id for device in devices}
+    existing = {device.device_local_id: device for device in db_store.devices}
+    for device_id, device in existing.items():
+        if device_id not in incoming_ids:
+            db.delete(device)
+    for data in devices:
+        if data.id in existing:
+            device = existing[data.id]
+            for field in store_crud.DEVICE_SYNC_FIELDS:
+                setattr(device, field, getattr(data, field))
+        else:
+            db.add(models.Device(store_id=STORE_ID, device_local_id=data.id, **store_crud.device_values(data)))
+    db.commit()
+    db.refresh(db_store)
+    return store_schemas.StoreResponse.model_validate(store_crud.get_store(db, STORE_ID))
+
+
+def diff_update(db, devices: list):
+    db_store = store_crud.get_store(db, STORE_ID)
+    db_store, _ = store_crud.update_store(db, db_store, store_schemas.StoreUpdate(devices=devices))
+    return store_schemas.StoreUpdateResponse.model_validate(db_store)
+
+
+def run(name, func, devices: int, rounds: int, change_ratio: float):
+    statements = 0
+
+    def count(*_):
+        nonlocal statements
+        statements += 1
+
+    timings = []
+    for _ in range(rounds):
+        seed(devices)
+        payload = incoming_devices(devices, change_ratio)
+        statements = 0
+        event.listen(engine, "before_cursor_execute", count)
+        db = SessionLocal()
+        start = time.perf_counter()
+        try:
+            func(db, payload)
+        finally:
+            timings.append((time.perf_counter() - start) * 1000)
+            db.close()
+            event.remove(engine, "before_cursor_execute", count)
+    print(f"{change_ratio:>8.0%}{name:>10}{statistics.median(timings):>10.1f}{max(timings):>10.1f}{statements:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Store device sync benchmark")
+    parser.add_argument("--devices", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}, {args.devices} devices per store")
+    print(f"{'changed':>8}{'method':>10}{'p50 ms':>10}{'max ms':>10}{'statements':>12}")
+    for change_ratio in (0.0, 0.1, 1.0):
+        random.seed(42)
+        run("legacy", legacy_update, args.devices, args.rounds, change_ratio)
+        random.seed(42)
+        run("diff", diff_update, args.devices, args.rounds, change_ratio)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/firmware_artifact_benchmark.py
+# Firmware paketlerini karşılaştırır: tam imaj, gzip, zstd ve önceki sürümden
+# bsdiff4 farkı. Her biri için indirilen bayt, verilen bağlantı hızında aktarım
+# süresi, yüklemede bir kez harcanan üretim CPU'su ve indirme başına sunucu CPU'su
+# raporlanır. Karşılaştırma için, indirme sırasında anlık gzip sıkıştırma
+# (ör. GZip middleware) yapan bir sunucunun indirme başına CPU'su da ölçülür.
+# İmajlar sentetiktir: tekrar eden bloklardan oluşan bir v1 ve bunun --changes
+# noktasında değiştirilmiş hali olan v2. Dosyalar geçici bir klasöre yazılır.
+#
+# Kullanım (backend/ dizininden):
+#   python -m benchmarks.firmware_artifact_benchmark --size-mb 4 --changes 50 --uplink-mbit 2
+
+import argparse
+import gzip
+import os
+import random
+import tempfile
+import time
+
+from benchmarks import bench_env  # noqa: F401  (ayarları app'ten önce yükler)
+
+import bsdiff4
+import zstandard
+
+from app.core import firmware_artifacts
+from app.core.config import settings
+from app.core.firmware_store import firmware_store
+
+
+def synthetic_images(size: int, changes: int):
+    rnd = random.Random(42)
+    blocks = [rnd.randbytes(rnd.randrange(16, 256)) for _ in range(512)]
+    parts, total = [], 0
+    while total < size:
+        block = rnd.choice(blocks) if rnd.random() < 0.7 else rnd.randbytes(64)
+        parts.append(block)
+        total += len(block)
+    v1 = b"".join(parts)[:size]
+    v2 = bytearray(v1)
+    for _ in range(changes):
+        offset = rnd.randrange(len(v2) - 64)
+        v2[offset:offset + rnd.randrange(1, 64)] = rnd.randbytes(rnd.randrange(1, 64))
+    return v1, bytes(v2)
+
+
+def cpu_ms(func, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        func()
+        elapsed = (time.process_time() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def serve_file(path):
+    """Önceden üretilmiş dosyayı sunmanın maliyeti: dosyayı parça parça okumak."""
+    with open(path, "rb") as source:
+        while source.read(64 * 1024):
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Firmware artifact size and CPU benchmark")
+    parser.add_argument("--size-mb", type=float, default=4.0)
+    parser.add_argument("--changes", type=int, default=50)
+    parser.add_argument("--uplink-mbit", type=float, default=2.0)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="firmware-bench-"))
+    v1, v2 = synthetic_images(int(args.size_mb * 1024 * 1024), args.changes)
+    with tempfile.TemporaryFile() as tmp:
+        tmp.write(v1)
+        tmp.seek(0)
+        v1_key, _ = firmware_store.write_stream(tmp)
+    with tempfile.TemporaryFile() as tmp:
+        tmp.write(v2)
+        tmp.seek(0)
+        v2_key, v2_size = firmware_store.write_stream(tmp)
+
+    start = time.process_time()
+    artifacts = firmware_artifacts.build_firmware_artifacts(v2_key, v2_size, [(1, v1_key)])
+    print(f"Image {v2_size / 1024:.0f} KB, {args.changes} changes, build CPU {(time.process_time() - start) * 1000:.0f} ms total "
+          f"(gzip level {settings.FIRMWARE_GZIP_LEVEL}, zstd level {settings.FIRMWARE_ZSTD_LEVEL})")
+
+    decoders = {
+        "identity": lambda data: data,
+        "gzip": gzip.decompress,
+        "zstd": zstandard.ZstdDecompressor().decompress,
+        "bsdiff4": lambda data: bsdiff4.patch(v1, data),
+    }
+    rows = [{"encoding": "identity", "sha256": v2_key, "size_bytes": v2_size}] + artifacts
+    print(f"{'package':<12}{'KB':>10}{'% full':>8}{'transfer s':>12}{'serve CPU ms':>14}{'client ms':>11}")
+    for row in rows:
+        path = firmware_store.path(row["sha256"])
+        data = path.read_bytes()
+        assert decoders[row["encoding"]](data) == v2
+        transfer = row["size_bytes"] * 8 / (args.uplink_mbit * 1_000_000)
+        print(f"{row['encoding']:<12}{row['size_bytes'] / 1024:>10.1f}{row['size_bytes'] / v2_size:>8.1%}{transfer:>12.1f}"
+              f"{cpu_ms(lambda: serve_file(path)):>14.2f}{cpu_ms(lambda: decoders[row['encoding']](data)):>11.1f}")
+
+    on_the_fly = cpu_ms(lambda: gzip.compress(v2, compresslevel=6), repeat=1)
+    print(f"{'gzip (live)':<12}{'':>10}{'':>8}{'':>12}{on_the_fly:>14.2f}{'':>11}  <- per download without prebuilt packages")
+
+
+if __name__ == "__main__":
+    main()
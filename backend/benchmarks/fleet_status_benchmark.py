@@ -0,0 +1,108 @@
+# benchmarks/fleet_status_benchmark.py
+# Filo durumu sorgularını karşılaştırır: tüm mağazaları okuyup durumu satır satır
+# hesaplamak (eski yol: store_status(last_seen)) ile bellek içi filo durum indeksinden
+# (app/core/fleet_status.py) ülke/şehir özeti ve Offline mağaza id'lerini almak.
+# Ayrıca indekse heartbeat işlemenin tekil maliyeti ölçülür.
+#
+# Kullanım (backend/ dizininden):
+#   python -m benchmarks.fleet_status_benchmark --stores 50000 --online-percent 80
+
+import argparse
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from benchmarks import bench_env  # noqa: F401  (ayarları app'ten önce yükler)
+
+from sqlalchemy import select
+
+from app.core.fleet_status import FleetStatusIndex
+from app.database import models
+from app.database.connection import SessionLocal, engine
+from app.schemas.store_schemas import store_status
+
+COUNTRIES = {"Poland": ["Warsaw", "Krakow", "Gdansk"], "Latvia": ["Riga"], "Lithuania": ["Vilnius", "Kaunas"]}
+INSERT_BATCH = 5000
+
+
+def seed(stores: int, online_percent: int):
+    print(f"Seeding {stores:,} stores, ~{online_percent}% online...")
+    tables = [models.User.__table__, models.Store.__table__]
+    models.Base.metadata.drop_all(bind=engine, tables=tables)
+    models.Base.metadata.create_all(bind=engine, tables=tables)
+    rnd = random.Random(7)
+    now = datetime.now(timezone.utc)
+    places = [(country, city) for country, cities in COUNTRIES.items() for city in cities]
+    with engine.begin() as conn:
+        for offset in range(0, stores, INSERT_BATCH):
+            rows = []
+            for i in range(offset + 1, min(stores, offset + INSERT_BATCH) + 1):
+                country, city = rnd.choice(places)
+                online = rnd.randrange(100) < online_percent
+                rows.append({
+                    "id": i, "name": f"Store {i}", "country": country, "city": city,
+                    "country_key": country.lower(), "city_key": city.lower(),
+                    "owner_name": "Owner", "owner_surname": "Bench",
+                    "server_token": f"srv_fleet_{i}", "esp32_token": f"esp_fleet_{i}",
+                    "last_seen": now - timedelta(seconds=rnd.randrange(0, 240) if online else rnd.randrange(600, 86400)),
+                })
+            conn.execute(models.Store.__table__.insert(), rows)
+
+
+def timed(func, repeat: int = 5):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def table_summary():
+    stores = models.Store.__table__
+    db = SessionLocal()
+    try:
+        rows = db.execute(select(stores.c.id, stores.c.country, stores.c.city, stores.c.last_seen)).all()
+    finally:
+        db.close()
+    counts = Counter((row.country, row.city, store_status(row.last_seen)) for row in rows)
+    offline = sorted(row.id for row in rows if store_status(row.last_seen) == "Offline")
+    return counts, offline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fleet status index benchmark")
+    parser.add_argument("--stores", type=int, default=50000)
+    parser.add_argument("--online-percent", type=int, default=80)
+    args = parser.parse_args()
+
+    seed(args.stores, args.online_percent)
+    index = FleetStatusIndex(online_window_seconds=300, sync_interval=15, reload_interval=300, max_events=1000)
+    load_ms, _ = timed(index.reload, repeat=1)
+
+    scan_ms, (_, scan_offline) = timed(table_summary, repeat=3)
+    summary_ms, summary = timed(index.summary)
+    offline_ms, offline = timed(lambda: index.store_ids("Offline"))
+    riga_ms, riga = timed(lambda: index.store_ids("Offline", country="Latvia", city="Riga"))
+    assert offline == scan_offline
+
+    now = datetime.now(timezone.utc)
+    ids = list(range(1, args.stores + 1))
+    start = time.perf_counter()
+    for store_id in ids:
+        index.heartbeat(store_id, now)
+    heartbeat_us = (time.perf_counter() - start) * 1_000_000 / len(ids)
+
+    print(f"Index load (once per {index.reload_interval:.0f}s): {load_ms:.0f} ms")
+    print(f"{'query':<36}{'ms':>10}{'rows':>10}")
+    print(f"{'table read + per-row status':<36}{scan_ms:>10.1f}{args.stores:>10,}")
+    print(f"{'index summary (country/city)':<36}{summary_ms:>10.3f}{summary['online'] + summary['offline']:>10,}")
+    print(f"{'index ?status=Offline':<36}{offline_ms:>10.3f}{len(offline):>10,}")
+    print(f"{'index ?status=Offline&city=Riga':<36}{riga_ms:>10.3f}{len(riga):>10,}")
+    print(f"Heartbeat into index: {heartbeat_us:.2f} us each")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/heartbeat_benchmark.py
+# Heartbeat yazma yolunu ölçer: her ping için UPDATE + commit (eski yöntem)
+# ile bellekte toplayıp periyodik toplu UPDATE yapan HeartbeatAggregator karşılaştırılır.
+#
+# Kullanım (backend/ dizininden):
+#   python -m benchmarks.heartbeat_benchmark --stores 10000 --pings 50000
+
+import argparse
+import random
+import time
+from datetime import datetime, timezone
+
+from benchmarks import bench_env  # noqa: F401  (ayarları app'ten önce yükler)
+
+from app.core.heartbeat import HeartbeatAggregator
+from app.database import models
+from app.database.connection import SessionLocal, engine
+
+
+def setup_stores(store_count: int):
+    print(f"Preparing {store_count} stores...")
+    tables = [models.Store.__table__]
+    models.Base.metadata.drop_all(bind=engine, tables=tables)
+    models.Base.metadata.create_all(bind=engine, tables=tables)
+    rows = [
+        {"name": f"Store {i}", "country": "Poland", "city": "Warsaw", "server_token": f"srv_bench_{i}"}
+        for i in range(1, store_count + 1)
+    ]
+    with engine.begin() as conn:
+        conn.execute(models.Store.__table__.insert(), rows)
+
+
+def bench_direct_writes(store_count: int, pings: int) -> float:
+    """Eski yöntem: her heartbeat kendi UPDATE ve commit'ini yapar."""
+    db = SessionLocal()
+    stores = models.Store.__table__
+    start = time.perf_counter()
+    try:
+        for _ in range(pings):
+            store_id = random.randint(1, store_count)
+            db.execute(
+                stores.update().where(stores.c.id == store_id).values(last_seen=datetime.now(timezone.utc))
+            )
+            db.commit()
+    finally:
+        db.close()
+    return pings / (time.perf_counter() - start)
+
+
+def bench_aggregated(store_count: int, pings: int, flush_interval: float) -> tuple:
+    """Yeni yöntem: heartbeat bellekte kaydedilir, arka plan thread'i toplu yazar."""
+    aggregator = HeartbeatAggregator(flush_interval=flush_interval)
+    aggregator.start()
+    start = time.perf_counter()
+    for _ in range(pings):
+        aggregator.record(random.randint(1, store_count))
+    ingest_rate = pings / (time.perf_counter() - start)
+
+    flush_start = time.perf_counter()
+    aggregator.stop()
+    final_flush = time.perf_counter() - flush_start
+    return ingest_rate, final_flush
+
+
+def bench_single_flush(store_count: int) -> float:
+    """Tüm mağazalar kirliyken tek bir toplu UPDATE'in süresini ölçer."""
+    aggregator = HeartbeatAggregator(flush_interval=3600)
+    for store_id in range(1, store_count + 1):
+        aggregator.record(store_id)
+    start = time.perf_counter()
+    aggregator.flush()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Heartbeat write-path benchmark")
+    parser.add_argument("--stores", type=int, default=10000)
+    parser.add_argument("--pings", type=int, default=50000)
+    parser.add_argument("--direct-pings", type=int, default=5000,
+                        help="Eski yöntem yavaş olduğu için daha az ping ile ölçülür.")
+    parser.add_argument("--flush-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    setup_stores(args.stores)
+
+    direct_rate = bench_direct_writes(args.stores, args.direct_pings)
+    aggregated_rate, final_flush = bench_aggregated(args.stores, args.pings, args.flush_interval)
+    full_flush = bench_single_flush(args.stores)
+
+    print()
+    print(f"{'mode':<28}{'heartbeats/sec':>16}")
+    print(f"{'direct UPDATE + commit':<28}{direct_rate:>16,.0f}")
+    print(f"{'aggregated (write-behind)':<28}{aggregated_rate:>16,.0f}")
+    print()
+    print(f"Final flush on stop: {final_flush * 1000:.1f} ms")
+    print(f"One batched UPDATE for {args.stores} dirty stores: {full_flush * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
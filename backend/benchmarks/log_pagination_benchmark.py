@@ -0,0 +1,108 @@
+# benchmarks/log_pagination_benchmark.py
+# Mağaza log sorgularında OFFSET/LIMIT ile keyset (cursor) sayfalamayı karşılaştırır.
+# Tablo milyonlarca satırla doldurulur; aynı sayfa derinliği için iki yöntemin
+# süresi ölçülür. Keyset sorgusu (store_id, timestamp, id) indeksini kullanır.
+#
+# Kullanım (backend/ dizininden):
+#   python -m benchmarks.log_pagination_benchmark --rows 2000000 --stores 50
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks import bench_env  # noqa: F401  (ayarları app'ten önce yükler)
+
+from app.crud import log_crud
+from app.database import models
+from app.database.connection import SessionLocal, engine
+
+PAGE_SIZE = 100
+INSERT_BATCH = 50000
+
+
+def seed(rows: int, stores: int, days: int):
+    print(f"Seeding {rows:,} log rows for {stores} stores...")
+    tables = [models.Store.__table__, models.Log.__table__]
+    models.Base.metadata.drop_all(bind=engine, tables=tables)
+    models.Base.metadata.create_all(bind=engine, tables=tables)
+
+    now = datetime.now(timezone.utc)
+    span = days * 24 * 3600
+    with engine.begin() as conn:
+        conn.execute(models.Store.__table__.insert(), [
+            {"name": f"Store {i}", "country": "Poland", "city": "Warsaw"} for i in range(1, stores + 1)
+        ])
+    start = time.perf_counter()
+    for offset in range(0, rows, INSERT_BATCH):
+        batch = [
+            {
+                "store_id": random.randint(1, stores),
+                "source": "server",
+                "level": "INFO",
+                "message": "benchmark log line",
+                "timestamp": now - timedelta(seconds=random.randint(0, span)),
+            }
+            for _ in range(min(INSERT_BATCH, rows - offset))
+        ]
+        with engine.begin() as conn:
+            conn.execute(models.Log.__table__.insert(), batch)
+    print(f"Seeded in {time.perf_counter() - start:.1f} s")
+
+
+def time_offset_page(db, store_id: int, page: int, days: int) -> float:
+    start = time.perf_counter()
+    log_crud.get_logs_by_store(db, store_id=store_id, days=days, skip=page * PAGE_SIZE, limit=PAGE_SIZE)
+    elapsed = time.perf_counter() - start
+    db.expunge_all()
+    return elapsed
+
+
+def time_keyset_pages(db, store_id: int, pages: int, days: int) -> dict:
+    """İlk 'pages' sayfayı imleçle gezer ve belirli derinliklerdeki sayfa sürelerini döndürür."""
+    timings = {}
+    before = None
+    for page in range(pages):
+        start = time.perf_counter()
+        rows = log_crud.get_logs_by_store(db, store_id=store_id, days=days, limit=PAGE_SIZE, before=before)
+        timings[page] = time.perf_counter() - start
+        db.expunge_all()
+        if len(rows) < PAGE_SIZE:
+            break
+        before = (rows[-1].timestamp, rows[-1].id)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Store log pagination benchmark")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--stores", type=int, default=50)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--skip-seed", action="store_true", help="Mevcut veriyi kullan")
+    args = parser.parse_args()
+
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    if not args.skip_seed:
+        seed(args.rows, args.stores, args.days)
+
+    rows_per_store = args.rows // args.stores
+    db = SessionLocal()
+    try:
+        # Isınma: bağlantı ve sorgu derleme maliyetini ölçümden çıkar.
+        log_crud.get_logs_by_store(db, store_id=1, days=args.days, limit=PAGE_SIZE)
+
+        keyset = time_keyset_pages(db, 1, rows_per_store // PAGE_SIZE + 1, args.days)
+        max_page = max(keyset)
+        depths = sorted({0, max_page // 10, max_page // 2, max_page})
+        print()
+        print(f"{'page':>8}{'OFFSET/LIMIT ms':>18}{'keyset ms':>12}")
+        for page in depths:
+            offset_ms = time_offset_page(db, 1, page, args.days) * 1000
+            keyset_ms = keyset[page] * 1000
+            print(f"{page:>8}{offset_ms:>18.2f}{keyset_ms:>12.2f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# benchmarks/password_hash_benchmark.py
+# İki ölçüm yapar:
+#   1) Ayar: verilen bellek/paralellik için time_cost değerlerini dener ve tek bir
+#      hash'in --target-ms hedefini aşmadığı en yüksek time_cost'u önerir
+#      (ARGON2_TIME_COST / ARGON2_MEMORY_COST / ARGON2_PARALLELISM).
+#   2) Giriş dalgası: --logins adet şifre doğrulamasını eski yöntemle (istek
+#      threadpool'unda, 40 thread) ve password_hasher süreç havuzu üzerinden çalıştırır.
+#      Dalga sürerken threadpool'a gönderilen boş bir işin ne kadar beklediği de
+#      ölçülür; diğer senkron rotaların dalgadan ne kadar etkilendiğini gösterir.
+#
+# Kullanım (backend/ dizininden):
+#   python -m benchmarks.password_hash_benchmark --target-ms 250 --logins 200
+
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import bench_env  # noqa: F401  (ayarları app'ten önce yükler)
+
+from app.core.config import settings
+from app.core.password_hasher import PasswordHasher, _context
+
+PASSWORD = "correct horse battery staple"
+REQUEST_THREADS = 40
+
+
+def measure_hash_ms(params, samples: int) -> float:
+    context = _context(params)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.hash(PASSWORD)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def tune(args):
+    print(f"memory_cost={args.memory_cost} KiB, parallelism={args.parallelism}, target={args.target_ms} ms")
+    print(f"{'time_cost':>10}{'hash ms':>10}")
+    best = None
+    for time_cost in range(1, args.max_time_cost + 1):
+        ms = measure_hash_ms((time_cost, args.memory_cost, args.parallelism), args.samples)
+        print(f"{time_cost:>10}{ms:>10.1f}")
+        if ms > args.target_ms:
+            break
+        best = time_cost
+    if best is None:
+        print("Even time_cost=1 exceeds the target; lower ARGON2_MEMORY_COST.")
+    else:
+        print(f"Suggested: ARGON2_TIME_COST={best} ARGON2_MEMORY_COST={args.memory_cost} ARGON2_PARALLELISM={args.parallelism}")
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[max(0, int(len(values) * fraction) - 1)]
+
+
+async def probe_threadpool(executor, stop: asyncio.Event, waits: list):
+    """Dalga sürerken threadpool'a boş iş gönderir ve başlamasına kadar geçen süreyi ölçer."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = time.perf_counter()
+        await loop.run_in_executor(executor, lambda: None)
+        waits.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def login_burst(name: str, args, params, hashed: str):
+    executor = ThreadPoolExecutor(max_workers=REQUEST_THREADS)
+    loop = asyncio.get_running_loop()
+    hasher = PasswordHasher(workers=args.workers, max_pending=args.logins, params=params)
+    latencies, probe_waits = [], []
+    stop = asyncio.Event()
+
+    def inline_verify():
+        return _context(params).verify(PASSWORD, hashed)
+
+    async def login():
+        start = time.perf_counter()
+        if name == "inline":
+            await loop.run_in_executor(executor, inline_verify)
+        else:
+            await hasher.verify_and_update_async(PASSWORD, hashed)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    if name == "pool":
+        # Süreçlerin açılma maliyetini ölçümden çıkar.
+        await asyncio.gather(*(hasher.verify_and_update_async(PASSWORD, hashed) for _ in range(args.workers)))
+
+    probe = asyncio.create_task(probe_threadpool(executor, stop, probe_waits))
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(args.logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    hasher.stop()
+    executor.shutdown()
+
+    print(f"{name:<8}{args.logins / elapsed:>10.1f}{statistics.median(latencies):>10.1f}"
+          f"{percentile(latencies, 0.95):>10.1f}{percentile(probe_waits, 0.95):>16.1f}")
+
+
+async def burst(args):
+    params = (settings.ARGON2_TIME_COST, settings.ARGON2_MEMORY_COST, settings.ARGON2_PARALLELISM)
+    hashed = _context(params).hash(PASSWORD)
+    print(f"\nLogin burst: {args.logins} logins, params={params}, pool workers={args.workers}")
+    print(f"{'mode':<8}{'login/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'probe p95 ms':>16}")
+    for name in ("inline", "pool"):
+        await login_burst(name, args, params, hashed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Argon2 parameter tuning and login burst benchmark")
+    parser.add_argument("--target-ms", type=float, default=250.0)
+    parser.add_argument("--memory-cost", type=int, default=settings.ARGON2_MEMORY_COST, help="KiB")
+    parser.add_argument("--parallelism", type=int, default=settings.ARGON2_PARALLELISM)
+    parser.add_argument("--max-time-cost", type=int, default=10)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=max(1, settings.PASSWORD_HASH_WORKERS))
+    args = parser.parse_args()
+
+    tune(args)
+    asyncio.run(burst(args))
+
+
+if __name__ == "__main__":
+    main()
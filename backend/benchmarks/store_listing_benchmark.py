@@ -0,0 +1,94 @@
+# benchmarks/store_listing_benchmark.py
+# GET /api/stores için tam görünüm (cihazlar + kurulumcu, StoreResponse) ile
+# özet görünümü (?view=summary, StoreSummaryResponse) karşılaştırır. Her sayfa için
+# yanıt boyutu ve süre ölçülür.
+#
+# Kullanım (backend/ dizininden):
+#   python -m benchmarks.store_listing_benchmark --stores 10000 --devices-per-store 8
+
+import argparse
+import statistics
+import time
+
+from benchmarks import bench_env  # noqa: F401  (ayarları app'ten önce yükler)
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.principal_cache import Principal
+from app.database import models
+from app.database.connection import engine
+from app.routes import store_routes
+from app.security.security import get_current_user
+
+INSTALLERS = 50
+INSERT_BATCH = 5000
+
+
+def seed(stores: int, devices_per_store: int):
+    print(f"Seeding {stores:,} stores with {devices_per_store} devices each...")
+    tables = [models.User.__table__, models.Store.__table__, models.Device.__table__]
+    models.Base.metadata.drop_all(bind=engine, tables=tables)
+    models.Base.metadata.create_all(bind=engine, tables=tables)
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [
+            {"email": f"installer{i}@bench.example.com", "name": f"Installer{i}", "surname": "Bench",
+             "hashed_password": "x", "role": models.UserRole.Engineer, "country": "Poland", "is_active": True}
+            for i in range(1, INSTALLERS + 1)
+        ])
+        for offset in range(0, stores, INSERT_BATCH):
+            ids = range(offset + 1, min(stores, offset + INSERT_BATCH) + 1)
+            conn.execute(models.Store.__table__.insert(), [
+                {"id": i, "name": f"Store {i}", "country": "Poland", "city": "Warsaw", "branch": f"B{i}",
+                 "country_key": "poland", "city_key": "warsaw",
+                 "address": f"Street {i}", "owner_name": "Owner", "owner_surname": "Bench", "working_hours": "08-22",
+                 "server_token": f"srv_list_{i}", "esp32_token": f"esp_list_{i}", "installer_id": i % INSTALLERS + 1}
+                for i in ids
+            ])
+            conn.execute(models.Device.__table__.insert(), [
+                {"store_id": i, "device_local_id": d, "screen_size": "7", "wifi_ssid": "bench", "wifi_password": "x"}
+                for i in ids for d in range(1, devices_per_store + 1)
+            ])
+
+
+def build_client() -> TestClient:
+    app = FastAPI()
+    app.include_router(store_routes.router)
+    app.dependency_overrides[get_current_user] = lambda: Principal(
+        id=1, email="bench", role=models.UserRole.Admin, country=None, is_active=True, assigned_store_id=None
+    )
+    return TestClient(app)
+
+
+def measure(client: TestClient, view: str, stores: int, page_size: int, pages: int) -> dict:
+    timings, sizes = [], []
+    step = max(page_size, stores // pages)
+    for skip in range(0, stores, step):
+        start = time.perf_counter()
+        response = client.get("/api/stores", params={"skip": skip, "limit": page_size, "view": view})
+        timings.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+        sizes.append(len(response.content))
+    return {"p50": statistics.median(timings), "max": max(timings), "bytes": statistics.mean(sizes)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full vs summary store listing benchmark")
+    parser.add_argument("--stores", type=int, default=10000)
+    parser.add_argument("--devices-per-store", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    seed(args.stores, args.devices_per_store)
+    client = build_client()
+    print(f"{'page size':>10}{'view':>10}{'p50 ms':>10}{'max ms':>10}{'KB/page':>10}")
+    for page_size in (100, 1000):
+        for view in ("full", "summary"):
+            measure(client, view, args.stores, page_size, 2)  # ısınma
+            result = measure(client, view, args.stores, page_size, args.pages)
+            print(f"{page_size:>10}{view:>10}{result['p50']:>10.1f}{result['max']:>10.1f}{result['bytes'] / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# backend/migrate_profile_pictures.py
+# Bu script, 'users.profile_picture' sütununda base64 olarak tutulan eski profil
+# resimlerini içerik adresli depoya (uploaded_files/profile_pictures) taşır.
+# Her kullanıcı için resim küçültülür, 'profile_picture_key' doldurulur ve eski
+# base64 verisi silinir. Tekrar çalıştırılması güvenlidir; taşınmış kayıtlar atlanır.
+#
+# Kullanım (backend/ dizininden):
+#   python migrate_profile_pictures.py
+
+import sys
+from os.path import abspath, dirname
+
+# Projenin ana dizinini Python path'ine ekle
+sys.path.insert(0, dirname(abspath(__file__)))
+
+from sqlalchemy.orm import undefer
+
+from app.core.profile_pictures import InvalidProfilePicture, save_base64_profile_picture
+from app.database.connection import SessionLocal, engine
+from app.database.models import User
+from app.database.schema import sync_schema
+
+BATCH_SIZE = 50
+
+
+def migrate_profile_pictures():
+    db = SessionLocal()
+    migrated = failed = 0
+    last_id = 0
+    try:
+        while True:
+            # Resimler büyük olabileceği için kullanıcılar küçük partiler halinde okunur.
+            users = (
+                db.query(User)
+                .options(undefer(User.profile_picture))
+                .filter(User.id > last_id, User.profile_picture.isnot(None))
+                .order_by(User.id)
+                .limit(BATCH_SIZE)
+                .all()
+            )
+            if not users:
+                break
+
+            for user in users:
+                last_id = user.id
+                if not user.profile_picture_key:
+                    try:
+                        user.profile_picture_key = save_base64_profile_picture(user.profile_picture)
+                    except InvalidProfilePicture as e:
+                        print(f"User {user.id} ({user.email}): {e}, skipped.")
+                        failed += 1
+                        continue
+                    migrated += 1
+                user.profile_picture = None
+
+            db.commit()
+            db.expunge_all()
+    finally:
+        db.close()
+
+    print(f"✅ {migrated} profile picture(s) migrated, {failed} failed.")
+
+
+if __name__ == "__main__":
+    sync_schema(engine)  # 'profile_picture_key' sütununun mevcut olduğundan emin ol
+    migrate_profile_pictures()
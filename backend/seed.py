@@ -5,7 +5,7 @@ import json # JSON modülünü import ediyoruz
 from sqlalchemy.orm import Session
 from app.database.connection import engine, Base, SessionLocal
 from app.database import models
-from app.security.security import get_password_hash
+from app.core.password_hasher import password_hasher
 from app.utils.token_utils import generate_server_token, generate_esp32_token
 
 # DÜZELTME: Veriler artık JSON dosyalarından okunacak.
@@ -33,11 +33,12 @@ def seed_users(db: Session):
         print("Seeding stopped.")
         return # Dosya yoksa işlemi durdur
 
+    # Şifreleri hash havuzundaki bütün süreçlerle paralel hash'le
+    passwords = [user_data.pop('password', 'default_password') for user_data in users_data]
+    for user_data, hashed_password in zip(users_data, password_hasher.hash_many(passwords)):
+        user_data['hashed_password'] = hashed_password
+
     for user_data in users_data:
-        # Şifreyi hash'le
-        password = user_data.pop('password', 'default_password')
-        user_data['hashed_password'] = get_password_hash(password)
-        
         # models.User, string rolünü otomatik olarak Enum'a çevirecektir.
         user = models.User(**user_data)
         db.add(user)
@@ -110,6 +111,7 @@ def run_seeding():
         db.rollback()
     finally:
         db.close()
+        password_hasher.stop()
 
 if __name__ == "__main__":
     run_seeding()
\ No newline at end of file
@@ -0,0 +1,46 @@
+# tests/conftest.py
+# Testler geçici bir SQLite veritabanıyla çalışır; zorunlu ayarlar app modülleri
+# import edilmeden önce burada verilir.
+#
+# Kullanım (backend/ dizininden):
+#   python -m pytest -q tests
+
+import os
+import tempfile
+
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="smart-shelf-tests-"), "test.db")
+
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DB_PATH}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+os.environ.setdefault("ENCRYPTION_KEY", "MDAwMDAwMDAwMDAwMDAwMDAwMDAwMDAwMDAwMDAwMDA=")
+
+import pytest
+
+from app.database import models
+from app.database.connection import SessionLocal, engine
+
+models.Base.metadata.create_all(bind=engine)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def store(db):
+    """Testler için asgari alanlarla bir mağaza oluşturur."""
+    count = db.query(models.Store).count() + 1
+    db_store = models.Store(
+        name=f"Store {count}", country="Poland", city="Warsaw", owner_name="Owner", owner_surname="Test",
+        working_hours="08-22", server_token=f"srv_test_{count}", esp32_token=f"esp_test_{count}",
+    )
+    db.add(db_store)
+    db.commit()
+    return db_store
@@ -0,0 +1,49 @@
+# tests/test_firmware_rollout.py
+
+import asyncio
+from types import SimpleNamespace
+
+from app.core.firmware_rollout import rollout_bucket, select_release
+from app.crud import async_firmware_crud
+from app.database import models
+from app.database.async_connection import AsyncSessionLocal
+
+
+def release(firmware_id: int, version: str, percent: int = 100, countries: str = None):
+    return SimpleNamespace(id=firmware_id, version=version, rollout_percent=percent, rollout_countries=countries)
+
+
+def test_select_release_keeps_installed_version_when_wave_is_paused():
+    store_id = next(i for i in range(1, 1000) if rollout_bucket(2, i) >= 10)
+    v1 = release(1, "1.0")
+    v2 = release(2, "2.0", percent=10)  # dalga durduruldu; mağaza artık kapsamda değil
+    releases = [v2, v1]
+
+    assert select_release(releases, store_id, "Poland") is v1
+    assert select_release(releases, store_id, "Poland", current_version="1.0") is v1
+    # 2.0'ı dalga durdurulmadan önce kurmuş mağaza 1.0'a döndürülmez.
+    assert select_release(releases, store_id, "Poland", current_version="2.0") is v2
+
+
+def test_select_release_country_wave():
+    v1 = release(1, "1.0", countries="germany")
+    assert select_release([v1], 1, "Poland") is None
+    assert select_release([v1], 1, "Germany") is v1
+    assert select_release([v1], 1, "Poland", current_version="1.0") is v1
+
+
+def test_concurrent_slot_requests_respect_limit(db, store):
+    firmware = models.FirmwareUpdate(target="slots", version="1.0", file_url="/fw/1.0.bin", max_concurrent_downloads=2)
+    db.add(firmware)
+    db.commit()
+    store_ids = [store.id * 1000 + i for i in range(6)]
+
+    async def acquire(store_id):
+        async with AsyncSessionLocal() as session:
+            return await async_firmware_crud.acquire_download_slot(session, firmware.id, store_id, limit=2)
+
+    async def scenario():
+        return await asyncio.gather(*(acquire(store_id) for store_id in store_ids))
+
+    assert sum(asyncio.run(scenario())) == 2
+    assert db.query(models.FirmwareDownloadSlot).filter_by(firmware_id=firmware.id).count() == 2
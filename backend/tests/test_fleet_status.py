@@ -0,0 +1,104 @@
+# tests/test_fleet_status.py
+
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+from app.core.fleet_status import OFFLINE, ONLINE, FleetStatusIndex
+
+Row = namedtuple("Row", "id country city last_seen")
+
+
+def make_index(max_events: int = 100) -> FleetStatusIndex:
+    return FleetStatusIndex(online_window_seconds=300, sync_interval=15, reload_interval=300, max_events=max_events)
+
+
+def ago(seconds: float) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(seconds=seconds)
+
+
+def test_initial_load_builds_groups_without_events():
+    index = make_index()
+    received = []
+    index.subscribe(received.append)
+    index.load([
+        Row(1, "Poland", "Warsaw", ago(10)),
+        Row(2, "Poland", "Kraków", None),
+        Row(3, "Latvia", "Riga", ago(3600)),
+    ])
+
+    assert received == []
+    assert index.store_ids(ONLINE) == [1]
+    assert index.store_ids(OFFLINE) == [2, 3]
+    assert index.store_ids(OFFLINE, country="poland", city="krakow") == [2]
+    summary = index.summary()
+    assert (summary["online"], summary["offline"]) == (1, 2)
+    assert [(c["country"], c["online"], c["offline"]) for c in summary["countries"]] == [("Latvia", 0, 1), ("Poland", 1, 1)]
+    _, last_seq, reset = index.events_after(None, 0)
+    assert (last_seq, reset) == (0, True)
+
+
+def test_heartbeat_emits_transitions():
+    index = make_index()
+    index.load([Row(1, "Poland", "Warsaw", None), Row(2, "Poland", "Warsaw", None)])
+    received = []
+    index.subscribe(received.append)
+
+    index.heartbeat(1, ago(0))
+    index.heartbeat(2, ago(0))
+    index.heartbeat(1, ago(5))  # eski heartbeat last_seen'i geri almaz
+    index.heartbeat(99, ago(0))  # indekste olmayan mağaza yok sayılır
+    assert index.store_ids(ONLINE) == [1, 2]
+    assert [(event.seq, event.store_id, event.status) for event in received] == [(1, 1, ONLINE), (2, 2, ONLINE)]
+
+
+def test_sweep_moves_expired_store_offline():
+    index = make_index()
+    index.load([Row(1, "Poland", "Warsaw", None)])
+    index.heartbeat(1, ago(400))  # o anki zamana göre Online, ama süresi çoktan dolmuş
+    index.sweep()
+    assert index.store_ids(OFFLINE) == [1]
+    events, _, _ = index.events_after(index.epoch, 0)
+    assert [(event.store_id, event.status) for event in events] == [(1, ONLINE), (1, OFFLINE)]
+
+
+def test_event_cursor_epoch_and_gaps():
+    index = make_index(max_events=3)
+    index.load([Row(i, "Poland", "Warsaw", None) for i in range(1, 6)])
+    _, cursor, reset = index.events_after(None, 0)
+    assert reset and cursor == 0
+
+    index.heartbeat(1, ago(0))
+    index.heartbeat(2, ago(0))
+    events, cursor, reset = index.events_after(index.epoch, cursor, limit=1)
+    assert not reset and [event.store_id for event in events] == [1] and cursor == 1
+    stale_cursor = cursor
+    events, cursor, reset = index.events_after(index.epoch, cursor, visible={3})
+    assert not reset and events == [] and cursor == 2
+
+    # Başka bir süreç (veya yeniden başlatma) aynı seq'i farklı olaylar için kullanır.
+    assert index.events_after("another-worker", cursor)[2]
+    assert index.events_after(index.epoch, cursor + 10)[2]
+
+    # Tampon 3 olay tutar; imleçten sonraki olaylar düştüyse istemci yeniden okumalı.
+    for store_id in (3, 4, 5):
+        index.heartbeat(store_id, ago(0))
+    events, _, reset = index.events_after(index.epoch, cursor)
+    assert not reset and [event.store_id for event in events] == [3, 4, 5]
+    events, new_cursor, reset = index.events_after(index.epoch, stale_cursor)
+    assert reset and events == [] and new_cursor == 5
+
+
+def test_upsert_moves_store_between_cities_and_remove():
+    index = make_index()
+    index.load([Row(1, "Poland", "Warsaw", ago(10))])
+    index.upsert(1, "Poland", "Gdańsk")
+    assert index.store_ids(ONLINE, city="gdansk") == [1]
+    assert [c["city"] for c in index.summary()["countries"][0]["cities"]] == ["Gdańsk"]
+
+    index.remove(1)
+    assert index.summary()["countries"] == []
+
+    # Sonraki yüklemeler (diğer worker'lardaki değişiklikler) olay üretir.
+    index.load([Row(1, "Poland", "Warsaw", ago(10))])
+    events, _, _ = index.events_after(index.epoch, 0)
+    assert [(event.store_id, event.status) for event in events] == [(1, ONLINE)]
@@ -0,0 +1,88 @@
+# tests/test_log_crud.py
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.dialects import mysql
+from sqlalchemy.exc import OperationalError
+
+from app.crud import async_log_crud, log_crud
+from app.database import models
+from app.database.async_connection import AsyncSessionLocal
+from app.schemas import log_schemas
+
+
+START = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(minutes=1)
+
+
+def log_rows(store_id: int, count: int, tag: str, start: datetime = START) -> list[dict]:
+    return log_crud.build_log_rows(store_id, [
+        log_schemas.LogCreate(source="test", level="INFO", message=f"{tag} {i}", timestamp=start + timedelta(seconds=i))
+        for i in range(count)
+    ])
+
+
+def fail_next_commit(session):
+    """Bir sonraki commit'i geri alıp hata verdirir (ör. bağlantı kopması)."""
+    original = session.commit
+
+    def commit():
+        session.commit = original
+        session.rollback()
+        raise OperationalError("COMMIT", {}, Exception("connection lost"))
+
+    session.commit = commit
+
+
+def stored(db, store_id: int):
+    logs = db.query(models.Log).filter(models.Log.store_id == store_id).count()
+    return logs, log_crud.get_upload_checkpoint(db, store_id)
+
+
+def test_checkpoint_batch_retry_after_failed_commit(db, store):
+    rows = log_rows(store.id, 3, "sync")
+    fail_next_commit(db)
+    with pytest.raises(OperationalError):
+        log_crud.insert_log_batch_with_checkpoint(db, store.id, rows, last_seq=3)
+    assert stored(db, store.id) == (0, None)
+
+    # İstemci son kontrol noktasından devam eder ve aynı satırları tekrar gönderir.
+    assert log_crud.insert_log_batch_with_checkpoint(db, store.id, log_rows(store.id, 3, "sync"), last_seq=3) == 3
+    assert stored(db, store.id) == (3, 3)
+
+    # Commit başarılı olduktan sonra tekrar gönderim filtrede elenir.
+    assert log_crud.insert_log_batch_with_checkpoint(db, store.id, log_rows(store.id, 3, "sync"), last_seq=3) == 0
+    assert stored(db, store.id) == (3, 3)
+
+
+def test_async_checkpoint_batch_retry_after_failed_commit(db, store):
+    async def scenario():
+        async with AsyncSessionLocal() as session:
+            original = session.commit
+
+            async def commit():
+                session.commit = original
+                await session.rollback()
+                raise OperationalError("COMMIT", {}, Exception("connection lost"))
+
+            session.commit = commit
+            with pytest.raises(OperationalError):
+                await async_log_crud.insert_log_batch_with_checkpoint(session, store.id, log_rows(store.id, 3, "async"), 3)
+            return await async_log_crud.insert_log_batch_with_checkpoint(session, store.id, log_rows(store.id, 3, "async"), 3)
+
+    assert asyncio.run(scenario()) == 3
+    assert stored(db, store.id) == (3, 3)
+
+
+def test_mysql_insert_skips_only_unique_key_conflicts():
+    sql = str(log_crud.insert_ignore_statement("mysql").compile(dialect=mysql.dialect()))
+    assert "IGNORE" not in sql
+    assert "ON DUPLICATE KEY UPDATE id = logs.id" in sql
+
+
+def test_duplicate_count_statement_counts_existing_hashes(db, store):
+    rows = log_rows(store.id, 2, "dupcount")
+    log_crud.insert_log_rows(db, rows)
+    batch = rows + log_rows(store.id, 3, "dupcount-new")
+    assert db.execute(log_crud.duplicate_count_statement(batch)).scalar_one() == 2
@@ -0,0 +1,28 @@
+# tests/test_log_dedup.py
+
+from app.core.log_dedup import IdempotencyCache
+
+
+def test_idempotency_key_is_reserved_until_the_response_is_stored():
+    cache = IdempotencyCache(max_entries=10, ttl_seconds=60)
+
+    assert cache.reserve(1, "batch-1") == (True, None)
+    # Aynı anahtarla eşzamanlı gelen istek işlemeye başlamaz.
+    assert cache.reserve(1, "batch-1") == (False, None)
+    assert cache.reserve(2, "batch-1") == (True, None)
+
+    response = {"status_code": 201, "body": {"created": 3, "deduplicated": 0}}
+    cache.put(1, "batch-1", response)
+    assert cache.reserve(1, "batch-1") == (False, response)
+
+
+def test_released_key_can_be_retried():
+    cache = IdempotencyCache(max_entries=10, ttl_seconds=60)
+    assert cache.reserve(1, "batch-1") == (True, None)
+    cache.release(1, "batch-1")
+    assert cache.reserve(1, "batch-1") == (True, None)
+
+    # Tamamlanmış bir yanıt release ile silinmez.
+    cache.put(1, "batch-1", {"status_code": 201, "body": {}})
+    cache.release(1, "batch-1")
+    assert cache.reserve(1, "batch-1")[1] is not None
@@ -0,0 +1,25 @@
+# tests/test_log_queue.py
+
+from datetime import datetime, timezone
+
+from app.core.log_queue import LogIngestQueue
+from app.core.metrics import metrics
+from app.crud import log_crud
+from app.database import models
+from app.database.connection import SessionLocal
+from app.schemas import log_schemas
+
+
+def test_failed_batch_drops_only_bad_rows(db, store):
+    now = datetime.now(timezone.utc)
+    good = log_crud.build_log_rows(store.id, [
+        log_schemas.LogCreate(source="queue", level="INFO", message=f"ok {i}", timestamp=now) for i in range(3)
+    ])
+    bad = log_crud.build_log_rows(store.id, [log_schemas.LogCreate(source="queue", level="INFO", message="bad", timestamp=now)])
+    bad[0]["message"] = None  # NOT NULL ihlali: parti INSERT'i başarısız olur
+
+    dropped_before = metrics.snapshot()["counters"].get("log_queue_dropped_total", 0)
+    LogIngestQueue(max_size=10, batch_size=10, flush_interval=1)._write(good[:2] + bad + good[2:], SessionLocal)
+
+    assert db.query(models.Log).filter(models.Log.source == "queue").count() == 3
+    assert metrics.snapshot()["counters"]["log_queue_dropped_total"] == dropped_before + 1
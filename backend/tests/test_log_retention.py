@@ -0,0 +1,26 @@
+# tests/test_log_retention.py
+
+from datetime import datetime, timedelta, timezone
+
+from app.core import log_retention
+from app.core.log_retention import LogRetentionJob
+from app.database import models
+
+
+def test_partition_failure_does_not_skip_purge(db, store, monkeypatch):
+    old = datetime.now(timezone.utc) - timedelta(days=10_000)
+    db.add(models.Log(store_id=store.id, source="retention", level="INFO", message="eski", timestamp=old))
+    db.commit()
+
+    def broken(self):
+        raise RuntimeError("partition")
+
+    monkeypatch.setattr(LogRetentionJob, "_maintain_partitions", broken)
+    monkeypatch.setattr(log_retention, "acquire_job_lock", lambda *args, **kwargs: True)
+    monkeypatch.setattr(log_retention, "extend_job_lock", lambda *args, **kwargs: None)
+
+    deleted = LogRetentionJob(interval_seconds=60, chunk_size=100, pause_seconds=0).run_once()
+
+    assert deleted >= 1
+    db.expire_all()
+    assert db.query(models.Log).filter(models.Log.source == "retention").count() == 0
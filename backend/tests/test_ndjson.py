@@ -0,0 +1,39 @@
+# tests/test_ndjson.py
+
+import asyncio
+
+import pytest
+
+from app.utils.ndjson import CsvRecordParser, iter_csv_records
+
+
+async def chunked(body: bytes, size: int):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def parse_csv(body: bytes, size: int, max_record_bytes: int = 65536):
+    parser = CsvRecordParser()
+
+    async def collect():
+        return [
+            (line_no, parser.parse(record) if record is not None else None)
+            async for line_no, record in iter_csv_records(chunked(body, size), max_record_bytes=max_record_bytes)
+        ]
+
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("size", [1, 7, 4096])
+def test_quoted_newline_does_not_split_record(size):
+    body = '﻿name,address\r\nA,"Main St 1\nWarsaw"\n\nB,"say ""hi"""\n'.encode("utf-8")
+    assert parse_csv(body, size) == [
+        (1, ["name", "address"]),
+        (2, ["A", "Main St 1\nWarsaw"]),
+        (5, ["B", 'say "hi"']),
+    ]
+
+
+def test_oversized_record_is_reported_once():
+    body = b"name\n" + b"x" * 100 + b"\nB\n"
+    assert parse_csv(body, 16, max_record_bytes=50) == [(1, ["name"]), (2, None), (3, ["B"])]
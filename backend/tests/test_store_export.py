@@ -0,0 +1,21 @@
+# tests/test_store_export.py
+
+import asyncio
+
+from app.crud import async_store_crud
+from app.database import models
+from app.database.async_connection import AsyncSessionLocal
+
+
+def test_export_streams_stores_with_null_owner_fields(db):
+    db_store = models.Store(name="Legacy", country="Poland", city="Warsaw", server_token="srv_legacy", esp32_token="esp_legacy")
+    db.add(db_store)
+    db.commit()
+
+    async def export():
+        async with AsyncSessionLocal() as session:
+            return [line async for page in async_store_crud.iter_store_export_pages(session, 2) for line in page]
+
+    lines = {line.id: line for line in asyncio.run(export())}
+    legacy = lines[db_store.id]
+    assert (legacy.ownerName, legacy.ownerSurname, legacy.working_hours) == (None, None, None)
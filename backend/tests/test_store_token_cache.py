@@ -0,0 +1,37 @@
+# tests/test_store_token_cache.py
+
+import asyncio
+
+from app.core.store_token_cache import StoreIdentity, StoreTokenCache
+
+
+def make_cache() -> StoreTokenCache:
+    return StoreTokenCache(max_entries=10, ttl_seconds=60, negative_max_entries=10, negative_ttl_seconds=60)
+
+
+def test_load_overlapping_invalidate_is_not_cached():
+    cache = make_cache()
+    identity = StoreIdentity(id=1, name="S1", country="Poland")
+
+    def loader(token):
+        # Sorgu sürerken token yenilendi (regenerate_server_token / delete_store).
+        cache.invalidate(token)
+        return identity
+
+    assert cache.resolve("srv_old", loader) == identity
+    assert cache.get("srv_old") == (False, None)
+
+    assert cache.resolve("srv_old", lambda token: None) is None
+    assert cache.get("srv_old") == (True, None)
+
+
+def test_async_load_overlapping_invalidate_is_not_cached():
+    cache = make_cache()
+    identity = StoreIdentity(id=1, name="S1", country="Poland")
+
+    async def loader(token):
+        cache.invalidate(token)
+        return identity
+
+    assert asyncio.run(cache.resolve_async("srv_old", loader)) == identity
+    assert cache.get("srv_old") == (False, None)
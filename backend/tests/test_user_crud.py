@@ -0,0 +1,18 @@
+# tests/test_user_crud.py
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.password_hasher import PasswordHasherBusy
+from app.crud import user_crud
+from app.security import security
+
+
+def test_password_hash_queue_full_is_503(monkeypatch):
+    def busy(password):
+        raise PasswordHasherBusy("Password hashing queue is full")
+
+    monkeypatch.setattr(security, "get_password_hash", busy)
+    with pytest.raises(HTTPException) as error:
+        user_crud._hash_password("secret")
+    assert error.value.status_code == 503 and error.value.headers == {"Retry-After": "1"}
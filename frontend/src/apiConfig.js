@@ -2,3 +2,9 @@
 // We define the backend server address in a central place.
 // If the server address changes in the future, it will be enough to change only this file.
 export const API_BASE_URL = "http://localhost:8000";
+
+// The backend returns file URLs (e.g. profile pictures) relative to its own origin
+// unless PUBLIC_BASE_URL is set there. Prefix them so <img src> loads them from the API
+// server instead of the frontend's origin. data: and absolute URLs are returned as is.
+export const assetUrl = (url) =>
+  url && url.startsWith("/") && !url.startsWith("//") ? `${API_BASE_URL}${url}` : url;
@@ -4,6 +4,7 @@ import React, { useState, useRef, useEffect, useMemo } from "react";
 import { useAuth } from "../../context/AuthContext";
 import { Menu, X, Sun, Moon, ChevronDown, User, LogOut } from "lucide-react";
 import { useNavigate, Link } from "react-router-dom";
+import { assetUrl } from "../../apiConfig";
 
 const Header = ({ isSidebarExpanded, toggleSidebar }) => {
   const {
@@ -93,7 +94,7 @@ const Header = ({ isSidebarExpanded, toggleSidebar }) => {
               className="flex items-center space-x-2 p-1 rounded-md hover:bg-white/10">
               <img
                 src={
-                  profileUser.profile_picture || // Use profile picture from backend
+                  assetUrl(profileUser.profile_picture) || // Use profile picture from backend
                   `https://ui-avatars.com/api/?name=${profileUser.name}+${profileUser.surname}&background=0D8ABC&color=fff`
                 }
                 alt="Profile"
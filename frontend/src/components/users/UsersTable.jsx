@@ -3,6 +3,7 @@
 import React, { useMemo } from "react";
 import { useAuth } from "../../context/AuthContext";
 import GlobalLoader from "../common/GlobalLoader";
+import { assetUrl } from "../../apiConfig";
 
 const UsersTable = ({ users, isLoading, renderActions, type = "company" }) => {
   const { currentColors, appTranslations, language, isDarkMode } = useAuth();
@@ -46,7 +47,7 @@ const UsersTable = ({ users, isLoading, renderActions, type = "company" }) => {
             <img
               className="h-10 w-10 rounded-full object-cover"
               src={
-                user.profile_picture ||
+                assetUrl(user.profile_picture) ||
                 `https://ui-avatars.com/api/?name=${user.name}+${user.surname}&background=random&color=fff`
               }
               alt={`${user.name} ${user.surname}`}
@@ -6,6 +6,7 @@ import { Camera, Eye, EyeOff } from "lucide-react";
 import PageHeader from "../../components/common/PageHeader";
 import axiosInstance from "../../api/axiosInstance";
 import GlobalLoader from "../../components/common/GlobalLoader";
+import { assetUrl } from "../../apiConfig";
 
 const ProfileDetailsPage = () => {
   const { profileUser, isDarkMode, appTranslations, language, setProfileUser } =
@@ -231,7 +232,7 @@ const ProfileDetailsPage = () => {
               }`}>
               {formData.profile_picture ? (
                 <img
-                  src={formData.profile_picture}
+                  src={assetUrl(formData.profile_picture)}
                   alt="Profile"
                   className="w-full h-full object-cover"
                 />
@@ -7,6 +7,7 @@ import { useNavigate, useParams } from "react-router-dom";
 import PageHeader from "../../components/common/PageHeader";
 import { Camera, Eye, EyeOff } from "lucide-react";
 import GlobalLoader from "../../components/common/GlobalLoader";
+import { assetUrl } from "../../apiConfig";
 
 const EditSupermarketUserForm = () => {
   const { isDarkMode, appTranslations, language } = useAuth();
@@ -165,7 +166,7 @@ const EditSupermarketUserForm = () => {
               }`}>
               {formData.profile_picture ? (
                 <img
-                  src={formData.profile_picture}
+                  src={assetUrl(formData.profile_picture)}
                   alt="Profile Preview"
                   className="w-full h-full object-cover"
                 />